@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.attendance_service import AttendanceService, RateLimiter
+from src.face_recognizer import FaceIndex, FaceRecognizer
+from benchmarks.synthetic import draw_face, synthetic_gallery
+
+
+def kiosk_frame(width, height, faces, seed):
+    """One JPEG-encoded synthetic classroom frame"""
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(rng.integers(70, 130, size=(height, width, 3), dtype=np.uint8), (0, 0), 9)
+    size = min(width // (faces + 1), height // 2)
+    for i in range(faces):
+        draw_face(frame, (i + 1) * width // (faces + 1), height // 2, size, int(rng.integers(150, 210)))
+    ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return jpeg.tobytes()
+
+
+def auth_headers():
+    """Authorization header carrying SERVICE_TOKEN, if one is configured"""
+    return {'Authorization': f"Bearer {Config.SERVICE_TOKEN}"} if Config.SERVICE_TOKEN else {}
+
+
+async def request(reader, writer, method, path, body=b'', headers=None):
+    """Send one request on a keep-alive connection; returns (status, headers, json body)"""
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(response_headers.get('content-length', '0')))
+    return status, response_headers, json.loads(payload) if payload else None
+
+
+async def kiosk(host, port, frame, fps, duration, path, samples, statuses):
+    """Post frames at `fps` for `duration` seconds, backing off when told to"""
+    loop = asyncio.get_running_loop()
+    reader, writer = await asyncio.open_connection(host, port)
+    headers = dict(auth_headers(), **{'Content-Type': 'image/jpeg'})
+    end = loop.time() + duration
+    next_send = loop.time()
+    try:
+        while loop.time() < end:
+            started = time.perf_counter()
+            status, response_headers, payload = await request(reader, writer, 'POST', path, frame, headers)
+            statuses[status] += 1
+            if status == 200:
+                samples.append(time.perf_counter() - started)
+                next_send += 1.0 / fps
+            else:
+                next_send = loop.time() + float(response_headers.get('retry-after', '1'))
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, kiosks, fps, duration, faces, path):
+    frames = [kiosk_frame(640, 480, faces, seed) for seed in range(kiosks)]
+    samples, statuses = [], Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        kiosk(host, port, frames[i], fps, duration, path, samples, statuses)
+        for i in range(kiosks)
+    ])
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    status, headers, health = await request(reader, writer, 'GET', '/health', headers=dict(auth_headers(), Connection='close'))
+    writer.close()
+
+    ms = np.asarray(samples) * 1000.0
+    report = {
+        'kiosks': kiosks,
+        'target_fps_per_kiosk': fps,
+        'faces_per_frame': faces,
+        'seconds': round(elapsed, 2),
+        'statuses': dict(statuses),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+    }
+    if len(ms):
+        report.update({
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(ms, 99)), 2),
+        })
+    batches = (health or {}).get('batches') or {}
+    if batches.get('batches'):
+        report['faces_per_batch'] = round(batches['faces'] / batches['batches'], 2)
+    return report
+
+
+async def run_with_local_service(args):
+    """Start an in-process service on a synthetic gallery (no MySQL needed), then load it"""
+    recognizer = FaceRecognizer()
+    recognizer.index = FaceIndex(*synthetic_gallery(args.gallery))
+    # Simulated kiosks all connect from 127.0.0.1, which the service limits
+    # as one client, so the default limit is scaled to the kiosk count
+    rate = args.rate_limit if args.rate_limit is not None else Config.SERVICE_RATE_LIMIT
+    limiter = RateLimiter(rate=rate * args.kiosks, burst=Config.SERVICE_RATE_BURST * args.kiosks)
+    service = AttendanceService(recognizer, workers=args.workers, rate_limiter=limiter, write_attendance=False)
+    host, port = await service.start('127.0.0.1', 0, load_roster=False)
+    try:
+        return await run_load(host, port, args.kiosks, args.fps, args.duration, args.faces, args.path)
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate kiosks posting frames to the attendance service")
+    parser.add_argument("--kiosks", type=int, default=10, help="Concurrent simulated kiosks")
+    parser.add_argument("--fps", type=float, default=2.0, help="Frames per second each kiosk sends")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--faces", type=int, default=3, help="Faces drawn in each kiosk frame")
+    parser.add_argument("--path", default="/recognize", help="Endpoint to load (/recognize or /faces)")
+    parser.add_argument("--host", default=Config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--local", action="store_true",
+                        help="Start a service in this process on a synthetic gallery instead of connecting")
+    parser.add_argument("--gallery", type=int, default=1000, help="Synthetic gallery size with --local")
+    parser.add_argument("--workers", type=int, default=None, help="Service threads with --local")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Per-kiosk requests/second with --local")
+    args = parser.parse_args()
+
+    if args.local:
+        report = asyncio.run(run_with_local_service(args))
+    else:
+        report = asyncio.run(run_load(args.host, args.port, args.kiosks, args.fps, args.duration,
+                                      args.faces, args.path))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import threading
+import time
+import tracemalloc
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.attendance_pipeline import AttendancePipeline
+from src.face_recognizer import FaceIndex, FaceRecognizer
+from benchmarks.synthetic import classroom_video, synthetic_gallery
+
+
+def sample_memory(pipeline, samples, stop, interval):
+    """Record (frames processed, traced bytes) until stop is set"""
+    processed = pipeline.counters['processed']
+    while not stop.wait(interval):
+        samples.append((processed.count, tracemalloc.get_traced_memory()[0]))
+
+
+def check(video, workers, gallery, warmup, interval):
+    """
+    Run the pipeline headless over a video while tracing Python allocations
+
+    Returns:
+        Dict with the memory held after warm-up and at the end, and the stats
+    """
+    recognizer = FaceRecognizer()
+    recognizer.index = FaceIndex(*synthetic_gallery(gallery))
+    pipeline = AttendancePipeline(video, None, recognizer, workers=workers, write_attendance=False)
+    if not pipeline.open():
+        raise RuntimeError(f"Could not open {video}")
+
+    samples, stop = [], threading.Event()
+    tracemalloc.start()
+    sampler = threading.Thread(target=sample_memory, args=(pipeline, samples, stop, interval), daemon=True)
+    sampler.start()
+    pipeline.start()
+    stats = pipeline.run_headless()
+    stop.set()
+    sampler.join()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Compare the memory held just after warm-up with the last samples;
+    # medians smooth over frames that happen to be in flight
+    total = stats['processed']['count']
+    warm = [used for frames, used in samples if warmup * total <= frames < (warmup + 0.1) * total]
+    tail = [used for frames, used in samples if frames >= 0.9 * total]
+    if not warm or not tail:
+        raise RuntimeError("Too few memory samples; use a longer video or a shorter --interval")
+    return {
+        'frames': total,
+        'after_warmup': int(np.median(warm)),
+        'at_end': int(np.median(tail)),
+        'peak': peak,
+        'stats': stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that pipeline memory stays flat over a long synthetic video"
+    )
+    parser.add_argument("--frames", type=int, default=1800, help="Synthetic video length")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--faces", type=int, default=6, help="Faces in the synthetic classroom")
+    parser.add_argument("--workers", type=int, default=None, help="Pipeline worker threads")
+    parser.add_argument("--gallery", type=int, default=1000, help="Synthetic gallery size")
+    parser.add_argument("--warmup", type=float, default=0.2, help="Fraction of frames treated as warm-up")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between memory samples")
+    parser.add_argument("--max-growth-kb", type=float, default=512.0,
+                        help="Fail if traced memory grows by more than this after warm-up")
+    args = parser.parse_args()
+
+    video = classroom_video(args.width, args.height, args.faces, args.frames)
+    started = time.perf_counter()
+    result = check(video, args.workers, args.gallery, args.warmup, args.interval)
+    growth_kb = (result['at_end'] - result['after_warmup']) / 1024
+    buffers = result['stats']['buffers']
+
+    print(f"Processed {result['frames']} frame(s) in {time.perf_counter() - started:.1f}s")
+    print(f"Traced memory after warm-up: {result['after_warmup'] / 1024:.0f} KB, "
+          f"at end: {result['at_end'] / 1024:.0f} KB, peak: {result['peak'] / 1024:.0f} KB")
+    print(f"Buffer allocations: {buffers['frame_allocations']} frame, {buffers['scratch_allocations']} scratch")
+    if growth_kb > args.max_growth_kb:
+        print(f"FAIL: memory grew by {growth_kb:.0f} KB (limit {args.max_growth_kb:.0f} KB)")
+        sys.exit(1)
+    print(f"OK: memory grew by {growth_kb:.0f} KB (limit {args.max_growth_kb:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
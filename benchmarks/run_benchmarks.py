@@ -0,0 +1,359 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.face_detector import DetectionScheduler, detect_faces
+from src.ann_index import IVFIndex
+from src.face_recognizer import FaceEncoder, FaceIndex, deserialize_encoding, load_face_cascade, serialize_encoding
+from src.gallery_file import GalleryIndex, GalleryFile, quantize
+from benchmarks.sqlite_standin import SQLiteStandIn
+from benchmarks.synthetic import classroom_video, synthetic_gallery
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+FACE_COUNTS = [1, 5, 20]
+GALLERY_SIZES = [100, 1000, 10000]
+QUERY_COUNTS = [1, 10, 30]
+ANN_GALLERY_SIZES = [10000, 100000]
+ANN_NPROBES = [1, 4, 8, 16, 32]
+DB_ROWS = 200
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds for a list of durations in seconds"""
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        'runs': len(ms),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'min_ms': round(float(ms.min()), 4),
+    }
+
+
+def repeat(fn, runs, warmup=3):
+    """Call fn `runs` times after a warm-up and return the durations"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_detection(frames, resolutions, face_counts):
+    """
+    Time the per-frame detectMultiScale loop against the detection scheduler
+
+    The per-frame variant is the loop OnlineAttendance originally ran on
+    every camera frame; the scheduled variant is what the pipeline uses now.
+    """
+    face_cascade = load_face_cascade()
+    results = []
+    for width, height in resolutions:
+        for faces in face_counts:
+            path = classroom_video(width, height, faces, frames)
+            for variant in ('per_frame', 'scheduled'):
+                capture = cv2.VideoCapture(path)
+                scheduler = DetectionScheduler()
+                decode, detect, found = [], [], []
+                frame_no = 0
+                while True:
+                    started = time.perf_counter()
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    decoded = time.perf_counter()
+                    if variant == 'per_frame':
+                        boxes = detect_faces(face_cascade, gray)
+                    else:
+                        boxes = scheduler.detect(face_cascade, gray, frame_no)
+                    detect.append(time.perf_counter() - decoded)
+                    decode.append(decoded - started)
+                    found.append(len(boxes))
+                    frame_no += 1
+                capture.release()
+
+                result = {'name': f"detection/{variant}/{width}x{height}/{faces}faces"}
+                result.update(summarize(detect))
+                result.update({
+                    'decode_mean_ms': summarize(decode)['mean_ms'],
+                    'fps': round(len(detect) / (sum(detect) + sum(decode)), 2),
+                    'faces_expected': faces,
+                    'faces_found_mean': round(float(np.mean(found)), 2),
+                })
+                if variant == 'scheduled':
+                    result.update({'full_scans': scheduler.full_scans, 'roi_scans': scheduler.roi_scans})
+                results.append(result)
+    return results
+
+
+def bench_recognition(gallery_sizes, query_counts, runs):
+    """Time gallery matching at several roster sizes, plus batch encoding"""
+    results = []
+    rng = np.random.default_rng(1)
+    for size in gallery_sizes:
+        ids, embeddings = synthetic_gallery(size)
+        started = time.perf_counter()
+        index = FaceIndex(ids, embeddings)
+        build = time.perf_counter() - started
+        for count in query_counts:
+            # Noisy copies of enrolled faces, so most queries match
+            queries = embeddings[rng.integers(0, size, count)]
+            queries = queries + rng.normal(0, 0.02, queries.shape).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            matched = index.match(queries)[0]
+
+            result = {'name': f"recognition/match/{size}gallery/{count}queries"}
+            result.update(summarize(repeat(lambda: index.match(queries), runs)))
+            result.update({
+                'build_ms': round(build * 1000.0, 4),
+                'gallery_bytes': int(index.matrix.nbytes),
+                'match_rate': round(float(np.mean(matched >= 0)), 3),
+            })
+            results.append(result)
+
+    encoder = FaceEncoder()
+    gray = np.random.default_rng(2).integers(0, 255, (720, 1280), dtype=np.uint8)
+    for count in query_counts:
+        boxes = [((i * 40) % 1180, (i * 90) % 620, 100, 100) for i in range(count)]
+        result = {'name': f"recognition/encode/{count}faces"}
+        result.update(summarize(repeat(lambda: encoder.encode_batch(gray, boxes), runs)))
+        results.append(result)
+    return results
+
+
+def bench_ann(gallery_sizes, nprobes, runs, queries=200, batch=10):
+    """
+    Compare IVF search with exact search: latency per batch and recall@1
+
+    Queries are noisy copies of enrolled faces; recall is the share of
+    queries whose best IVF match equals the best exact match.
+    """
+    results = []
+    rng = np.random.default_rng(3)
+    for size in gallery_sizes:
+        ids, embeddings = synthetic_gallery(size)
+        exact = FaceIndex(ids, embeddings)
+        started = time.perf_counter()
+        ivf = IVFIndex.build(ids, embeddings)
+        build = time.perf_counter() - started
+
+        probes = embeddings[rng.integers(0, size, queries)]
+        probes = probes + rng.normal(0, 0.05, probes.shape).astype(np.float32)
+        probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+        truth = exact.match(probes, threshold=-1.0)[0]
+        sample = probes[:batch]
+
+        result = {'name': f"ann/exact/{size}gallery/{batch}queries"}
+        result.update(summarize(repeat(lambda: exact.match(sample), runs)))
+        results.append(result)
+        for nprobe in nprobes:
+            found = ivf.match(probes, threshold=-1.0, nprobe=nprobe)[0]
+            result = {'name': f"ann/ivf/{size}gallery/{batch}queries/nprobe{nprobe}"}
+            result.update(summarize(repeat(lambda: ivf.match(sample, nprobe=nprobe), runs)))
+            result.update({
+                'nlist': ivf.nlist,
+                'recall_at_1': round(float(np.mean(found == truth)), 4),
+                'build_ms': round(build * 1000.0, 1),
+            })
+            results.append(result)
+    return results
+
+
+def bench_gallery(gallery_sizes, runs, batch=10):
+    """
+    Session startup and matching from the memory-mapped gallery file
+
+    Startup from the database means decoding every stored encoding string
+    into a float32 index; startup from the gallery file only maps it.
+    """
+    results = []
+    rng = np.random.default_rng(4)
+    model_tag = FaceEncoder().model_tag
+    for size in gallery_sizes:
+        ids, embeddings = synthetic_gallery(size)
+        encodings = [serialize_encoding(vector, model_tag) for vector in embeddings]
+        queries = embeddings[rng.integers(0, size, batch)]
+
+        def from_encodings():
+            return FaceIndex(ids, np.stack([deserialize_encoding(text)[1] for text in encodings]))
+
+        result = {'name': f"gallery/startup/decode/{size}gallery"}
+        result.update(summarize(repeat(from_encodings, max(3, runs // 20), warmup=1)))
+        results.append(result)
+        exact = from_encodings()
+        result = {'name': f"gallery/match/float32/{size}gallery/{batch}queries"}
+        result.update(summarize(repeat(lambda: exact.match(queries), runs)))
+        results.append(result)
+
+        for dtype in ('float16', 'int8'):
+            gallery = GalleryFile(os.path.join(Config.TEMP_DIR, 'benchmarks', f"gallery_{size}_{dtype}.bin"))
+            matrix, scales = quantize(embeddings, np.dtype(dtype))
+            header = {'dtype': np.dtype(dtype), 'dim': embeddings.shape[1], 'capacity': size,
+                      'model_tag': model_tag, 'high_water': None}
+            gallery._rewrite(header, ids, np.zeros(size, dtype=np.uint32), scales, matrix)
+
+            result = {'name': f"gallery/startup/mmap/{dtype}/{size}gallery"}
+            result.update(summarize(repeat(lambda: GalleryIndex(gallery.path), runs)))
+            result['file_bytes'] = os.path.getsize(gallery.data_path())
+            results.append(result)
+
+            index = GalleryIndex(gallery.path)
+            found = index.match(queries, threshold=-1.0)[0]
+            result = {'name': f"gallery/match/{dtype}/{size}gallery/{batch}queries"}
+            result.update(summarize(repeat(lambda: index.match(queries), runs)))
+            result['recall_at_1'] = round(float(np.mean(found == exact.match(queries, threshold=-1.0)[0])), 4)
+            results.append(result)
+    return results
+
+
+def bench_db(rows, runs):
+    """
+    Time per-row mark_attendance against mark_attendance_bulk
+
+    DatabaseHelper runs unchanged against a file-backed SQLite stand-in, so
+    the numbers compare round trips and commits rather than MySQL itself.
+    """
+    standin = SQLiteStandIn(os.path.join(Config.TEMP_DIR, 'benchmarks', 'bench.sqlite3'))
+    standin.install()
+    try:
+        student_ids, subject_ids = standin.seed(rows)
+        subject_id = subject_ids[0]
+        records = [{'student_id': sid, 'subject_id': subject_id} for sid in student_ids]
+
+        def per_row():
+            for sid in student_ids:
+                DatabaseHelper.mark_attendance(sid, subject_id)
+
+        results = []
+        for variant, write in (('per_row', per_row),
+                               ('bulk', lambda: DatabaseHelper.mark_attendance_bulk(records))):
+            samples = []
+            for _ in range(runs):
+                standin.clear_attendance()
+                started = time.perf_counter()
+                write()
+                samples.append(time.perf_counter() - started)
+            result = {'name': f"db/mark_attendance/{variant}/{rows}rows", 'backend': 'sqlite'}
+            result.update(summarize(samples))
+            result['rows_per_second'] = round(rows / (result['mean_ms'] / 1000.0), 1)
+            results.append(result)
+        return results
+    finally:
+        standin.close()
+
+
+def environment():
+    """Where the numbers came from"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Config.BASE_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+        'numpy': np.__version__,
+        'config': {
+            'DETECT_SCALE_FACTOR': Config.DETECT_SCALE_FACTOR,
+            'DETECT_MIN_NEIGHBORS': Config.DETECT_MIN_NEIGHBORS,
+            'DETECT_DOWNSCALE': Config.DETECT_DOWNSCALE,
+            'DETECT_INTERVAL': Config.DETECT_INTERVAL,
+            'FACE_ENCODING_SIZE': Config.FACE_ENCODING_SIZE,
+            'ANN_NPROBE': Config.ANN_NPROBE,
+        },
+    }
+
+
+def compare(baseline, current, tolerance):
+    """
+    Print mean latency changes against a baseline run
+
+    Returns:
+        Names of benchmarks that got slower by more than `tolerance`
+    """
+    before = {r['name']: r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = before.get(result['name'])
+        if old is None or not old['mean_ms']:
+            continue
+        ratio = result['mean_ms'] / old['mean_ms']
+        flag = ''
+        if ratio > 1.0 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(result['name'])
+        print(f"{result['name']:<55} {old['mean_ms']:>10.3f} -> {result['mean_ms']:>10.3f} ms  "
+              f"x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection, recognition and attendance writes")
+    parser.add_argument("--only", default="detection,recognition,ann,gallery,db",
+                        help="Comma-separated suites to run (detection, recognition, ann, gallery, db)")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs for a fast smoke run")
+    parser.add_argument("--frames", type=int, default=None, help="Frames per synthetic video")
+    parser.add_argument("--runs", type=int, default=None, help="Timed repetitions per micro-benchmark")
+    parser.add_argument("-o", "--output", default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Slowdown ratio above which a comparison counts as a regression")
+    args = parser.parse_args()
+
+    Config.ensure_directories()
+    suites = {name.strip() for name in args.only.split(',')}
+    frames = args.frames or (30 if args.quick else 90)
+    runs = args.runs or (20 if args.quick else 200)
+
+    results = []
+    if 'detection' in suites:
+        results += bench_detection(frames, RESOLUTIONS[:2] if args.quick else RESOLUTIONS,
+                                   FACE_COUNTS[:2] if args.quick else FACE_COUNTS)
+    if 'recognition' in suites:
+        results += bench_recognition(GALLERY_SIZES, QUERY_COUNTS, runs)
+    if 'ann' in suites:
+        results += bench_ann(ANN_GALLERY_SIZES[:1] if args.quick else ANN_GALLERY_SIZES, ANN_NPROBES, runs)
+    if 'gallery' in suites:
+        results += bench_gallery(ANN_GALLERY_SIZES[:1] if args.quick else ANN_GALLERY_SIZES, runs)
+    if 'db' in suites:
+        results += bench_db(DB_ROWS // 4 if args.quick else DB_ROWS, 3 if args.quick else 5)
+
+    report = {'environment': environment(), 'results': results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+        print(f"Wrote {len(results)} result(s) to {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), report, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
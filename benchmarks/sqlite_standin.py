@@ -0,0 +1,167 @@
+import contextlib
+import functools
+import re
+import sqlite3
+from datetime import date
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.db_helper import DatabaseHelper
+
+SCHEMA = """
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        roll_no TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        image_hash TEXT,
+        image_width INTEGER,
+        image_height INTEGER,
+        image_size INTEGER,
+        face_encoding TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE subjects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        subject_code TEXT UNIQUE NOT NULL,
+        subject_name TEXT NOT NULL
+    );
+    CREATE TABLE attendance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL REFERENCES students(id),
+        subject_id INTEGER NOT NULL REFERENCES subjects(id),
+        attendance_date DATE NOT NULL,
+        status TEXT DEFAULT 'present',
+        marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        marked_by INTEGER,
+        attendance_type TEXT DEFAULT 'automatic',
+        UNIQUE (student_id, subject_id, attendance_date)
+    );
+    CREATE INDEX idx_student_date ON attendance (student_id, attendance_date);
+    CREATE INDEX idx_subject_date ON attendance (subject_id, attendance_date);
+"""
+
+# Unique key each MySQL "ON DUPLICATE KEY UPDATE" resolves against
+CONFLICT_KEYS = {
+    'attendance': '(student_id, subject_id, attendance_date)',
+    'students': '(roll_no)',
+}
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter('date', lambda value: date.fromisoformat(value.decode()))
+
+
+@functools.lru_cache(maxsize=None)
+def translate(query):
+    """Rewrite the MySQL dialect used by DatabaseHelper into SQLite"""
+    query = query.replace('%s', '?')
+    query = query.replace('SELECT CURDATE()', 'SELECT date(\'now\', \'localtime\') AS "today [date]"')
+    query = query.replace('CURDATE()', "date('now', 'localtime')")
+    query = query.replace('INSERT IGNORE', 'INSERT OR IGNORE')
+    if 'ON DUPLICATE KEY UPDATE' in query:
+        table = re.search(r'INSERT\s+INTO\s+(\w+)', query).group(1)
+        query = query.replace('ON DUPLICATE KEY UPDATE',
+                              f'ON CONFLICT {CONFLICT_KEYS[table]} DO UPDATE SET')
+        query = re.sub(r'VALUES\((\w+)\)', r'excluded.\1', query)
+    return query
+
+
+class StandInCursor:
+    """Cursor that accepts DatabaseHelper's MySQL queries"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, query, values=None):
+        self.cursor.execute(translate(query), values or ())
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self.cursor.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def close(self):
+        self.cursor.close()
+
+
+class StandInConnection:
+    """Looks like a PooledConnection to DatabaseHelper"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def cursor(self, query=None, prepared=False, buffered=None):
+        return StandInCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+
+class SQLiteStandIn:
+    """
+    File-backed SQLite database standing in for MySQL in benchmarks
+
+    A file rather than :memory: is used so every commit pays for a journal
+    write, as it would on a real server; this is what separates per-row
+    writes from bulk writes.
+    """
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False,
+                                  detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self.db.executescript(SCHEMA)
+        self._original = None
+
+    def seed(self, students, subjects=1):
+        """Insert numbered students and subjects; returns (student_ids, subject_ids)"""
+        self.db.executemany("INSERT INTO students (roll_no, name) VALUES (?, ?)",
+                            [(f"BENCH{i:06d}", f"Student {i}") for i in range(students)])
+        self.db.executemany("INSERT INTO subjects (subject_code, subject_name) VALUES (?, ?)",
+                            [(f"S{i}", f"Subject {i}") for i in range(subjects)])
+        self.db.commit()
+        student_ids = [row[0] for row in self.db.execute("SELECT id FROM students ORDER BY id")]
+        subject_ids = [row[0] for row in self.db.execute("SELECT id FROM subjects ORDER BY id")]
+        return student_ids, subject_ids
+
+    def clear_attendance(self):
+        self.db.execute("DELETE FROM attendance")
+        self.db.commit()
+
+    @contextlib.contextmanager
+    def connection(self):
+        wrapper = StandInConnection(self.db)
+        try:
+            yield wrapper
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def install(self):
+        """Route DatabaseHelper through this database"""
+        self._original = DatabaseHelper.__dict__['connection']
+        DatabaseHelper.connection = staticmethod(self.connection)
+
+    def uninstall(self):
+        if self._original is not None:
+            DatabaseHelper.connection = self._original
+            self._original = None
+
+    def close(self):
+        self.uninstall()
+        self.db.close()
+        os.remove(self.path)
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+VIDEO_DIR = os.path.join(Config.TEMP_DIR, 'benchmarks')
+
+
+def draw_face(image, cx, cy, size, tone):
+    """Draw a frontal cartoon face that the Haar cascade detects"""
+    cv2.ellipse(image, (cx, cy), (int(size * 0.42), int(size * 0.55)), 0, 0, 360,
+                (tone - 20, tone, tone + 25), -1)
+    eye_y, eye_dx = cy - int(size * 0.12), int(size * 0.17)
+    for side in (-1, 1):
+        cv2.ellipse(image, (cx + side * eye_dx, eye_y - int(size * 0.1)),
+                    (int(size * 0.11), int(size * 0.025)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.ellipse(image, (cx + side * eye_dx, eye_y),
+                    (int(size * 0.08), int(size * 0.04)), 0, 0, 360, (60, 50, 50), -1)
+    cv2.line(image, (cx, eye_y + int(size * 0.05)), (cx, cy + int(size * 0.12)),
+             (tone - 60,) * 3, max(1, size // 40))
+    cv2.ellipse(image, (cx, cy + int(size * 0.27)), (int(size * 0.14), int(size * 0.04)),
+                0, 0, 360, (60, 60, 120), -1)
+    cv2.ellipse(image, (cx, cy - int(size * 0.5)), (int(size * 0.45), int(size * 0.2)),
+                0, 180, 360, (30, 30, 30), -1)
+
+
+def classroom_video(width, height, faces, frames=90, fps=15, seed=0):
+    """
+    Write (or reuse) a synthetic classroom recording
+
+    Faces sit on a grid of seats, sway slightly from frame to frame and get
+    smaller towards the back rows. The same arguments always produce the
+    same file, so results are comparable across runs.
+
+    Returns:
+        Path of the video file
+    """
+    os.makedirs(VIDEO_DIR, exist_ok=True)
+    path = os.path.join(VIDEO_DIR, f"classroom_{width}x{height}_{faces}f_{frames}n_{seed}.avi")
+    if os.path.exists(path):
+        return path
+
+    rng = np.random.default_rng(seed)
+    columns = int(np.ceil(np.sqrt(faces * width / float(height))))
+    rows = int(np.ceil(faces / float(columns)))
+    cell_w, cell_h = width // columns, height // rows
+    seats = []
+    for i in range(faces):
+        row, column = divmod(i, columns)
+        # Back rows (top of the frame) are further from the camera
+        size = int(min(cell_w, cell_h) * (0.45 + 0.25 * (row + 1) / rows))
+        seats.append((column * cell_w + cell_w // 2, row * cell_h + cell_h // 2,
+                      max(size, 32), int(rng.integers(150, 210)), rng.uniform(0, 2 * np.pi)))
+
+    background = rng.integers(70, 130, size=(height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (0, 0), 9)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for frame_no in range(frames):
+        frame = background.copy()
+        for cx, cy, size, tone, phase in seats:
+            sway = int(size * 0.05 * np.sin(frame_no / 8.0 + phase))
+            draw_face(frame, cx + sway, cy, size, tone)
+        writer.write(cv2.GaussianBlur(frame, (3, 3), 0))
+    writer.release()
+    return path
+
+
+def synthetic_gallery(size, dim=None, seed=0):
+    """
+    Random unit-length embeddings standing in for an enrolled roster
+
+    Returns:
+        Tuple (ids, embeddings) suitable for FaceIndex
+    """
+    dim = dim or Config.FACE_ENCODING_SIZE ** 2
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return np.arange(1, size + 1, dtype=np.int64), embeddings
@@ -12,6 +12,13 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'attendance_system')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+    DB_POOL_HEALTH_CHECK = float(os.getenv('DB_POOL_HEALTH_CHECK', '30'))  # ping connections idle longer than this
+    
+    # Roster Cache Configuration
+    CACHE_TTL = 30  # seconds before subjects/students are re-checked
+    CACHE_FULL_REFRESH = 600  # seconds between full student reloads (picks up deletions)
     
     # Path Configuration
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,10 +26,94 @@ class Config:
     DATA_DIR = os.path.join(BASE_DIR, 'data')
     IMAGES_DIR = os.path.join(DATA_DIR, 'images')
     TEMP_DIR = os.path.join(DATA_DIR, 'temp')
+    THUMBNAIL_WIDTH = 160  # pixels, image-store thumbnails
+    MIGRATION_CHUNK_SIZE = 100  # student ids per query when migrating image blobs
+    
+    # Authentication Configuration
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))  # set per machine with: python src/auth.py --write
+    AUTH_WORKERS = int(os.getenv('AUTH_WORKERS', '2'))  # threads running bcrypt off the UI thread
     
     # Face Recognition Configuration
     FACE_CASCADE_PATH = os.path.join(ASSETS_DIR, 'haarcascade_frontalface_default.xml')
     CAPTURE_DELAY = 3  # seconds
+    ENROLL_BURST_FRAMES = 20  # frames captured after the countdown
+    ENROLL_TOP_K = 5  # best frames averaged into the enrollment template
+    ENROLL_CROP_SIZE = 96  # aligned crop size used for quality scoring
+    ENROLL_IDEAL_FACE_AREA = 0.08  # face/frame area at which size stops adding to the score
+    ENROLL_MAX_IMAGE_SIDE = 1280  # bulk-imported photos are downscaled to this longest side
+    ENROLL_INSERT_BATCH = 100  # students per transaction in bulk enrollment
+    FACE_ENCODING_SIZE = 16  # encoder works on 16x16 crops (256-d embedding)
+    RECOGNITION_THRESHOLD = 0.75  # minimum similarity to accept a match
+    
+    # Gallery Index Configuration
+    RECOGNITION_INDEX = os.getenv('RECOGNITION_INDEX', 'exact')  # 'exact', 'ivf' (ANN_INDEX_FILE) or 'gallery' (GALLERY_FILE)
+    ANN_INDEX_FILE = os.path.join(DATA_DIR, 'face_index.npz')  # built with: python src/ann_index.py build
+    ANN_NPROBE = int(os.getenv('ANN_NPROBE', '16'))  # clusters scanned per query; higher = better recall, slower
+    ANN_KMEANS_ITERATIONS = 10
+    ANN_POINTS_PER_CENTROID = 256  # k-means trains on at most this many vectors per cluster
+    GALLERY_FILE = os.path.join(DATA_DIR, 'gallery.bin')  # memory-mapped embeddings: python src/gallery_file.py export
+    GALLERY_DTYPE = os.getenv('GALLERY_DTYPE', 'int8')  # 'int8' (per-row scale) or 'float16'
+    GALLERY_CHUNK_ROWS = 1024  # rows converted at a time while matching
+    
+    # Face Detection Configuration
+    DETECT_SCALE_FACTOR = 1.3
+    DETECT_MIN_NEIGHBORS = 5
+    DETECT_MIN_FACE_SIZE = 30  # pixels, full-resolution frame
+    DETECT_MAX_FACE_SIZE = 0  # pixels, 0 = no limit
+    DETECT_DOWNSCALE = 0.5  # resize factor for full-frame scans
+    DETECT_INTERVAL = 5  # initial frames between full-frame scans
+    DETECT_MAX_INTERVAL = 30
+    MOTION_THRESHOLD = 8.0  # mean abs pixel difference that forces a full scan
+    TARGET_FPS = 15
+    
+    # Attendance Pipeline Configuration
+    PIPELINE_WORKERS = 2  # detector/recognizer threads
+    FRAME_QUEUE_SIZE = 4  # frames buffered per camera between capture and detection
+    CAMERA_SOURCES = os.getenv('CAMERA_SOURCES', '0')  # comma-separated camera indexes or video paths
+    
+    # Attendance Service Configuration (src/attendance_service.py)
+    SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')
+    SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8765'))
+    SERVICE_WORKERS = int(os.getenv('SERVICE_WORKERS', '4'))  # detection/encoding threads
+    SERVICE_BATCH_SIZE = 64  # faces matched against the gallery in one call
+    SERVICE_BATCH_WAIT = 0.005  # seconds a batch waits for more requests
+    SERVICE_MAX_PENDING = 64  # requests in flight before clients get 503
+    SERVICE_MAX_BODY = 2 * 1024 * 1024  # bytes, largest accepted frame
+    SERVICE_RATE_LIMIT = float(os.getenv('SERVICE_RATE_LIMIT', '10'))  # requests/second per kiosk, 0 = no limit
+    SERVICE_RATE_BURST = 20  # requests a kiosk may send back to back
+    SERVICE_MAX_HEADERS = 64  # header lines per request before clients get 431
+    SERVICE_RELOAD_INTERVAL = float(os.getenv('SERVICE_RELOAD_INTERVAL', '30'))  # seconds between roster reloads
+    SERVICE_TOKEN = os.getenv('SERVICE_TOKEN', '')  # shared secret kiosks send as "Authorization: Bearer <token>"
+    
+    # Attendance Write-Behind Configuration
+    ATTENDANCE_JOURNAL = os.path.join(DATA_DIR, 'attendance_journal.jsonl')
+    WRITE_BATCH_SIZE = 50  # pending marks that trigger a flush
+    WRITE_FLUSH_INTERVAL = 2.0  # seconds between timed flushes
+    WRITE_RETRY_INTERVAL = 10.0  # seconds to wait after the database was unreachable
+    
+    # Report Export Configuration
+    REPORT_PAGE_SIZE = 5000  # rows per keyset page (one query each)
+    REPORT_FETCH_SIZE = 500  # rows pulled from the streaming cursor at a time
+    
+    # Attendance Viewer Configuration
+    VIEWER_PAGE_SIZE = 50  # history rows fetched per scroll page
+    
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_FILE = os.path.join(DATA_DIR, 'metrics.json')
+    METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', '10'))  # seconds between JSON snapshots
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # localhost Prometheus endpoint, 0 = off
+    
+    # Batch (Recorded Video) Attendance Configuration
+    BATCH_SEGMENT_SECONDS = 120  # seconds of video per worker task
+    BATCH_FRAME_STEP = 3  # decode every Nth frame of a recording
+    
+    # Face Tracking Configuration
+    TRACK_IOU_THRESHOLD = 0.3  # minimum overlap to continue a track
+    TRACK_MAX_MISSED = 15  # frames a track survives without a detection
+    TRACK_CONFIDENCE_HALF_LIFE = 300  # frames for a recognition score to halve
+    TRACK_MIN_CONFIDENCE = 0.5  # re-recognize a known track below this
+    TRACK_RETRY_FRAMES = 15  # frames between attempts on an unknown track
     
     # UI Configuration
     WINDOW_WIDTH = 1200
@@ -10,12 +10,17 @@ CREATE TABLE IF NOT EXISTS students (
     id INT AUTO_INCREMENT PRIMARY KEY,
     roll_no VARCHAR(50) UNIQUE NOT NULL,
     name VARCHAR(100) NOT NULL,
-    image LONGBLOB,
+    image LONGBLOB,  -- legacy; moved to the image store by src/migrate_images.py
+    image_hash CHAR(64),  -- SHA-256 of the PNG in the content-addressed image store
+    image_width INT,
+    image_height INT,
+    image_size INT,
     face_encoding TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_roll_no (roll_no),
-    INDEX idx_name (name)
+    INDEX idx_name (name),
+    INDEX idx_image_hash (image_hash)
 );
 
 -- Subjects table
@@ -54,9 +59,88 @@ CREATE TABLE IF NOT EXISTS attendance (
     FOREIGN KEY (marked_by) REFERENCES users(id) ON DELETE SET NULL,
     INDEX idx_student_date (student_id, attendance_date),
     INDEX idx_subject_date (subject_id, attendance_date),
+    INDEX idx_date_student (attendance_date, student_id, subject_id),  -- keyset order of report exports
     UNIQUE KEY unique_attendance (student_id, subject_id, attendance_date)
 );
 
+-- Students taking each subject; recognition for a subject's session is
+-- restricted to these students when any are enrolled
+CREATE TABLE IF NOT EXISTS subject_enrollments (
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    enrolled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (subject_id, student_id),
+    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES subjects(id) ON DELETE CASCADE,
+    INDEX idx_enrollment_student (student_id)
+);
+
+-- Per-student, per-subject attendance totals, kept current by the
+-- triggers below so reports never aggregate the whole attendance table.
+-- Rebuild or verify with: python src/attendance_summary.py rebuild|verify
+CREATE TABLE IF NOT EXISTS attendance_summary (
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    total_classes INT NOT NULL DEFAULT 0,
+    classes_attended INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, subject_id),
+    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES subjects(id) ON DELETE CASCADE,
+    INDEX idx_summary_subject (subject_id)
+);
+
+DROP TRIGGER IF EXISTS attendance_summary_insert;
+DROP TRIGGER IF EXISTS attendance_summary_update;
+DROP TRIGGER IF EXISTS attendance_summary_delete;
+
+DELIMITER $$
+
+-- New attendance row (also the insert branch of INSERT ... ON DUPLICATE KEY UPDATE)
+CREATE TRIGGER attendance_summary_insert AFTER INSERT ON attendance
+FOR EACH ROW
+BEGIN
+    INSERT INTO attendance_summary (student_id, subject_id, total_classes, classes_attended)
+    VALUES (NEW.student_id, NEW.subject_id, 1, NEW.status = 'present')
+    ON DUPLICATE KEY UPDATE
+        total_classes = total_classes + 1,
+        classes_attended = classes_attended + (NEW.status = 'present');
+END$$
+
+-- Status flips (the update branch of ON DUPLICATE KEY UPDATE) and re-keyed rows
+CREATE TRIGGER attendance_summary_update AFTER UPDATE ON attendance
+FOR EACH ROW
+BEGIN
+    IF OLD.student_id = NEW.student_id AND OLD.subject_id = NEW.subject_id THEN
+        IF OLD.status <> NEW.status THEN
+            UPDATE attendance_summary
+            SET classes_attended = classes_attended + (NEW.status = 'present') - (OLD.status = 'present')
+            WHERE student_id = NEW.student_id AND subject_id = NEW.subject_id;
+        END IF;
+    ELSE
+        UPDATE attendance_summary
+        SET total_classes = total_classes - 1,
+            classes_attended = classes_attended - (OLD.status = 'present')
+        WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+        INSERT INTO attendance_summary (student_id, subject_id, total_classes, classes_attended)
+        VALUES (NEW.student_id, NEW.subject_id, 1, NEW.status = 'present')
+        ON DUPLICATE KEY UPDATE
+            total_classes = total_classes + 1,
+            classes_attended = classes_attended + (NEW.status = 'present');
+    END IF;
+END$$
+
+CREATE TRIGGER attendance_summary_delete AFTER DELETE ON attendance
+FOR EACH ROW
+BEGIN
+    UPDATE attendance_summary
+    SET total_classes = total_classes - 1,
+        classes_attended = classes_attended - (OLD.status = 'present')
+    WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+END$$
+
+DELIMITER ;
+
 -- Insert default subjects
 INSERT INTO subjects (subject_code, subject_name) VALUES
 ('AI', 'Artificial Intelligence'),
@@ -79,20 +163,19 @@ SELECT
     a.marked_at
 FROM attendance a
 JOIN students s ON a.student_id = s.id
-JOIN subjects sub ON a.subject_id = sub.id
-ORDER BY a.attendance_date DESC, s.roll_no;
+JOIN subjects sub ON a.subject_id = sub.id;
 
--- View for attendance statistics
+-- View for attendance statistics (reads the maintained totals, no GROUP BY)
 CREATE OR REPLACE VIEW attendance_stats AS
 SELECT 
     s.roll_no,
     s.name,
     sub.subject_name,
-    COUNT(*) AS total_classes,
-    SUM(CASE WHEN a.status = 'present' THEN 1 ELSE 0 END) AS classes_attended,
-    ROUND((SUM(CASE WHEN a.status = 'present' THEN 1 ELSE 0 END) / COUNT(*)) * 100, 2) AS attendance_percentage
-FROM attendance a
-JOIN students s ON a.student_id = s.id
-JOIN subjects sub ON a.subject_id = sub.id
-GROUP BY s.id, sub.id
+    st.total_classes,
+    st.classes_attended,
+    ROUND((st.classes_attended / st.total_classes) * 100, 2) AS attendance_percentage
+FROM attendance_summary st
+JOIN students s ON st.student_id = s.id
+JOIN subjects sub ON st.subject_id = sub.id
+WHERE st.total_classes > 0
 ORDER BY s.roll_no, sub.subject_name;
@@ -0,0 +1,265 @@
+import argparse
+import tempfile
+import time
+import zlib
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.face_recognizer import FaceEncoder, FaceIndex, deserialize_encoding
+from src.roster_cache import get_roster_cache
+
+
+def encoding_checksum(face_encoding):
+    """CRC32 of a stored encoding string, used to spot students re-encoded since the build"""
+    return zlib.crc32(face_encoding.encode('ascii'))
+
+
+def nearest_centroid(vectors, centroids, chunk=8192):
+    """Index of the most similar centroid for each row, computed in chunks to bound memory"""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        assign[start:start + chunk] = (vectors[start:start + chunk] @ centroids.T).argmax(axis=1)
+    return assign
+
+
+def spherical_kmeans(vectors, k, iterations=None, seed=0):
+    """
+    Cluster unit-length vectors by cosine similarity
+
+    Trains on a random sample of at most ANN_POINTS_PER_CENTROID vectors
+    per cluster; empty clusters are re-seeded from random sample points.
+
+    Returns:
+        float32 array of k unit-length centroids
+    """
+    iterations = iterations or Config.ANN_KMEANS_ITERATIONS
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), k * Config.ANN_POINTS_PER_CENTROID)
+    train = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = train[rng.choice(len(train), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = nearest_centroid(train, centroids)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=k)
+        filled = np.nonzero(counts)[0]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(train[order], starts, axis=0)
+        empty = np.nonzero(counts == 0)[0]
+        if len(empty):
+            centroids[empty] = train[rng.choice(len(train), len(empty), replace=False)]
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inverted-file gallery index for large rosters
+
+    Embeddings are partitioned by k-means and stored grouped by cluster,
+    so a query only scores the `nprobe` clusters whose centroids are most
+    similar to it. nprobe is the recall/latency knob: nprobe == nlist is
+    exact search. Matching has the same interface as FaceIndex.
+
+    Students added or re-encoded after the build are kept in a small
+    exact index that is always searched; rows they replace, and deleted
+    students, are masked out until the next build.
+    """
+
+    def __init__(self, ids, matrix, centroids, offsets, checksums=None, model_tag=None, nprobe=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.checksums = (np.asarray(checksums, dtype=np.uint32) if checksums is not None
+                          else np.zeros(len(self.ids), dtype=np.uint32))
+        self.model_tag = model_tag
+        self.nprobe = nprobe or Config.ANN_NPROBE
+        self.active = None  # boolean row mask, None = every row is live
+        self.extra = FaceIndex([], np.empty((0, self.matrix.shape[1]), dtype=np.float32))
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        live = len(self.ids) if self.active is None else int(self.active.sum())
+        return live + len(self.extra)
+
+    @classmethod
+    def build(cls, ids, embeddings, nlist=None, checksums=None, model_tag=None, iterations=None, seed=0):
+        """
+        Partition a gallery into nlist clusters (default: sqrt of the gallery size)
+
+        Args:
+            ids: Student ids, one per embedding row
+            embeddings: float32 array of unit-length rows
+            checksums: Optional encoding_checksum() per row, for sync()
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        nlist = min(nlist or max(1, int(round(np.sqrt(len(ids))))), len(ids))
+        centroids = spherical_kmeans(embeddings, nlist, iterations, seed)
+        assign = nearest_centroid(embeddings, centroids)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        return cls(ids[order], embeddings[order], centroids, offsets,
+                   None if checksums is None else np.asarray(checksums)[order], model_tag)
+
+    def match(self, queries, threshold=None, nprobe=None):
+        """
+        Match query embeddings against the probed clusters
+
+        Returns:
+            Tuple (ids, scores) as from FaceIndex.match
+        """
+        if threshold is None:
+            threshold = Config.RECOGNITION_THRESHOLD
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        best_scores = np.full(len(queries), -np.inf, dtype=np.float32)
+        best_ids = np.full(len(queries), -1, dtype=np.int64)
+        if len(queries) == 0:
+            return best_ids, np.zeros(0, dtype=np.float32)
+
+        if len(self.ids):
+            nprobe = min(nprobe or self.nprobe, self.nlist)
+            coarse = queries @ self.centroids.T
+            if nprobe < self.nlist:
+                probe = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+            else:
+                probe = np.broadcast_to(np.arange(self.nlist), coarse.shape)
+
+            # Each probed cluster is scored once against every query probing it
+            for cluster in np.unique(probe):
+                start, end = self.offsets[cluster], self.offsets[cluster + 1]
+                if start == end:
+                    continue
+                who = np.nonzero((probe == cluster).any(axis=1))[0]
+                similarity = self.matrix[start:end] @ queries[who].T
+                if self.active is not None:
+                    similarity[~self.active[start:end]] = -np.inf
+                top = similarity.argmax(axis=0)
+                scores = similarity[top, np.arange(len(who))]
+                better = scores > best_scores[who]
+                best_scores[who[better]] = scores[better]
+                best_ids[who[better]] = self.ids[start + top[better]]
+
+        if len(self.extra):
+            extra_ids, extra_scores = self.extra.match(queries, threshold=-np.inf)
+            better = extra_scores > best_scores
+            best_scores[better] = extra_scores[better]
+            best_ids[better] = extra_ids[better]
+
+        best_scores[~np.isfinite(best_scores)] = 0.0
+        return np.where(best_scores >= threshold, best_ids, -1), best_scores
+
+    def subset(self, student_ids):
+        """Exact FaceIndex over just these students, e.g. one subject's enrollment"""
+        student_ids = np.asarray(list(student_ids), dtype=np.int64)
+        rows = np.isin(self.ids, student_ids)
+        if self.active is not None:
+            rows &= self.active
+        extra = np.isin(self.extra.ids, student_ids)
+        return FaceIndex(np.concatenate([self.ids[rows], self.extra.ids[extra]]),
+                         np.concatenate([self.matrix[rows], self.extra.matrix[extra]]))
+
+    def sync(self, encodings, model_tag):
+        """
+        Bring a loaded index up to date with the stored encodings
+
+        Args:
+            encodings: (student_id, face_encoding) rows, e.g. from the roster cache
+            model_tag: Encoder model tag; rows of other models are skipped
+
+        Returns:
+            Number of students added to the exact side index
+        """
+        current = dict(zip(self.ids.tolist(), self.checksums.tolist()))
+        seen, extra_ids, extra_vectors = set(), [], []
+        for student_id, face_encoding in encodings:
+            seen.add(student_id)
+            if current.get(student_id) == encoding_checksum(face_encoding):
+                continue
+            tag, vector = deserialize_encoding(face_encoding)
+            if tag == model_tag and len(vector) == self.matrix.shape[1]:
+                extra_ids.append(student_id)
+                extra_vectors.append(vector)
+
+        stale = np.isin(self.ids, extra_ids) | np.isin(self.ids, list(seen), invert=True)
+        self.active = ~stale if stale.any() else None
+        if extra_ids:
+            self.extra = FaceIndex(extra_ids, np.stack(extra_vectors))
+        return len(extra_ids)
+
+    def save(self, path=None):
+        """Atomically write the index to an .npz file"""
+        path = path or Config.ANN_INDEX_FILE
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            np.savez(tmp, ids=self.ids, matrix=self.matrix, centroids=self.centroids,
+                     offsets=self.offsets, checksums=self.checksums, model_tag=np.array(self.model_tag or ''))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None, nprobe=None):
+        """Load an index written by save(); raises OSError or ValueError if it is missing or corrupt"""
+        with np.load(path or Config.ANN_INDEX_FILE) as data:
+            return cls(data['ids'], data['matrix'], data['centroids'], data['offsets'],
+                       data['checksums'], str(data['model_tag']) or None, nprobe)
+
+
+def build_from_database(nlist=None, path=None):
+    """
+    Build the index from every stored encoding of the current model and save it
+
+    Returns:
+        The built IVFIndex, or None if no encodings are stored
+    """
+    model_tag = FaceEncoder().model_tag
+    ids, vectors, checksums = [], [], []
+    for student_id, face_encoding in get_roster_cache().get_face_encodings():
+        tag, vector = deserialize_encoding(face_encoding)
+        if tag != model_tag:
+            continue
+        ids.append(student_id)
+        vectors.append(vector)
+        checksums.append(encoding_checksum(face_encoding))
+    if not ids:
+        return None
+    index = IVFIndex.build(ids, np.stack(vectors), nlist, checksums, model_tag)
+    index.save(path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the approximate nearest-neighbour gallery index")
+    parser.add_argument("command", choices=("build", "info"))
+    parser.add_argument("--nlist", type=int, default=None, help="Clusters (default: sqrt of the roster size)")
+    parser.add_argument("-o", "--output", default=None, help=f"Index file (default {Config.ANN_INDEX_FILE})")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        index = build_from_database(args.nlist, args.output)
+        if index is None:
+            print("No face encodings of the current model found in database")
+            sys.exit(1)
+        print(f"Indexed {len(index)} student(s) in {index.nlist} clusters in "
+              f"{time.perf_counter() - started:.1f}s -> {args.output or Config.ANN_INDEX_FILE}")
+        print("Set RECOGNITION_INDEX=ivf to use it")
+    else:
+        started = time.perf_counter()
+        index = IVFIndex.load(args.output)
+        sizes = np.diff(index.offsets)
+        print(f"{len(index)} student(s), model {index.model_tag}, {index.nlist} clusters "
+              f"(sizes {sizes.min()}-{sizes.max()}), loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import threading
+from tkinter import TclError
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.face_recognizer import FaceRecognizer
+from src.roster_cache import get_roster_cache
+
+
+class AppContext:
+    """
+    Resources shared by every window of the single application process
+
+    The DB pool, roster cache and a recognizer with pre-parsed cascades
+    are warmed once on a background thread at startup, so opening a
+    window or starting a session does not pay for them again. The
+    webcams are also shared: one window at a time claims them, and other
+    windows disable their camera buttons until they are released.
+    """
+
+    def __init__(self):
+        self.recognizer = None
+        self.camera_user = None
+        self._camera_listeners = []
+        self._started = False
+        self._ready = threading.Event()
+
+    def warm_up(self):
+        """Start warming shared resources in the background"""
+        self._started = True
+        thread = threading.Thread(target=self._warm, daemon=True)
+        thread.start()
+
+    def _warm(self):
+        try:
+            with DatabaseHelper.connection():
+                pass
+            cache = get_roster_cache()
+            cache.get_subjects()
+            cache.get_students()
+
+            recognizer = FaceRecognizer()
+            recognizer.warm(Config.PIPELINE_WORKERS)
+            self.recognizer = recognizer
+        except Exception as e:
+            print(f"Could not warm shared resources: {e}")
+        finally:
+            self._ready.set()
+
+    def is_ready(self):
+        """True once warm-up has finished, or if it was never started"""
+        return not self._started or self._ready.is_set()
+
+    def get_recognizer(self):
+        """
+        Shared recognizer; waits for warm-up, or builds one if warm-up never ran
+
+        Blocks for up to 30 s, so Tk callbacks should use with_recognizer()
+        """
+        if self._started:
+            self._ready.wait(timeout=30)
+        if self.recognizer is None:
+            self.recognizer = FaceRecognizer()
+        return self.recognizer
+
+    def with_recognizer(self, root, callback, poll_ms=50):
+        """
+        Call callback(recognizer) on the Tk thread once warm-up has finished
+
+        Readiness is polled with root.after(), so the UI stays responsive
+        while warm-up completes. Nothing is called if root is destroyed first.
+        """
+        if self.is_ready():
+            callback(self.get_recognizer())
+            return
+        try:
+            root.after(poll_ms, self.with_recognizer, root, callback, poll_ms)
+        except TclError:
+            pass
+
+    def claim_camera(self, user):
+        """Reserve the cameras for `user` (Tk thread only); False if another user holds them"""
+        if self.camera_user is not None and self.camera_user != user:
+            return False
+        self.camera_user = user
+        self._notify_camera()
+        return True
+
+    def release_camera(self, user):
+        """Give the cameras back if `user` holds them"""
+        if self.camera_user == user:
+            self.camera_user = None
+            self._notify_camera()
+
+    def on_camera_change(self, callback):
+        """Call callback(busy) whenever the cameras are claimed or released"""
+        self._camera_listeners.append(callback)
+
+    def _notify_camera(self):
+        busy = self.camera_user is not None
+        for callback in list(self._camera_listeners):
+            try:
+                callback(busy)
+            except TclError:
+                # The listening window was closed
+                self._camera_listeners.remove(callback)
+
+
+_context = AppContext()
+
+
+def get_app_context():
+    """Return the process-wide application context"""
+    return _context
@@ -0,0 +1,461 @@
+import argparse
+import collections
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.attendance_queue import AttendanceWriteQueue
+from src.face_detector import DetectionScheduler
+from src.face_recognizer import FaceRecognizer
+from src.face_tracker import FaceTracker
+from src.frame_buffers import FrameRing, Workspace
+from src.metrics import get_metrics
+
+
+class StageCounter:
+    """Thread-safe item counter with a throughput figure"""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.count = 0
+        self.started = time.perf_counter()
+        self.stopped = None
+        self.metrics = get_metrics()
+        self._lock = threading.Lock()
+
+    def add(self, n=1):
+        with self._lock:
+            self.count += n
+        self.metrics.count('pipeline_' + self.name, n, **self.labels)
+
+    def freeze(self):
+        """Stop the throughput clock"""
+        self.stopped = time.perf_counter()
+
+    def rate(self):
+        """Items per second between creation and freeze() (or now)"""
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize, drop_counter=None, on_drop=None):
+        self.items = collections.deque()
+        self.maxsize = maxsize
+        self.drop_counter = drop_counter
+        self.on_drop = on_drop
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item, block=False):
+        """
+        Add an item
+
+        Args:
+            item: Item to enqueue
+            block: If True wait for space instead of dropping the oldest item
+                   (used for file sources, which are not real-time)
+        """
+        with self._cond:
+            if block:
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self._cond.wait()
+            elif len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                if self.drop_counter:
+                    self.drop_counter.add()
+                if self.on_drop:
+                    self.on_drop(dropped)
+            self.items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None once closed and empty"""
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.items:
+                if self.closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+            item = self.items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake all waiters; get() returns None after the remaining items"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class CaptureSource:
+    """One camera or video file feeding an AttendancePipeline"""
+
+    def __init__(self, index, source, ring_size):
+        self.index = index
+        self.source = source
+        self.label = str(source)
+        self.is_file = isinstance(source, str) and not source.isdigit()
+        self.capture = None
+        self.thread = None
+        # Detection scheduling and tracking depend on the camera's view,
+        # so each source keeps its own
+        self.scheduler = DetectionScheduler()
+        self.tracker = FaceTracker()
+        # Frames are decoded into a fixed ring of buffers; latest_slot is the
+        # ring slot of the newest frame, kept referenced for the display
+        self.ring = FrameRing(ring_size)
+        self.latest_slot = None
+        self.latest_faces = []
+        self.counters = {
+            name: StageCounter('source_' + name, source=self.label)
+            for name in ('captured', 'dropped', 'processed')
+        }
+
+    def open(self):
+        source = int(self.source) if isinstance(self.source, str) and self.source.isdigit() else self.source
+        self.capture = cv2.VideoCapture(source)
+        return self.capture.isOpened()
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class AttendancePipeline:
+    """
+    Staged capture -> detect/recognize -> persist pipeline
+
+    One capture thread per source reads frames into a shared bounded
+    queue, a single pool of worker threads runs detection and recognition
+    for every source, and a write-behind queue persists attendance, so
+    neither a slow detection frame nor a slow database stalls capture or
+    display. Identities are merged across sources: a student seen by
+    several cameras is marked once.
+    """
+
+    def __init__(self, sources, subject_id, recognizer, workers=None,
+                 queue_size=None, write_attendance=True):
+        """
+        Args:
+            sources: Camera index (e.g. 0) or video file path, or a list of
+                     them for several cameras in one session
+            subject_id: Subject to mark attendance for
+            recognizer: FaceRecognizer with the roster already loaded
+            workers: Number of detector/recognizer threads shared by all sources
+            queue_size: Frame queue capacity per source
+            write_attendance: If False, recognized students are only counted
+        """
+        if not isinstance(sources, (list, tuple)):
+            sources = [sources]
+        self.num_workers = workers or Config.PIPELINE_WORKERS
+        capacity = (queue_size or Config.FRAME_QUEUE_SIZE) * len(sources)
+        # Enough frame buffers per source for a full queue, one frame per
+        # worker, the latest frame and the one being decoded
+        ring_size = capacity + self.num_workers + 2
+        self.sources = [CaptureSource(i, source, ring_size) for i, source in enumerate(sources)]
+        self.subject_id = subject_id
+        self.recognizer = recognizer
+        self.write_attendance = write_attendance
+
+        self.counters = {
+            name: StageCounter(name)
+            for name in ('captured', 'dropped', 'processed', 'faces', 'recognitions',
+                         'recognized', 'written', 'displayed')
+        }
+        self.frames = DropOldestQueue(capacity, self.counters['dropped'], on_drop=self._on_drop)
+        self.writer = AttendanceWriteQueue(on_written=self._on_written) if write_attendance else None
+        self.marked_students = set()
+        self.seen_students = set()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._capture_done = threading.Event()
+        self._capturing = len(self.sources)
+        self._workers = []
+        self._workspaces = []
+        self.failed_sources = []
+
+    def open(self):
+        """Open every capture source; returns False if any cannot be opened"""
+        self.failed_sources = [source.label for source in self.sources if not source.open()]
+        if self.failed_sources:
+            for source in self.sources:
+                source.release()
+            return False
+        return True
+
+    def start(self):
+        """Start the attendance writer, capture and worker threads"""
+        if self.writer is not None:
+            self.writer.start()
+        for source in self.sources:
+            source.thread = threading.Thread(target=self._capture_loop, args=(source,), daemon=True)
+        self._workers = [threading.Thread(target=self._worker_loop, daemon=True)
+                         for _ in range(self.num_workers)]
+        for thread in [source.thread for source in self.sources] + self._workers:
+            thread.start()
+
+    def stop(self):
+        """Stop capturing, drain queued frames and pending writes, then join all stages"""
+        self._stop.set()
+        self.frames.close()
+        for source in self.sources:
+            source.thread.join()
+        for thread in self._workers:
+            thread.join()
+        if self.writer is not None:
+            self.writer.stop()
+        for source in self.sources:
+            source.release()
+            for counter in source.counters.values():
+                counter.freeze()
+        for counter in self.counters.values():
+            counter.freeze()
+
+    def finished(self):
+        """True once every source is exhausted and every frame has been processed"""
+        return (self._capture_done.is_set()
+                and not any(thread.is_alive() for thread in self._workers))
+
+    def _capture_loop(self, source):
+        frame_no = 0
+        metrics = get_metrics()
+        ring = source.ring
+        while not self._stop.is_set():
+            slot = ring.acquire(timeout=0.1)
+            if slot is None:
+                continue
+            with metrics.timer('capture_read', source=source.label):
+                frame = ring.read(source.capture, slot)
+            if frame is None:
+                ring.release(slot)
+                break
+            frame_no += 1
+            self.counters['captured'].add()
+            source.counters['captured'].add()
+            # One reference for the display, one for the queued work item
+            ring.retain(slot)
+            with self._lock:
+                previous, source.latest_slot = source.latest_slot, slot
+            if previous is not None:
+                ring.release(previous)
+            self.frames.put((source, frame_no, slot), block=source.is_file)
+
+        # The queue closes when the last source stops
+        with self._lock:
+            self._capturing -= 1
+            last = self._capturing == 0
+        if last:
+            self._capture_done.set()
+            self.frames.close()
+
+    def _on_drop(self, item):
+        source, _, slot = item
+        source.counters['dropped'].add()
+        source.ring.release(slot)
+
+    def _worker_loop(self):
+        # Each worker owns its cascade and scratch buffers; the roster index
+        # is shared read-only
+        recognizer = self.recognizer.clone()
+        workspace = Workspace()
+        with self._lock:
+            self._workspaces.append(workspace)
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            source, frame_no, slot = item
+            try:
+                self._process_frame(recognizer, workspace, source, frame_no, source.ring.frames[slot])
+            except Exception as e:
+                # A bad frame must not kill the worker and stall the queue
+                print(f"Pipeline worker error: {e}")
+            finally:
+                source.ring.release(slot)
+        self.recognizer.release(recognizer)
+
+    def _process_frame(self, recognizer, workspace, source, frame_no, frame):
+        metrics = get_metrics()
+        with metrics.timer('cvt_color'):
+            gray = workspace.array('gray', frame.shape[:2])
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        with metrics.timer('detect'):
+            faces = source.scheduler.detect(recognizer.face_cascade, gray, frame_no, workspace)
+
+        # Only new or stale tracks are sent to the recognizer
+        with self._lock:
+            tracks = source.tracker.update(faces, frame_no)
+            todo = source.tracker.claim_for_recognition(tracks, frame_no) if tracks else []
+        matches = []
+        if todo:
+            with metrics.timer('recognize'):
+                matches = recognizer.recognize(gray, [faces[i] for i in todo], workspace)
+
+        self.counters['processed'].add()
+        source.counters['processed'].add()
+        self.counters['faces'].add(len(faces))
+        self.counters['recognitions'].add(len(todo))
+        new_ids = []
+        with self._lock:
+            for i, (student_id, score) in zip(todo, matches):
+                committed = source.tracker.assign(tracks[i], student_id, score, frame_no)
+                if committed and student_id not in self.seen_students:
+                    self.seen_students.add(student_id)
+                    new_ids.append(student_id)
+            if tracks is not None:
+                source.latest_faces = [(track.box, track.student_id) for track in tracks]
+        for student_id in new_ids:
+            self.counters['recognized'].add()
+            if self.writer is not None:
+                self.writer.add(student_id, self.subject_id)
+            else:
+                self._on_written([{'student_id': student_id}])
+
+    def _on_written(self, records):
+        for record in records:
+            self.marked_students.add(record['student_id'])
+        self.counters['written'].add(len(records))
+
+    def annotate(self, frame, source):
+        """Draw a source's latest detections onto its frame"""
+        with self._lock:
+            faces = source.latest_faces
+        for (x, y, w, h), student_id in faces:
+            color = (0, 255, 0) if student_id else (0, 0, 255)
+            cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+            cv2.putText(frame, self.recognizer.student_label(student_id), (x, y-10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return frame
+
+    def run_display(self, window_name, stop_key='p', on_tick=None):
+        """
+        Show each source's newest frame with its latest detections until
+        stop_key or until every source has ended
+
+        Args:
+            window_name: Window title; numbered per source when there are several
+            on_tick: Optional callable run once per displayed frame, e.g. a
+                     Tk root's update() so the other windows stay responsive
+        """
+        metrics = get_metrics()
+        display = Workspace()
+        names = [window_name if len(self.sources) == 1 else f"{window_name} [{source.index + 1}: {source.label}]"
+                 for source in self.sources]
+        # Threads and cameras must be released however the loop ends, e.g.
+        # when on_tick raises because the Tk window was closed
+        try:
+            while not self._capture_done.is_set():
+                if on_tick is not None:
+                    on_tick()
+                for source, name in zip(self.sources, names):
+                    # The capture thread swaps latest_slot under the lock, so the
+                    # slot stays referenced until the copy is done
+                    with self._lock:
+                        slot = source.latest_slot
+                        if slot is not None:
+                            frame = source.ring.frames[slot]
+                            canvas = display.array(source.index, frame.shape)
+                            np.copyto(canvas, frame)
+                    if slot is not None:
+                        with metrics.timer('render'):
+                            cv2.imshow(name, self.annotate(canvas, source))
+                        self.counters['displayed'].add()
+                with metrics.timer('gui_wait'):
+                    key = cv2.waitKey(1) & 0xFF
+                if key == ord(stop_key):
+                    break
+        finally:
+            self.stop()
+            cv2.destroyAllWindows()
+
+    def run_headless(self, poll_interval=0.05):
+        """Process every source to its end without a window and return the stats"""
+        while not self.finished():
+            time.sleep(poll_interval)
+        self.stop()
+        return self.stats()
+
+    def stats(self):
+        """
+        Aggregate per-stage counts and throughput, recognitions per minute,
+        per-source frame rates under 'sources', and under 'buffers' how
+        often frame and scratch buffers had to be allocated (constant once
+        the pipeline is warm)
+        """
+        stats = {
+            name: {'count': counter.count, 'per_second': round(counter.rate(), 2)}
+            for name, counter in self.counters.items()
+        }
+        stats['recognitions']['per_minute'] = round(self.counters['recognitions'].rate() * 60, 1)
+        stats['detection'] = {
+            'full_scans': sum(source.scheduler.full_scans for source in self.sources),
+            'roi_scans': sum(source.scheduler.roi_scans for source in self.sources),
+        }
+        with self._lock:
+            scratch_allocations = sum(workspace.allocations for workspace in self._workspaces)
+        stats['buffers'] = {
+            'frame_allocations': sum(source.ring.allocations for source in self.sources),
+            'scratch_allocations': scratch_allocations,
+        }
+        stats['sources'] = [{
+            'source': source.label,
+            'captured': source.counters['captured'].count,
+            'dropped': source.counters['dropped'].count,
+            'processed': source.counters['processed'].count,
+            'capture_fps': round(source.counters['captured'].rate(), 2),
+            'processed_fps': round(source.counters['processed'].rate(), 2),
+            'detection_interval': source.scheduler.interval,
+        } for source in self.sources]
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the attendance pipeline without a window")
+    parser.add_argument("sources", nargs="+", help="Camera indexes or video file paths, one per camera")
+    parser.add_argument("--subject-id", type=int, required=True, help="Subject to mark attendance for")
+    parser.add_argument("--workers", type=int, default=None, help="Detector/recognizer threads")
+    parser.add_argument("--dry-run", action="store_true", help="Recognize without writing attendance")
+    args = parser.parse_args()
+
+    get_metrics().start_export()
+    recognizer = FaceRecognizer()
+    print(f"Loaded {recognizer.load_roster(args.subject_id)} enrolled face(s)")
+
+    pipeline = AttendancePipeline(args.sources, args.subject_id, recognizer,
+                                  workers=args.workers, write_attendance=not args.dry_run)
+    if not pipeline.open():
+        print(f"Could not open source(s) {', '.join(pipeline.failed_sources)}")
+        sys.exit(1)
+    pipeline.start()
+    stats = pipeline.run_headless()
+    detection = stats.pop('detection')
+    buffers = stats.pop('buffers')
+    sources = stats.pop('sources')
+    for name, stat in stats.items():
+        print(f"{name:>12}: {stat['count']:>7}  ({stat['per_second']}/s)")
+    print(f"Full scans: {detection['full_scans']}, ROI scans: {detection['roi_scans']}")
+    print(f"Buffer allocations: {buffers['frame_allocations']} frame, {buffers['scratch_allocations']} scratch")
+    for source in sources:
+        print(f"  {source['source']}: {source['captured']} captured at {source['capture_fps']} fps, "
+              f"{source['processed']} processed at {source['processed_fps']} fps, "
+              f"{source['dropped']} dropped, final interval {source['detection_interval']}")
+    print(f"Recognitions per minute: {stats['recognitions']['per_minute']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from datetime import date
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+JOURNAL_LOCK_STALE_SECONDS = 10
+
+
+class AttendanceWriteQueue:
+    """
+    Write-behind queue for attendance marks
+
+    add() only touches memory, so callers on the capture/UI thread never
+    wait for MySQL. Marks are deduplicated per (student_id, subject_id,
+    date) and flushed by a background thread through
+    DatabaseHelper.mark_attendance_bulk when the batch size is reached or
+    the flush interval expires. If the database is unreachable the batch
+    is appended to a local journal, which is replayed on the next start.
+    The journal is shared by every queue on the machine, so it is only
+    touched under a lock file and each queue removes just its own lines.
+    """
+
+    def __init__(self, journal_path=None, batch_size=None, flush_interval=None,
+                 retry_interval=None, on_written=None):
+        """
+        Args:
+            journal_path: Append-only JSON-lines spill file
+            batch_size: Pending marks that trigger an early flush
+            flush_interval: Seconds between timed flushes
+            retry_interval: Seconds to wait after a failed flush
+            on_written: Optional callback receiving each list of written records
+        """
+        self.journal_path = journal_path or Config.ATTENDANCE_JOURNAL
+        self.batch_size = batch_size or Config.WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.WRITE_FLUSH_INTERVAL
+        self.retry_interval = retry_interval or Config.WRITE_RETRY_INTERVAL
+        self.on_written = on_written
+
+        self.pending = {}
+        self.journaled = set()
+        self.stats = {'queued': 0, 'duplicates': 0, 'written': 0, 'invalid': 0,
+                      'spilled': 0, 'replayed': 0, 'flushes': 0, 'failed_flushes': 0}
+        self._seen = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._retry_at = 0.0
+
+    @staticmethod
+    def _key(record):
+        return (record['student_id'], record['subject_id'], record['attendance_date'])
+
+    def start(self):
+        """Replay any journaled marks, then start the background flusher"""
+        self.replay_journal()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Flush what is pending and stop the background flusher"""
+        with self._cond:
+            self._stop = True
+            self._retry_at = 0.0
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def add(self, student_id, subject_id, status='present', attendance_type='automatic', marked_by=None):
+        """
+        Queue an attendance mark for today
+
+        Returns:
+            False if an identical mark was already queued in this session
+        """
+        record = {
+            'student_id': student_id,
+            'subject_id': subject_id,
+            'attendance_date': date.today().isoformat(),
+            'status': status,
+            'attendance_type': attendance_type,
+            'marked_by': marked_by,
+        }
+        key = self._key(record)
+        with self._cond:
+            if self._seen.get(key) == record:
+                self.stats['duplicates'] += 1
+                return False
+            self._seen[key] = record
+            self.pending[key] = record
+            self.stats['queued'] += 1
+            if len(self.pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self):
+        """
+        Write pending marks now
+
+        Returns:
+            False if the database was unreachable and the batch was spilled
+        """
+        with self._cond:
+            batch = list(self.pending.values())
+        if not batch:
+            return True
+
+        outcomes = DatabaseHelper.mark_attendance_bulk(batch)
+        written, failed = [], []
+        for record, outcome in zip(batch, outcomes):
+            if outcome == 'failed':
+                failed.append(record)
+            elif outcome == 'invalid':
+                print(f"Dropping invalid attendance mark: {record}")
+            else:
+                written.append(record)
+
+        with self._cond:
+            self.stats['flushes'] += 1
+            self.stats['written'] += len(written)
+            self.stats['invalid'] += outcomes.count('invalid')
+            for record in batch:
+                key = self._key(record)
+                # A newer mark for the same key may have arrived meanwhile
+                if record not in failed and self.pending.get(key) == record:
+                    del self.pending[key]
+            if failed:
+                self.stats['failed_flushes'] += 1
+                self._spill(failed)
+            elif not self.pending and self.journaled:
+                self._clear_journal()
+
+        if written and self.on_written:
+            self.on_written(written)
+        return not failed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stop:
+                    now = time.monotonic()
+                    due = now if len(self.pending) >= self.batch_size else deadline
+                    due = max(due, self._retry_at)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                stopping = self._stop
+
+            if not self.flush() and not stopping:
+                with self._cond:
+                    self._retry_at = time.monotonic() + self.retry_interval
+            if stopping:
+                return
+
+    def _lock_journal(self):
+        """Take the journal lock file; a lock older than JOURNAL_LOCK_STALE_SECONDS is broken"""
+        lock_path = self.journal_path + '.lock'
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        deadline = time.monotonic() + JOURNAL_LOCK_STALE_SECONDS
+        while True:
+            try:
+                return os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > JOURNAL_LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Attendance journal is locked by another process: {lock_path}")
+                time.sleep(0.02)
+
+    def _unlock_journal(self, fd):
+        os.close(fd)
+        try:
+            os.remove(self.journal_path + '.lock')
+        except OSError:
+            pass
+
+    def _spill(self, records):
+        """Append records not already in the journal (caller holds the lock)"""
+        lines = [json.dumps(r, sort_keys=True) for r in records]
+        new = [line for line in lines if line not in self.journaled]
+        if not new:
+            return
+        fd = self._lock_journal()
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                for line in new:
+                    journal.write(line + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+        finally:
+            self._unlock_journal(fd)
+        self.journaled.update(new)
+        self.stats['spilled'] += len(new)
+
+    def _clear_journal(self):
+        """
+        Remove this queue's lines from the journal (caller holds the lock)
+
+        Other queues and processes spill into the same file, so their lines
+        are kept; the file is only deleted once nothing is left in it.
+        """
+        fd = self._lock_journal()
+        try:
+            try:
+                with open(self.journal_path, encoding='utf-8') as journal:
+                    lines = [line.strip() for line in journal]
+            except FileNotFoundError:
+                lines = []
+            keep = []
+            for line in lines:
+                if not line or line in self.journaled:
+                    continue
+                try:
+                    json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash; replay skips it anyway
+                keep.append(line)
+
+            if not keep:
+                try:
+                    os.remove(self.journal_path)
+                except FileNotFoundError:
+                    pass
+            else:
+                temp_path = self.journal_path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as journal:
+                    for line in keep:
+                        journal.write(line + '\n')
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                os.replace(temp_path, self.journal_path)
+        finally:
+            self._unlock_journal(fd)
+        self.journaled.clear()
+
+    def replay_journal(self):
+        """
+        Load marks spilled by an earlier run into the pending set
+
+        Returns:
+            Number of marks loaded
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        fd = self._lock_journal()
+        try:
+            with open(self.journal_path, encoding='utf-8') as journal:
+                lines = journal.readlines()
+        except FileNotFoundError:
+            lines = []
+        finally:
+            self._unlock_journal(fd)
+
+        loaded = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                key = self._key(record)
+            except (ValueError, KeyError, TypeError):
+                # A torn final line from a crash mid-write, or a line
+                # that is not a mark at all
+                print(f"Skipping unreadable attendance journal line: {line[:80]}")
+                continue
+            with self._cond:
+                self.pending[key] = record
+                self.journaled.add(line)
+            loaded += 1
+        self.stats['replayed'] += loaded
+        return loaded
@@ -0,0 +1,528 @@
+import argparse
+import asyncio
+import hmac
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.attendance_queue import AttendanceWriteQueue
+from src.db_helper import DatabaseHelper
+from src.face_recognizer import FaceRecognizer
+from src.metrics import get_metrics
+from src.roster_cache import get_roster_cache
+
+
+class RateLimiter:
+    """
+    Token bucket per client: `rate` requests per second with bursts up to `burst`
+
+    Buckets that have refilled are forgotten, since a new bucket starts
+    full anyway, so memory is bounded by the clients seen recently.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate if rate is not None else Config.SERVICE_RATE_LIMIT
+        self.burst = burst or Config.SERVICE_RATE_BURST
+        self.buckets = {}
+        self._next_sweep = 0.0
+
+    def acquire(self, client):
+        """
+        Take one token for a client
+
+        Returns:
+            0 if the request may proceed, otherwise seconds until it may retry
+        """
+        if not self.rate:
+            return 0
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.evict(now)
+        tokens, last = self.buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self.buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self.buckets[client] = (tokens - 1, now)
+        return 0
+
+    def evict(self, now=None):
+        """Drop buckets that have refilled to `burst`"""
+        now = now if now is not None else time.monotonic()
+        self.buckets = {
+            client: (tokens, last) for client, (tokens, last) in self.buckets.items()
+            if tokens + (now - last) * self.rate < self.burst
+        }
+        self._next_sweep = now + self.burst / self.rate
+
+
+class RecognitionBatcher:
+    """
+    Collects face embeddings from concurrent requests into shared index lookups
+
+    While one batch is being matched, newly arriving requests queue up and
+    are matched together by the next call, so the gallery is scanned once
+    per batch instead of once per kiosk frame.
+    """
+
+    def __init__(self, recognizer, executor, max_faces=None, max_wait=None):
+        self.recognizer = recognizer
+        self.executor = executor
+        self.max_faces = max_faces or Config.SERVICE_BATCH_SIZE
+        self.max_wait = max_wait if max_wait is not None else Config.SERVICE_BATCH_WAIT
+        self.queue = asyncio.Queue()
+        self.stats = {'batches': 0, 'faces': 0, 'largest': 0}
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def match(self, embeddings, index=None):
+        """
+        Match an (N, dim) embedding array; returns (ids, scores) arrays
+
+        Args:
+            index: Index to match against, e.g. one subject's subset
+                   (default: the recognizer's full roster index)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((embeddings, index if index is not None else self.recognizer.index, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            faces = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while faces < self.max_faces:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                faces += len(item[0])
+
+            # Requests for different subjects match against different
+            # subsets; each index is scanned once for all of its requests
+            groups = {}
+            for embeddings, index, future in batch:
+                groups.setdefault(id(index), (index, []))[1].append((embeddings, future))
+            for index, items in groups.values():
+                await self._match_group(loop, index, items)
+
+    async def _match_group(self, loop, index, items):
+        queries = np.concatenate([embeddings for embeddings, future in items])
+        try:
+            with get_metrics().timer('service_match'):
+                ids, scores = await loop.run_in_executor(self.executor, index.match, queries)
+        except Exception as e:
+            for embeddings, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['faces'] += len(queries)
+        self.stats['largest'] = max(self.stats['largest'], len(queries))
+        offset = 0
+        for embeddings, future in items:
+            end = offset + len(embeddings)
+            if not future.done():
+                future.set_result((ids[offset:end], scores[offset:end]))
+            offset = end
+
+
+class AttendanceService:
+    """
+    Local HTTP service that recognizes faces for thin kiosk clients
+
+    The service owns the cascade, roster index and database pool, so a
+    classroom PC only needs to POST JPEG frames (or pre-cropped faces)
+    and read back identities. Detection and encoding run on a thread
+    pool, gallery matching is batched across all clients, and attendance
+    goes through the write-behind queue.
+
+    Endpoints:
+        POST /recognize[?subject_id=N]  JPEG frame; faces are detected here
+        POST /faces[?subject_id=N]      JPEG of one pre-cropped face
+        POST /reload                    Reload the roster index
+        GET  /health                    Service counters as JSON
+
+    With subject_id, faces are matched only against the subject's enrolled
+    students (when it has any) and recognized students are marked
+    present. When a SERVICE_TOKEN is configured every request must send
+    it as "Authorization: Bearer <token>"; without one, the service only
+    recognizes: /reload and requests with subject_id are refused.
+    Clients are rate limited by address, and /reload at most once per
+    SERVICE_RELOAD_INTERVAL. Overload is answered with 503 and rate
+    limiting with 429, both with Retry-After, rather than queueing
+    without bound.
+    """
+
+    def __init__(self, recognizer=None, workers=None, max_pending=None, rate_limiter=None,
+                 write_attendance=True, token=None):
+        self.recognizer = recognizer or FaceRecognizer()
+        self.workers = workers or Config.SERVICE_WORKERS
+        self.max_pending = max_pending or Config.SERVICE_MAX_PENDING
+        self.limiter = rate_limiter or RateLimiter()
+        self.reload_limiter = RateLimiter(rate=1.0 / Config.SERVICE_RELOAD_INTERVAL, burst=1)
+        self.token = token if token is not None else Config.SERVICE_TOKEN
+        self.writer = AttendanceWriteQueue() if write_attendance else None
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='service')
+        self.batcher = None
+        self.server = None
+        self.pending = 0
+        self.stats = {'requests': 0, 'faces': 0, 'recognized': 0, 'marked': 0, 'rate_limited': 0,
+                      'overloaded': 0, 'bad_requests': 0, 'unauthorized': 0, 'errors': 0, 'clients': 0}
+        # subject_id -> (roster index it was built from, subset to match against)
+        self._subject_indexes = {}
+        self._local = threading.local()
+        self._clones = []
+        self._clones_lock = threading.Lock()
+
+    def _thread_recognizer(self):
+        """Per-thread clone, so each worker owns a cascade"""
+        recognizer = getattr(self._local, 'recognizer', None)
+        if recognizer is None:
+            recognizer = self._local.recognizer = self.recognizer.clone()
+            with self._clones_lock:
+                self._clones.append(recognizer)
+        return recognizer
+
+    def _encode(self, body, whole_image):
+        """
+        Decode a JPEG and encode its faces (runs on the thread pool)
+
+        Returns:
+            Tuple (boxes, embeddings), or None if the image cannot be decoded
+        """
+        metrics = get_metrics()
+        with metrics.timer('service_decode'):
+            gray = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return None
+        recognizer = self._thread_recognizer()
+        if whole_image:
+            boxes = [(0, 0, gray.shape[1], gray.shape[0])]
+        else:
+            with metrics.timer('detect'):
+                boxes = [tuple(int(v) for v in box) for box in recognizer.detect(gray)]
+        return boxes, recognizer.encoder.encode_batch(gray, boxes)
+
+    async def start(self, host=None, port=None, load_roster=True):
+        """
+        Load the roster and start listening
+
+        Returns:
+            (host, port) actually bound; pass port=0 for any free port
+        """
+        if load_roster:
+            loaded = await asyncio.get_running_loop().run_in_executor(self.executor, self.recognizer.load_roster)
+            print(f"Loaded {loaded} enrolled face(s)")
+        self.recognizer.warm(self.workers)
+        if self.writer is not None:
+            self.writer.start()
+        self.batcher = RecognitionBatcher(self.recognizer, self.executor)
+        self.batcher.start()
+        if not self.token:
+            print("SERVICE_TOKEN is not set: requests are not authenticated, "
+                  "so attendance marking and /reload are disabled")
+        self.server = await asyncio.start_server(self.handle_client, host or Config.SERVICE_HOST,
+                                                 port if port is not None else Config.SERVICE_PORT)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """Stop accepting clients, flush pending attendance and release workers"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.writer is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.writer.stop)
+        self.executor.shutdown(wait=True)
+        for clone in self._clones:
+            self.recognizer.release(clone)
+
+    async def handle_client(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        peer = writer.get_extra_info('peername')
+        self.stats['clients'] += 1
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, tuple) and len(request) == 2:
+                    # Malformed or oversized request: answer and drop the connection
+                    self.stats['bad_requests'] += 1
+                    self.write_response(writer, request[0], {'error': request[1]}, keep_alive=False)
+                    await writer.drain()
+                    break
+                method, path, query, headers, body = request
+                # Keyed on the address, not a client-chosen id, so a kiosk
+                # cannot dodge its limit by renaming itself
+                client = peer[0] if peer else 'unknown'
+                if not self.authorized(headers):
+                    self.stats['unauthorized'] += 1
+                    status, payload, extra = HTTPStatus.UNAUTHORIZED, {'error': "missing or invalid token"}, None
+                else:
+                    try:
+                        status, payload, extra = await self.dispatch(method, path, query, body, client)
+                    except Exception as e:
+                        print(f"Attendance service error: {e}")
+                        self.stats['errors'] += 1
+                        status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "internal error"}, None
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.write_response(writer, status, payload, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.stats['clients'] -= 1
+            writer.close()
+
+    async def read_request(self, reader):
+        """
+        Read one HTTP/1.1 request
+
+        Returns:
+            (method, path, query, headers, body), None at end of stream, or
+            (status, message) for a request that cannot be served
+        """
+        # readline() raises ValueError for a line longer than the stream limit
+        try:
+            line = await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            return HTTPStatus.REQUEST_URI_TOO_LONG, "request line too long"
+        if not line:
+            return None
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            return HTTPStatus.BAD_REQUEST, "malformed request line"
+        method, target, version = parts
+
+        headers, count = {}, 0
+        while True:
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                return HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "header line too long"
+            if line in (b'\r\n', b'\n'):
+                break
+            if not line.endswith(b'\n'):
+                return HTTPStatus.BAD_REQUEST, "connection closed inside the headers"
+            count += 1
+            if count > Config.SERVICE_MAX_HEADERS:
+                return HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, f"more than {Config.SERVICE_MAX_HEADERS} headers"
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, "invalid Content-Length"
+        if length > Config.SERVICE_MAX_BODY:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body larger than {Config.SERVICE_MAX_BODY} bytes"
+        if length < 0:
+            return HTTPStatus.BAD_REQUEST, "invalid Content-Length"
+        try:
+            body = await reader.readexactly(length) if length else b''
+        except asyncio.IncompleteReadError:
+            return HTTPStatus.BAD_REQUEST, "body shorter than Content-Length"
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    @staticmethod
+    def write_response(writer, status, payload, keep_alive=True, extra=None):
+        body = json.dumps(payload).encode()
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 "Content-Type: application/json",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+    def authorized(self, headers):
+        """True if no token is configured or the request carries it"""
+        if not self.token:
+            return True
+        scheme, _, provided = headers.get('authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(provided.strip().encode(), self.token.encode())
+
+    async def dispatch(self, method, path, query, body, client):
+        """Route a request; returns (status, payload, extra_headers)"""
+        loop = asyncio.get_running_loop()
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, self.health(), None
+        if path == '/reload' and method == 'POST':
+            if not self.token:
+                return HTTPStatus.FORBIDDEN, {'error': "set SERVICE_TOKEN to enable /reload"}, None
+            # A reload rebuilds the whole roster index, so it is limited service-wide
+            retry_after = self.reload_limiter.acquire('reload')
+            if retry_after:
+                self.stats['rate_limited'] += 1
+                return (HTTPStatus.TOO_MANY_REQUESTS, {'error': "roster was reloaded recently"},
+                        {'Retry-After': max(1, int(np.ceil(retry_after)))})
+            loaded = await loop.run_in_executor(self.executor, self.recognizer.load_roster)
+            # Enrollments may have changed too
+            self._subject_indexes = {}
+            return HTTPStatus.OK, {'enrolled': loaded}, None
+        if path not in ('/recognize', '/faces'):
+            return HTTPStatus.NOT_FOUND, {'error': f"no such endpoint {path}"}, None
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use POST"}, None
+
+        retry_after = self.limiter.acquire(client)
+        if retry_after:
+            self.stats['rate_limited'] += 1
+            return (HTTPStatus.TOO_MANY_REQUESTS, {'error': "rate limit exceeded"},
+                    {'Retry-After': max(1, int(np.ceil(retry_after)))})
+        if self.pending >= self.max_pending:
+            self.stats['overloaded'] += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': "service busy"}, {'Retry-After': 1}
+
+        subject_id = None
+        if 'subject_id' in query:
+            if not self.token:
+                # Marking attendance is a write; without a token any local
+                # process could mark any student present
+                return HTTPStatus.FORBIDDEN, {'error': "set SERVICE_TOKEN to enable attendance marking"}, None
+            try:
+                subject_id = int(query['subject_id'])
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {'error': "subject_id must be an integer"}, None
+
+        self.pending += 1
+        try:
+            index = None
+            if subject_id is not None:
+                # The subject cache and enrollments may need a database
+                # round-trip, which must not stall the event loop for every
+                # other kiosk
+                subjects = await loop.run_in_executor(self.executor, get_roster_cache().get_subjects)
+                if subject_id not in {subject[0] for subject in subjects or []}:
+                    return HTTPStatus.NOT_FOUND, {'error': f"unknown subject {subject_id}"}, None
+                index = await self.subject_index(subject_id)
+                if index is None:
+                    self.stats['errors'] += 1
+                    return (HTTPStatus.SERVICE_UNAVAILABLE, {'error': "could not load subject enrollments"},
+                            {'Retry-After': 1})
+            with get_metrics().timer('service_request', endpoint=path):
+                return await self.recognize(body, path == '/faces', subject_id, index)
+        finally:
+            self.pending -= 1
+
+    async def subject_index(self, subject_id):
+        """
+        Roster index restricted to a subject's enrolled students
+
+        Like FaceRecognizer.load_roster(subject_id), a subject with no
+        enrollments matches the whole roster. Subsets are cached per
+        subject until the next /reload.
+
+        Returns:
+            The index, or None if the enrollments could not be read
+        """
+        roster = self.recognizer.index
+        cached = self._subject_indexes.get(subject_id)
+        if cached is not None and cached[0] is roster:
+            return cached[1]
+        enrolled = await asyncio.get_running_loop().run_in_executor(
+            self.executor, DatabaseHelper.get_subject_student_ids, subject_id
+        )
+        if enrolled is None:
+            return None
+        index = roster.subset(enrolled) if enrolled else roster
+        self._subject_indexes[subject_id] = (roster, index)
+        return index
+
+    async def recognize(self, body, whole_image, subject_id, index=None):
+        self.stats['requests'] += 1
+        encoded = await asyncio.get_running_loop().run_in_executor(self.executor, self._encode, body, whole_image)
+        if encoded is None:
+            self.stats['bad_requests'] += 1
+            return HTTPStatus.BAD_REQUEST, {'error': "body is not a decodable image"}, None
+        boxes, embeddings = encoded
+        ids, scores = await self.batcher.match(embeddings, index) if len(boxes) else ([], [])
+
+        faces, marked = [], []
+        for box, student_id, score in zip(boxes, ids, scores):
+            student_id = int(student_id) if student_id >= 0 else None
+            roll_no, name = self.recognizer.students.get(student_id, (None, None))
+            faces.append({'box': list(box), 'student_id': student_id, 'roll_no': roll_no,
+                          'name': name, 'score': round(float(score), 4)})
+            if student_id is not None:
+                self.stats['recognized'] += 1
+                if subject_id is not None and self.writer is not None and self.writer.add(student_id, subject_id):
+                    marked.append(student_id)
+        self.stats['faces'] += len(faces)
+        self.stats['marked'] += len(marked)
+        return HTTPStatus.OK, {'faces': faces, 'marked': marked}, None
+
+    def health(self):
+        stats = dict(self.stats)
+        stats.update({
+            'pending': self.pending,
+            'enrolled': len(self.recognizer.index),
+            'batches': self.batcher.stats if self.batcher else None,
+            'writer': self.writer.stats if self.writer else None,
+        })
+        return stats
+
+
+async def serve(host, port, workers, write_attendance):
+    service = AttendanceService(workers=workers, write_attendance=write_attendance)
+    host, port = await service.start(host, port)
+    print(f"Attendance service listening on http://{host}:{port}")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve face recognition to kiosk clients over HTTP")
+    parser.add_argument("--host", default=None, help=f"Listen address (default {Config.SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=None, help=f"Listen port (default {Config.SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, default=None, help="Detection/encoding threads")
+    parser.add_argument("--dry-run", action="store_true", help="Recognize without writing attendance")
+    args = parser.parse_args()
+
+    get_metrics().start_export()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, not args.dry_run))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
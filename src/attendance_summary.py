@@ -0,0 +1,103 @@
+import argparse
+import re
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+SCHEMA_PATH = os.path.join(Config.BASE_DIR, 'database', 'schema.sql')
+
+
+def summary_ddl():
+    """
+    The attendance_summary table and trigger definitions from schema.sql
+
+    Reading them from the schema keeps a single definition for both fresh
+    installs and upgrades of existing databases.
+
+    Returns:
+        Tuple (create_table, {trigger_name: create_trigger})
+    """
+    with open(SCHEMA_PATH) as schema_file:
+        schema = schema_file.read()
+    create_table = re.search(r"CREATE TABLE IF NOT EXISTS attendance_summary\b.*?\n\);", schema, re.S).group(0)
+    block = re.search(r"DELIMITER \$\$(.*?)DELIMITER ;", schema, re.S).group(1)
+    triggers = {}
+    for statement in block.split('$$'):
+        match = re.search(r"CREATE TRIGGER (\w+)", statement)
+        if match:
+            triggers[match.group(1)] = statement.strip()
+    return create_table, triggers
+
+
+def install():
+    """
+    Create the summary table and any missing triggers on an existing database
+
+    Returns:
+        Number of triggers created, or None on error
+    """
+    create_table, triggers = summary_ddl()
+    if not DatabaseHelper.execute_query(create_table, name='install'):
+        return None
+    existing = DatabaseHelper.get_existing_triggers('attendance')
+    if existing is None:
+        return None
+    created = 0
+    for name, statement in triggers.items():
+        if name in existing:
+            continue
+        if not DatabaseHelper.execute_query(statement, name='install'):
+            return None
+        created += 1
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the attendance_summary totals table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("install", help="Create the table and triggers on an existing database, then rebuild")
+    subparsers.add_parser("rebuild", help="Recompute every total from the attendance table")
+    verify = subparsers.add_parser("verify", help="Check the totals against the attendance table")
+    verify.add_argument("--repair", action="store_true", help="Rebuild if any total is wrong")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        created = install()
+        if created is None:
+            print("Could not create attendance_summary or its triggers")
+            sys.exit(1)
+        print(f"Created {created} trigger(s)")
+
+    if args.command in ("install", "rebuild"):
+        rows = DatabaseHelper.rebuild_attendance_summary()
+        if rows is None:
+            print("Rebuild failed")
+            sys.exit(1)
+        print(f"Rebuilt attendance_summary: {rows} student/subject row(s)")
+        return
+
+    mismatches = DatabaseHelper.verify_attendance_summary()
+    if mismatches is None:
+        print("Verification failed")
+        sys.exit(1)
+    if not mismatches:
+        print("attendance_summary matches the attendance table")
+        return
+
+    for student_id, subject_id, total, attended, summary_total, summary_attended in mismatches:
+        print(f"student {student_id}, subject {subject_id}: expected {attended}/{total}, "
+              f"summary has {summary_attended}/{summary_total}")
+    print(f"{len(mismatches)} mismatched row(s)")
+    if args.repair:
+        rows = DatabaseHelper.rebuild_attendance_summary()
+        print("Rebuild failed" if rows is None else f"Rebuilt attendance_summary: {rows} row(s)")
+        sys.exit(0 if rows is not None else 1)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
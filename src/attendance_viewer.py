@@ -0,0 +1,207 @@
+from tkinter import *
+from tkinter import ttk, messagebox
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+class ViewerSession:
+    """
+    Attendance data of one logged-in student, kept for the login session
+    
+    Per-subject totals come from attendance_summary in one query; history
+    is fetched a page at a time as the user scrolls. Everything loaded is
+    kept, so reopening the dashboard issues no queries until refresh().
+    """
+    
+    def __init__(self, student):
+        self.student = student  # (id, roll_no, name)
+        self.stats = None
+        self.history = []
+        self.exhausted = False
+        self.failed = False  # a page failed to load; paging stops until refresh()
+    
+    def load_stats(self):
+        """Per-subject (subject_name, total, attended, percentage), cached"""
+        if self.stats is None:
+            rows = DatabaseHelper.get_attendance_stats(student_id=self.student[0])
+            if rows is None:
+                return None
+            self.stats = [(row[2], row[3], row[4], row[5]) for row in rows]
+        return self.stats
+    
+    def load_more(self):
+        """Fetch the next history page; returns the new rows, or None on error"""
+        if self.exhausted or self.failed:
+            return []
+        before = self.history[-1][:2] if self.history else None
+        page = DatabaseHelper.get_student_history(self.student[0], before)
+        if page is None:
+            self.failed = True
+            return None
+        if len(page) < Config.VIEWER_PAGE_SIZE:
+            self.exhausted = True
+        self.history.extend(page)
+        return page
+    
+    def refresh(self):
+        """Drop cached data so the next view reloads it"""
+        self.stats = None
+        self.history = []
+        self.exhausted = False
+        self.failed = False
+
+class AttendanceViewer:
+    def __init__(self, root, session):
+        self.root = root
+        self.session = session
+        self.loading = False
+        self.setup_window()
+        self.create_widgets()
+        self.show()
+    
+    def setup_window(self):
+        """Setup window"""
+        student_id, roll_no, name = self.session.student
+        self.root.title(f"Attendance - {name}")
+        self.root.geometry("800x600")
+        self.root.maxsize(800, 600)
+        self.root.minsize(800, 600)
+        self.root["bg"] = Config.BG_COLOR
+    
+    def create_widgets(self):
+        """Create widgets"""
+        student_id, roll_no, name = self.session.student
+        
+        # Title
+        lbl_title = Label(
+            self.root,
+            text=f"{name} ({roll_no})",
+            font="arial 22 bold",
+            bg=Config.BG_COLOR
+        )
+        lbl_title.pack(pady=10)
+        
+        self.lbl_overall = Label(
+            self.root,
+            text="",
+            font="arial 14",
+            bg=Config.BG_COLOR
+        )
+        self.lbl_overall.pack()
+        
+        # Per-subject totals
+        self.stats_tree = ttk.Treeview(
+            self.root,
+            columns=("subject", "attended", "total", "percentage"),
+            show="headings",
+            height=6
+        )
+        for column, heading, width in (("subject", "Subject", 340), ("attended", "Attended", 120),
+                                       ("total", "Classes", 120), ("percentage", "Percentage", 140)):
+            self.stats_tree.heading(column, text=heading)
+            self.stats_tree.column(column, width=width, anchor=CENTER)
+        self.stats_tree.pack(padx=20, pady=10, fill=X)
+        
+        # History, paged in as the list is scrolled
+        frame = Frame(self.root, bg=Config.BG_COLOR)
+        frame.pack(padx=20, fill=BOTH, expand=True)
+        
+        self.history_tree = ttk.Treeview(
+            frame,
+            columns=("date", "subject", "status", "type"),
+            show="headings"
+        )
+        for column, heading, width in (("date", "Date", 150), ("subject", "Subject", 330),
+                                       ("status", "Status", 120), ("type", "Marked", 120)):
+            self.history_tree.heading(column, text=heading)
+            self.history_tree.column(column, width=width, anchor=CENTER)
+        
+        self.scrollbar = Scrollbar(frame, orient=VERTICAL, command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=self.on_scroll)
+        self.history_tree.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        
+        bottom = Frame(self.root, bg=Config.BG_COLOR)
+        bottom.pack(fill=X, padx=20, pady=10)
+        
+        self.lbl_status = Label(
+            bottom,
+            text="",
+            font="arial 12",
+            bg=Config.BG_COLOR
+        )
+        self.lbl_status.pack(side=LEFT)
+        
+        btn_refresh = Button(
+            bottom,
+            text="Refresh",
+            font="arial 12 bold",
+            bd=6,
+            padx=15,
+            bg='#2196F3',
+            fg='white',
+            command=self.refresh
+        )
+        btn_refresh.pack(side=RIGHT)
+    
+    def show(self):
+        """Fill the view from the session, loading only what is not cached yet"""
+        stats = self.session.load_stats()
+        if stats is None:
+            messagebox.showerror("Error", "Could not load attendance statistics", parent=self.root)
+            stats = []
+        
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        attended, total = 0, 0
+        for subject_name, subject_total, subject_attended, percentage in stats:
+            self.stats_tree.insert("", END, values=(subject_name, subject_attended, subject_total, f"{percentage}%"))
+            attended += subject_attended
+            total += subject_total
+        overall = f"{attended * 100.0 / total:.1f}%" if total else "no classes yet"
+        self.lbl_overall.config(text=f"Overall attendance: {overall} ({attended}/{total})")
+        
+        self.history_tree.delete(*self.history_tree.get_children())
+        if not self.session.history:
+            self.session.load_more()
+        self.add_history(self.session.history)
+    
+    def add_history(self, rows):
+        """Append history rows to the list"""
+        for attendance_date, attendance_id, subject_name, status, attendance_type in rows:
+            self.history_tree.insert("", END, values=(
+                attendance_date.strftime("%d %b %Y"), subject_name, status.title(), attendance_type.title()
+            ))
+        if self.session.failed:
+            more = " - could not load more, press Refresh to retry"
+        else:
+            more = "" if self.session.exhausted else " - scroll for more"
+        self.lbl_status.config(text=f"Showing {len(self.session.history)} record(s){more}")
+    
+    def on_scroll(self, first, last):
+        """Track the scrollbar and fetch the next page when the end of the list comes into view"""
+        self.scrollbar.set(first, last)
+        if (float(last) > 0.95 and not self.loading
+                and not self.session.exhausted and not self.session.failed):
+            self.loading = True
+            self.root.after_idle(self.load_next_page)
+    
+    def load_next_page(self):
+        """Fetch and append the next history page"""
+        page = self.session.load_more()
+        if page is None:
+            # Shown once; scrolling stops paging until the user refreshes
+            messagebox.showerror("Error", "Could not load attendance history", parent=self.root)
+            self.add_history([])
+        elif page:
+            self.add_history(page)
+        self.loading = False
+    
+    def refresh(self):
+        """Reload statistics and history from the database"""
+        self.session.refresh()
+        self.show()
+
@@ -0,0 +1,147 @@
+import argparse
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+# Below this the hash is too cheap to brute-force slowly, whatever the hardware
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+_dummy_hash = None
+
+
+def get_auth_executor():
+    """
+    Worker threads for bcrypt work
+
+    bcrypt releases the GIL while hashing, so checks run in parallel with
+    each other and never block the Tk event loop.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.AUTH_WORKERS, thread_name_prefix='auth')
+        return _executor
+
+
+def hash_password(password, rounds=None):
+    """bcrypt hash of a password at the configured cost, as a str"""
+    salt = bcrypt.gensalt(rounds or Config.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def hash_cost(password_hash):
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it is not bcrypt"""
+    parts = password_hash.split('$')
+    if len(parts) < 4 or not parts[1].startswith('2') or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def _check_dummy(password):
+    """Spend the same time on unknown accounts so they cannot be told apart"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('not a real password').encode('utf-8')
+    bcrypt.checkpw(password.encode('utf-8'), _dummy_hash)
+
+
+def authenticate(enrollment, password):
+    """
+    Check a password against the stored hash for an enrollment ID
+
+    Hashes made at a different cost than Config.BCRYPT_ROUNDS, and legacy
+    plaintext rows, are rehashed at the configured cost after a successful
+    check. Run this on get_auth_executor(), not the UI thread.
+
+    Returns:
+        (id, username, role) on success, otherwise None
+    """
+    user = DatabaseHelper.get_user_credentials(enrollment)
+    if not user:
+        _check_dummy(password)
+        return None
+    user_id, username, role, password_hash = user
+
+    cost = hash_cost(password_hash)
+    if cost is None:
+        # Accounts created before passwords were hashed
+        valid = hmac.compare_digest(password.encode('utf-8'), password_hash.encode('utf-8'))
+    else:
+        valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    if not valid:
+        return None
+
+    if cost != Config.BCRYPT_ROUNDS:
+        DatabaseHelper.update_password_hash(user_id, hash_password(password))
+    return user_id, username, role
+
+
+def calibrate(target_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, verbose=True):
+    """
+    Pick the highest bcrypt cost whose hash time stays within target_ms
+
+    Each extra round doubles the work, so rounds are timed upwards until
+    the target is exceeded.
+
+    Returns:
+        Tuple (rounds, milliseconds at that cost)
+    """
+    chosen, chosen_ms = min_rounds, None
+    for rounds in range(min_rounds, max_rounds + 1):
+        salt = bcrypt.gensalt(rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration password', salt)
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if verbose:
+            print(f"cost {rounds:>2}: {elapsed_ms:8.1f} ms")
+        if elapsed_ms > target_ms and rounds > min_rounds:
+            break
+        chosen, chosen_ms = rounds, elapsed_ms
+        if elapsed_ms > target_ms:
+            break
+    return chosen, chosen_ms
+
+
+def write_env_setting(path, name, value):
+    """Set NAME=value in a .env file, replacing an existing line"""
+    lines = []
+    if os.path.exists(path):
+        with open(path) as env_file:
+            lines = env_file.read().splitlines()
+    lines = [line for line in lines if not line.startswith(f"{name}=")]
+    lines.append(f"{name}={value}")
+    with open(path, 'w') as env_file:
+        env_file.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the bcrypt cost for this machine")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="Longest acceptable time for one password check")
+    parser.add_argument("--write", action="store_true", help="Save BCRYPT_ROUNDS to the .env file")
+    args = parser.parse_args()
+
+    rounds, elapsed_ms = calibrate(args.target_ms)
+    if elapsed_ms is not None and elapsed_ms > args.target_ms:
+        print(f"Even the minimum cost {rounds} takes {elapsed_ms:.0f} ms on this machine; using it anyway")
+    print(f"BCRYPT_ROUNDS={rounds}")
+    if args.write:
+        env_path = os.path.join(Config.BASE_DIR, '.env')
+        write_env_setting(env_path, 'BCRYPT_ROUNDS', rounds)
+        print(f"Saved to {env_path}; existing passwords are rehashed at the new cost on next login")
+
+
+if __name__ == "__main__":
+    main()
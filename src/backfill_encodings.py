@@ -0,0 +1,68 @@
+import argparse
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.db_helper import DatabaseHelper
+from src.face_recognizer import FaceEncoder, load_face_cascade
+from src.gallery_file import refresh_gallery
+from src.roster_cache import get_roster_cache
+from src.image_store import ImageStore
+
+
+def backfill(verbose=True):
+    """
+    Compute face encodings for students registered without one
+
+    Students are processed one at a time so only a single image is held
+    in memory. Images come from the image store, or from the legacy blob
+    for rows not yet migrated. Rows already encoded with the current model
+    tag are left alone.
+
+    Returns:
+        Tuple (encoded, failed) counts
+    """
+    encoder = FaceEncoder()
+    face_cascade = load_face_cascade()
+    store = ImageStore()
+    student_ids = DatabaseHelper.get_students_needing_encoding(encoder.model_tag)
+
+    encoded, failed = 0, 0
+    for student_id in student_ids:
+        image_hash, image_data = DatabaseHelper.get_student_image(student_id)
+        if image_hash:
+            image_data = store.get(image_hash)
+        image = None
+        if image_data:
+            image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+        face_encoding = encoder.encode_image(image, face_cascade) if image is not None else None
+        if face_encoding and DatabaseHelper.update_face_encoding(student_id, face_encoding):
+            encoded += 1
+        else:
+            failed += 1
+            if verbose:
+                print(f"Could not encode student id {student_id}: no usable face in image")
+
+    if encoded:
+        get_roster_cache().expire_students()
+        refresh_gallery()
+    return encoded, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill students.face_encoding from stored registration images"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    encoded, failed = backfill(verbose=not args.quiet)
+    print(f"Encoded {encoded} student(s), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import multiprocessing
+import re
+import time
+from datetime import date
+import cv2
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.face_detector import DetectionScheduler
+from src.face_recognizer import FaceRecognizer
+from src.face_tracker import FaceTracker
+
+# Per-process recognizer, created once by the pool initializer
+_recognizer = None
+
+# A lecture date in a file name, e.g. ML_2026-10-05.mp4 or lecture_20261005.mp4
+DATE_IN_NAME = re.compile(r'(?<!\d)(?P<year>\d{4})(?P<sep>[-_.]?)(?P<month>\d{2})(?P=sep)(?P<day>\d{2})(?!\d)')
+
+
+def init_worker(index):
+    """Pool initializer: load the cascade once and install the shared roster index"""
+    global _recognizer
+    cv2.setNumThreads(1)  # one core per worker process
+    _recognizer = FaceRecognizer()
+    _recognizer.index = index
+
+
+def split_video(path, segment_seconds):
+    """
+    Split a video into (path, start_frame, end_frame) segments
+
+    Returns:
+        List of segments, empty if the file cannot be opened
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        return []
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+
+    step = max(int(fps * segment_seconds), 1)
+    return [(path, start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def process_segment(segment, frame_step=1):
+    """
+    Detect and recognize faces in one video segment
+
+    Returns:
+        Tuple (path, student_ids, frames_read, seconds)
+    """
+    path, start, end = segment
+    started = time.perf_counter()
+    capture = cv2.VideoCapture(path)
+    capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+    scheduler = DetectionScheduler()
+    tracker = FaceTracker()
+    students = set()
+
+    frames = 0
+    for frame_no in range(start, end):
+        if (frame_no - start) % frame_step:
+            # Skipped frames are only grabbed, never decoded
+            if not capture.grab():
+                break
+            continue
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # The scheduler counts processed frames, so its full-scan interval
+        # means the same number of detections whatever the frame step;
+        # the tracker keeps video frame numbers for its time-based ages
+        faces = scheduler.detect(_recognizer.face_cascade, gray, frames)
+        tracks = tracker.update(faces, frame_no)
+        todo = tracker.claim_for_recognition(tracks, frame_no)
+        if not todo:
+            continue
+        matches = _recognizer.recognize(gray, [faces[i] for i in todo])
+        for i, (student_id, score) in zip(todo, matches):
+            if tracker.assign(tracks[i], student_id, score, frame_no):
+                students.add(student_id)
+
+    capture.release()
+    return path, students, frames, time.perf_counter() - started
+
+
+def _process(args):
+    return process_segment(*args)
+
+
+def video_date(path):
+    """
+    Lecture date of a recording, taken from its file name
+
+    The modification time is not used: copying, syncing or re-encoding a
+    recording changes it.
+
+    Returns:
+        The date, or None if the name holds no valid YYYY-MM-DD / YYYYMMDD date
+    """
+    for match in DATE_IN_NAME.finditer(os.path.basename(path)):
+        try:
+            return date(int(match['year']), int(match['month']), int(match['day']))
+        except ValueError:
+            continue
+    return None
+
+
+def run_batch(videos, subject_id, workers=None, segment_seconds=None, frame_step=None,
+              attendance_date=None, dry_run=False):
+    """
+    Take attendance from recorded lecture videos
+
+    Videos are dated by attendance_date, or else by the date in their
+    file name; a video with neither is skipped.
+
+    Returns:
+        Dict with per-video student ids, write outcomes, undated videos
+        and throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    segment_seconds = segment_seconds or Config.BATCH_SEGMENT_SECONDS
+    frame_step = frame_step or Config.BATCH_FRAME_STEP
+
+    dates, undated = {}, []
+    for path in videos:
+        dates[path] = attendance_date or video_date(path)
+        if dates[path] is None:
+            print(f"Error: no date in the name of {path}; rename it with a YYYY-MM-DD date "
+                  "or pass --date. Skipping")
+            undated.append(path)
+    videos = [path for path in videos if dates[path] is not None]
+
+    recognizer = FaceRecognizer()
+    if recognizer.load_roster(subject_id) == 0:
+        raise RuntimeError("No enrolled student faces found in database")
+
+    segments = []
+    for path in videos:
+        video_segments = split_video(path, segment_seconds)
+        if not video_segments:
+            print(f"Could not open {path}, skipping")
+        segments.extend(video_segments)
+
+    started = time.perf_counter()
+    per_video = {path: set() for path in videos}
+    frames, busy = 0, 0.0
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(recognizer.index,)) as pool:
+        jobs = [(segment, frame_step) for segment in segments]
+        for path, students, segment_frames, seconds in pool.imap_unordered(_process, jobs):
+            per_video[path].update(students)
+            frames += segment_frames
+            busy += seconds
+    wall = time.perf_counter() - started
+
+    # A student seen in several segments of the same lecture is one record
+    records = {}
+    for path, students in per_video.items():
+        lecture_date = dates[path]
+        for student_id in students:
+            records[(student_id, lecture_date)] = {
+                'student_id': student_id,
+                'subject_id': subject_id,
+                'attendance_date': lecture_date,
+            }
+    records = list(records.values())
+    outcomes = ['skipped'] * len(records) if dry_run else DatabaseHelper.mark_attendance_bulk(records)
+
+    return {
+        'students': {path: sorted(students) for path, students in per_video.items()},
+        'labels': {sid: recognizer.student_label(sid) for s in per_video.values() for sid in s},
+        'outcomes': outcomes,
+        'undated': undated,
+        'segments': len(segments),
+        'frames': frames,
+        'wall_seconds': wall,
+        'workers': workers,
+        'fps': frames / wall if wall else 0.0,
+        'fps_per_core': frames / busy if busy else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Take attendance from recorded lecture videos")
+    parser.add_argument("videos", nargs="+", help="Video files to process")
+    parser.add_argument("--subject", required=True, help="Subject code, e.g. ML")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--segment-seconds", type=float, default=None, help="Length of each work unit")
+    parser.add_argument("--frame-step", type=int, default=None, help="Decode every Nth frame")
+    parser.add_argument("--date", type=date.fromisoformat, default=None,
+                        help="Attendance date YYYY-MM-DD (default: the date in each file's name)")
+    parser.add_argument("--dry-run", action="store_true", help="Recognize without writing attendance")
+    args = parser.parse_args()
+
+    subject = DatabaseHelper.get_subject_by_code(args.subject)
+    if not subject:
+        print(f"Subject code {args.subject} not found in database")
+        sys.exit(1)
+
+    result = run_batch(args.videos, subject[0], args.workers, args.segment_seconds,
+                       args.frame_step, args.date, args.dry_run)
+
+    for path, students in result['students'].items():
+        print(f"{path}: {len(students)} student(s)")
+        for student_id in students:
+            print(f"    {result['labels'][student_id]}")
+    counts = {outcome: result['outcomes'].count(outcome) for outcome in set(result['outcomes'])}
+    print(f"Attendance records: {counts or 'none'}")
+    print(f"{result['frames']} frames in {result['segments']} segments, "
+          f"{result['wall_seconds']:.1f}s on {result['workers']} worker(s)")
+    print(f"Throughput: {result['fps']:.1f} fps total, {result['fps_per_core']:.1f} fps per core")
+    if result['undated']:
+        print(f"Skipped {len(result['undated'])} video(s) with no date: {', '.join(result['undated'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import multiprocessing
+import time
+import cv2
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.face_detector import detect_faces
+from src.face_recognizer import FaceEncoder, load_face_cascade, serialize_encoding
+from src.gallery_file import refresh_gallery
+from src.roster_cache import get_roster_cache
+from src.image_store import ImageStore
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Per-process detector, encoder and store, created once by the pool initializer
+_face_cascade = None
+_encoder = None
+_store = None
+
+
+def init_worker():
+    """Pool initializer: load the cascade once per worker process"""
+    global _face_cascade, _encoder, _store
+    cv2.setNumThreads(1)  # one core per worker process
+    _face_cascade = load_face_cascade()
+    _encoder = FaceEncoder()
+    _store = ImageStore()
+
+
+def read_roster(source):
+    """
+    Read (roll_no, name, image_path) rows from a CSV file or a directory
+
+    A CSV needs roll_no, name and image_path columns; relative image paths
+    are resolved against the CSV's folder. In a directory every image is
+    named `<roll_no>_<name>.<ext>`, with underscores in the name read as
+    spaces.
+    """
+    if os.path.isdir(source):
+        rows = []
+        for filename in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() not in IMAGE_EXTENSIONS or '_' not in stem:
+                continue
+            roll_no, name = stem.split('_', 1)
+            rows.append((roll_no.strip(), name.replace('_', ' ').strip(), os.path.join(source, filename)))
+        return rows
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline='') as csv_file:
+        return [
+            (row['roll_no'].strip(), row['name'].strip(), os.path.join(base, row['image_path'].strip()))
+            for row in csv.DictReader(csv_file)
+        ]
+
+
+def process_image(item):
+    """
+    Detect, crop and encode the face in one photo and store the image
+
+    Returns:
+        Tuple (index, image_meta, face_encoding, error); error is None on
+        success
+    """
+    index, path = item
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        return index, None, None, "could not read image"
+
+    # Phone photos are far larger than webcam frames; detection cost grows with area
+    scale = Config.ENROLL_MAX_IMAGE_SIDE / float(max(image.shape[:2]))
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(_face_cascade, gray)
+    if len(faces) != 1:
+        return index, None, None, f"expected one face, found {len(faces)}"
+
+    box = faces[0]
+    face_encoding = serialize_encoding(_encoder.encode(gray, box), _encoder.model_tag)
+    retval, buffer = cv2.imencode('.png', image)
+    image_meta = _store.put(buffer.tobytes(), image=image, face_box=box)
+    return index, image_meta, face_encoding, None
+
+
+def bulk_enroll(rows, workers=None, batch_size=None, verbose=True):
+    """
+    Register many students from photos
+
+    Photos are processed across a process pool and the students inserted
+    in batched transactions as results arrive. Roll numbers already in the
+    database are skipped with one bulk lookup, so an interrupted import
+    can simply be run again. Workers store the images before the insert;
+    images this run stored for a batch whose insert failed are deleted at
+    the end, unless a student inserted in another batch uses the same one.
+
+    Returns:
+        Dict with enrolled, existing, duplicate and failed counts, the
+        failures as (roll_no, path, reason) and throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or Config.ENROLL_INSERT_BATCH
+
+    # First occurrence of a roll number wins
+    unique, duplicate = {}, 0
+    for roll_no, name, path in rows:
+        if not roll_no or roll_no in unique:
+            duplicate += 1
+            continue
+        unique[roll_no] = (roll_no, name, path)
+
+    existing = DatabaseHelper.get_existing_roll_nos(unique)
+    if existing is None:
+        raise RuntimeError("Could not look up existing students")
+    todo = [row for roll_no, row in unique.items() if roll_no not in existing]
+
+    started = time.perf_counter()
+    enrolled, failures, batch = 0, [], []
+    # Image hashes used by inserted students, and ones this run stored for
+    # students whose insert failed
+    kept, orphaned = set(), set()
+
+    def flush():
+        nonlocal enrolled
+        inserted = DatabaseHelper.insert_students_bulk(batch)
+        if inserted is None:
+            failures.extend((s['roll_no'], s['image_path'], "database insert failed") for s in batch)
+            orphaned.update(s['image_meta']['image_hash'] for s in batch if s['image_meta']['stored'])
+        else:
+            enrolled += inserted
+            kept.update(s['image_meta']['image_hash'] for s in batch)
+        batch.clear()
+
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        jobs = [(i, path) for i, (roll_no, name, path) in enumerate(todo)]
+        for index, image_meta, face_encoding, error in pool.imap_unordered(process_image, jobs, chunksize=4):
+            roll_no, name, path = todo[index]
+            if error:
+                failures.append((roll_no, path, error))
+                if verbose:
+                    print(f"Skipping {roll_no} ({path}): {error}")
+                continue
+            batch.append({
+                'roll_no': roll_no,
+                'name': name,
+                'image_path': path,
+                'image_meta': image_meta,
+                'face_encoding': face_encoding,
+            })
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    # Content-addressed: two photos with the same bytes share one stored image
+    store = ImageStore()
+    for image_hash in orphaned - kept:
+        store.delete(image_hash)
+    wall = time.perf_counter() - started
+    if enrolled:
+        get_roster_cache().expire_students()
+        refresh_gallery()
+
+    return {
+        'enrolled': enrolled,
+        'existing': len(existing),
+        'duplicate': duplicate,
+        'failed': len(failures),
+        'failures': failures,
+        'images': len(todo),
+        'wall_seconds': wall,
+        'workers': workers,
+        'images_per_second': len(todo) / wall if wall else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register students in bulk from a folder or CSV of photos")
+    parser.add_argument("source", help="CSV with roll_no,name,image_path or a folder of <roll_no>_<name>.jpg")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Students per insert transaction")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    Config.ensure_directories()
+    rows = read_roster(args.source)
+    if not rows:
+        print(f"No students found in {args.source}")
+        sys.exit(1)
+
+    result = bulk_enroll(rows, args.workers, args.batch_size, verbose=not args.quiet)
+
+    print(f"Enrolled {result['enrolled']} student(s); {result['existing']} already registered, "
+          f"{result['duplicate']} duplicate row(s), {result['failed']} failed")
+    print(f"{result['images']} image(s) in {result['wall_seconds']:.1f}s on {result['workers']} worker(s): "
+          f"{result['images_per_second']:.1f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
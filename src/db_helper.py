@@ -1,22 +1,38 @@
-import mysql.connector
+from datetime import date
 from mysql.connector import Error
 from config import Config
+from src.db_pool import get_pool
+from src.metrics import get_metrics
 
 class DatabaseHelper:
     """Helper class for database operations"""
     
+    # Rows per multi-row INSERT in bulk writes
+    BULK_CHUNK_SIZE = 500
+    
+    # Values allowed by the attendance table's ENUM columns
+    ATTENDANCE_STATUSES = ('present', 'absent')
+    ATTENDANCE_TYPES = ('manual', 'automatic')
+    
+    # Column order of get_attendance_page / iter_attendance_report rows; the
+    # first three are the keyset
+    REPORT_COLUMNS = (
+        'attendance_date', 'student_id', 'subject_id', 'roll_no', 'student_name',
+        'subject_code', 'subject_name', 'status', 'attendance_type', 'marked_at'
+    )
+    
     @staticmethod
-    def get_connection():
-        """Get database connection"""
-        try:
-            connection = mysql.connector.connect(**Config.get_db_config())
-            return connection
-        except Error as e:
-            print(f"Error connecting to database: {e}")
-            return None
+    def connection():
+        """Check out a pooled connection (use as a context manager)"""
+        return get_pool().connection()
     
     @staticmethod
-    def execute_query(query, values=None, fetch=False):
+    def pool_metrics():
+        """Checkouts, wait time and connections created by the shared pool"""
+        return get_pool().metrics()
+    
+    @staticmethod
+    def execute_query(query, values=None, fetch=False, prepared=False, name=None):
         """
         Execute a database query
         
@@ -24,64 +40,305 @@ class DatabaseHelper:
             query: SQL query string
             values: Tuple of values for parameterized query
             fetch: Boolean, if True returns fetched results
+            prepared: Boolean, if True run as a server-side prepared
+                      statement that is reused on the pooled connection
+            name: Label for the query's latency metrics, usually the
+                  calling DatabaseHelper method
         
         Returns:
             For SELECT: List of tuples or None
             For INSERT/UPDATE/DELETE: Boolean (success/failure)
         """
-        connection = DatabaseHelper.get_connection()
-        if not connection:
+        prepared = prepared and values is not None
+        metrics = get_metrics()
+        name = name or 'other'
+        try:
+            with metrics.timer('db_query', query=name), DatabaseHelper.connection() as connection:
+                cursor = connection.cursor(query, prepared=prepared)
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                
+                if fetch:
+                    result = cursor.fetchall()
+                else:
+                    connection.commit()
+                    result = True
+                if not prepared:
+                    cursor.close()
+                return result
+        except Error as e:
+            print(f"Database error: {e}")
+            metrics.count('db_errors', query=name)
             return None if fetch else False
+    
+    @staticmethod
+    def insert_student(roll_no, name, image_meta=None, face_encoding=None):
+        """Insert a new student; image_meta is the dict returned by ImageStore.put"""
+        image_meta = image_meta or {}
+        query = """
+            INSERT INTO students
+                (roll_no, name, image_hash, image_width, image_height, image_size, face_encoding)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        return DatabaseHelper.execute_query(query, (
+            roll_no, name,
+            image_meta.get('image_hash'), image_meta.get('image_width'),
+            image_meta.get('image_height'), image_meta.get('image_size'),
+            face_encoding
+        ), name='insert_student')
+    
+    @staticmethod
+    def insert_students_bulk(students):
+        """
+        Insert many students in one transaction
+        
+        Args:
+            students: Sequence of dicts with roll_no and name, and optionally
+                      image_meta (from ImageStore.put) and face_encoding
+        
+        Returns:
+            Number of rows inserted, or None if the transaction was rolled
+            back. Roll numbers that already exist are ignored.
+        """
+        students = list(students)
+        if not students:
+            return 0
+        
+        rows = []
+        for s in students:
+            image_meta = s.get('image_meta') or {}
+            rows.append((
+                s['roll_no'], s['name'],
+                image_meta.get('image_hash'), image_meta.get('image_width'),
+                image_meta.get('image_height'), image_meta.get('image_size'),
+                s.get('face_encoding')
+            ))
         
         try:
-            cursor = connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            
-            if fetch:
-                result = cursor.fetchall()
-                cursor.close()
-                connection.close()
-                return result
-            else:
+            with get_metrics().timer('db_query', query='insert_students_bulk'), DatabaseHelper.connection() as connection:
+                cursor = connection.cursor()
+                inserted = 0
+                for start in range(0, len(rows), DatabaseHelper.BULK_CHUNK_SIZE):
+                    chunk = rows[start:start + DatabaseHelper.BULK_CHUNK_SIZE]
+                    cursor.execute(
+                        "INSERT IGNORE INTO students "
+                        "(roll_no, name, image_hash, image_width, image_height, image_size, face_encoding) "
+                        f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(chunk))}",
+                        tuple(value for row in chunk for value in row)
+                    )
+                    inserted += cursor.rowcount
                 connection.commit()
                 cursor.close()
-                connection.close()
-                return True
+                return inserted
         except Error as e:
             print(f"Database error: {e}")
-            if connection:
-                connection.close()
-            return None if fetch else False
+            get_metrics().count('db_errors', query='insert_students_bulk')
+            return None
     
     @staticmethod
-    def insert_student(roll_no, name, image_data=None):
-        """Insert a new student"""
-        query = "INSERT INTO students (roll_no, name, image) VALUES (%s, %s, %s)"
-        return DatabaseHelper.execute_query(query, (roll_no, name, image_data))
+    def get_existing_roll_nos(roll_nos):
+        """
+        Subset of roll_nos already registered, found with chunked IN lookups
+        
+        Returns:
+            Set of roll numbers, or None on a database error
+        """
+        roll_nos = list(roll_nos)
+        existing = set()
+        for start in range(0, len(roll_nos), DatabaseHelper.BULK_CHUNK_SIZE):
+            chunk = roll_nos[start:start + DatabaseHelper.BULK_CHUNK_SIZE]
+            rows = DatabaseHelper.execute_query(
+                f"SELECT roll_no FROM students WHERE roll_no IN ({', '.join(['%s'] * len(chunk))})",
+                tuple(chunk),
+                fetch=True,
+                name='get_existing_roll_nos'
+            )
+            if rows is None:
+                return None
+            existing.update(row[0] for row in rows)
+        return existing
     
     @staticmethod
     def get_student_by_roll_no(roll_no):
         """Get student by roll number"""
         query = "SELECT id, roll_no, name FROM students WHERE roll_no = %s"
-        result = DatabaseHelper.execute_query(query, (roll_no,), fetch=True)
+        result = DatabaseHelper.execute_query(query, (roll_no,), fetch=True, prepared=True,
+                                              name='get_student_by_roll_no')
         return result[0] if result else None
     
+    @staticmethod
+    def get_student_roster(updated_since=None):
+        """
+        Get (id, roll_no, name, face_encoding, updated_at) for every student,
+        or only those updated at or after updated_since
+        """
+        query = "SELECT id, roll_no, name, face_encoding, updated_at FROM students"
+        if updated_since is None:
+            return DatabaseHelper.execute_query(query, fetch=True, name='get_student_roster')
+        query += " WHERE updated_at >= %s"
+        return DatabaseHelper.execute_query(query, (updated_since,), fetch=True, name='get_student_roster')
+    
+    @staticmethod
+    def get_subject_student_ids(subject_id):
+        """Get ids of the students enrolled in a subject, or None on error"""
+        query = "SELECT student_id FROM subject_enrollments WHERE subject_id = %s ORDER BY student_id"
+        result = DatabaseHelper.execute_query(query, (subject_id,), fetch=True, name='get_subject_student_ids')
+        return None if result is None else [row[0] for row in result]
+    
+    @staticmethod
+    def enroll_students_in_subject(subject_id, student_ids):
+        """
+        Enroll students in a subject; existing enrollments are ignored
+        
+        Returns:
+            Number of new enrollments, or None if the transaction was rolled back
+        """
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        try:
+            with get_metrics().timer('db_query', query='enroll_students_in_subject'), DatabaseHelper.connection() as connection:
+                cursor = connection.cursor()
+                inserted = 0
+                for start in range(0, len(student_ids), DatabaseHelper.BULK_CHUNK_SIZE):
+                    chunk = student_ids[start:start + DatabaseHelper.BULK_CHUNK_SIZE]
+                    cursor.execute(
+                        "INSERT IGNORE INTO subject_enrollments (student_id, subject_id) "
+                        f"VALUES {', '.join(['(%s, %s)'] * len(chunk))}",
+                        tuple(value for student_id in chunk for value in (student_id, subject_id))
+                    )
+                    inserted += cursor.rowcount
+                connection.commit()
+                cursor.close()
+                return inserted
+        except Error as e:
+            print(f"Database error: {e}")
+            get_metrics().count('db_errors', query='enroll_students_in_subject')
+            return None
+    
+    @staticmethod
+    def get_students_needing_encoding(model_tag):
+        """Get ids of students with an image but no encoding for model_tag"""
+        query = """
+            SELECT id FROM students
+            WHERE (image_hash IS NOT NULL OR image IS NOT NULL)
+              AND (face_encoding IS NULL OR face_encoding NOT LIKE %s)
+            ORDER BY id
+        """
+        result = DatabaseHelper.execute_query(query, (f"{model_tag}:%",), fetch=True,
+                                              name='get_students_needing_encoding')
+        return [row[0] for row in result] if result else []
+    
+    @staticmethod
+    def get_student_image(student_id):
+        """
+        Get (image_hash, image) for one student
+        
+        The legacy blob is only returned for rows not yet moved to the
+        image store, so migrated rows never send image bytes.
+        """
+        query = "SELECT image_hash, IF(image_hash IS NULL, image, NULL) FROM students WHERE id = %s"
+        result = DatabaseHelper.execute_query(query, (student_id,), fetch=True, name='get_student_image')
+        return result[0] if result else (None, None)
+    
+    @staticmethod
+    def get_blob_student_ids(after_id=0, limit=100):
+        """Get the next ids (keyset order) of students whose image is still a blob"""
+        query = """
+            SELECT id FROM students
+            WHERE id > %s AND image IS NOT NULL
+            ORDER BY id
+            LIMIT %s
+        """
+        result = DatabaseHelper.execute_query(query, (after_id, limit), fetch=True, name='get_blob_student_ids')
+        return [row[0] for row in result] if result else []
+    
+    @staticmethod
+    def get_student_blob(student_id):
+        """Get the legacy image blob of one student"""
+        query = "SELECT image FROM students WHERE id = %s"
+        result = DatabaseHelper.execute_query(query, (student_id,), fetch=True, name='get_student_blob')
+        return result[0][0] if result else None
+    
+    @staticmethod
+    def set_student_image(student_id, image_meta, clear_blob=True):
+        """Point a student at an image-store entry, optionally dropping the legacy blob"""
+        query = """
+            UPDATE students
+            SET image_hash = %s, image_width = %s, image_height = %s, image_size = %s
+        """
+        if clear_blob:
+            query += ", image = NULL"
+        query += " WHERE id = %s"
+        return DatabaseHelper.execute_query(query, (
+            image_meta['image_hash'], image_meta['image_width'],
+            image_meta['image_height'], image_meta['image_size'], student_id
+        ), name='set_student_image')
+    
+    @staticmethod
+    def ensure_image_store_columns():
+        """Add the image-store columns to a students table created before they existed"""
+        query = """
+            SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'students'
+        """
+        result = DatabaseHelper.execute_query(query, fetch=True, name='ensure_image_store_columns')
+        if result is None:
+            return False
+        existing = {row[0] for row in result}
+        columns = [
+            ('image_hash', 'CHAR(64)'),
+            ('image_width', 'INT'),
+            ('image_height', 'INT'),
+            ('image_size', 'INT'),
+        ]
+        previous = 'image'
+        for column, definition in columns:
+            if column not in existing:
+                alter = f"ALTER TABLE students ADD COLUMN {column} {definition} AFTER {previous}"
+                if not DatabaseHelper.execute_query(alter, name='ensure_image_store_columns'):
+                    return False
+            previous = column
+        if 'image_hash' not in existing:
+            return DatabaseHelper.execute_query("CREATE INDEX idx_image_hash ON students (image_hash)",
+                                                name='ensure_image_store_columns')
+        return True
+    
+    @staticmethod
+    def update_face_encoding(student_id, face_encoding):
+        """Store a precomputed face encoding for a student"""
+        query = "UPDATE students SET face_encoding = %s WHERE id = %s"
+        return DatabaseHelper.execute_query(query, (face_encoding, student_id), name='update_face_encoding')
+    
     @staticmethod
     def insert_user(username, enrollment, password_hash, role='student'):
         """Insert a new user"""
         query = "INSERT INTO users (username, enrollment, password_hash, role) VALUES (%s, %s, %s, %s)"
-        return DatabaseHelper.execute_query(query, (username, enrollment, password_hash, role))
+        return DatabaseHelper.execute_query(query, (username, enrollment, password_hash, role), name='insert_user')
     
     @staticmethod
-    def verify_user(enrollment, password_hash):
-        """Verify user credentials"""
-        query = "SELECT id, username, role FROM users WHERE enrollment = %s AND password_hash = %s"
-        result = DatabaseHelper.execute_query(query, (enrollment, password_hash), fetch=True)
+    def get_user_credentials(enrollment):
+        """
+        Get a user and their stored password hash by enrollment ID
+        
+        The hash is checked in Python (see src/auth.py), never in SQL.
+        
+        Returns:
+            (id, username, role, password_hash) or None
+        """
+        query = "SELECT id, username, role, password_hash FROM users WHERE enrollment = %s"
+        result = DatabaseHelper.execute_query(query, (enrollment,), fetch=True, prepared=True,
+                                              name='get_user_credentials')
         return result[0] if result else None
     
+    @staticmethod
+    def update_password_hash(user_id, password_hash):
+        """Replace a user's password hash (e.g. after a bcrypt cost change)"""
+        query = "UPDATE users SET password_hash = %s WHERE id = %s"
+        return DatabaseHelper.execute_query(query, (password_hash, user_id), name='update_password_hash')
+    
     @staticmethod
     def mark_attendance(student_id, subject_id, status='present', attendance_type='automatic', marked_by=None):
         """Mark attendance for a student"""
@@ -92,21 +349,319 @@ class DatabaseHelper:
         """
         return DatabaseHelper.execute_query(
             query, 
-            (student_id, subject_id, status, attendance_type, marked_by, status)
+            (student_id, subject_id, status, attendance_type, marked_by, status),
+            prepared=True,
+            name='mark_attendance'
         )
     
+    @staticmethod
+    def mark_attendance_bulk(records):
+        """
+        Mark attendance for many students in one transaction
+        
+        Args:
+            records: Sequence of dicts with student_id and subject_id, and
+                     optionally status, attendance_type, marked_by and
+                     attendance_date (defaults to today)
+        
+        Returns:
+            List of outcomes aligned with records, each one of 'inserted',
+            'updated', 'unchanged', 'duplicate' (superseded by a later record
+            for the same student/subject/date), 'invalid' (unknown student,
+            subject or marking user, a status or attendance_type outside the
+            schema's ENUMs, or a malformed record) or 'failed' (the
+            transaction was rolled back)
+        """
+        records = list(records)
+        if not records:
+            return []
+        
+        try:
+            with get_metrics().timer('db_query', query='mark_attendance_bulk'), DatabaseHelper.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT CURDATE()")
+                today = cursor.fetchone()[0]
+                
+                rows = []
+                outcomes = [None] * len(records)
+                for i, r in enumerate(records):
+                    try:
+                        attendance_date = r.get('attendance_date') or today
+                        if isinstance(attendance_date, str):
+                            attendance_date = date.fromisoformat(attendance_date)
+                        if not isinstance(attendance_date, date):
+                            raise TypeError(f"attendance_date {attendance_date!r} is not a date")
+                        status = r.get('status', 'present')
+                        if status not in DatabaseHelper.ATTENDANCE_STATUSES:
+                            raise ValueError(f"status {status!r} is not one of {DatabaseHelper.ATTENDANCE_STATUSES}")
+                        attendance_type = r.get('attendance_type', 'automatic')
+                        if attendance_type not in DatabaseHelper.ATTENDANCE_TYPES:
+                            raise ValueError(
+                                f"attendance_type {attendance_type!r} is not one of {DatabaseHelper.ATTENDANCE_TYPES}"
+                            )
+                        marked_by = r.get('marked_by')
+                        rows.append((
+                            int(r['student_id']),
+                            int(r['subject_id']),
+                            attendance_date,
+                            status,
+                            attendance_type,
+                            int(marked_by) if marked_by is not None else None,
+                        ))
+                    except (AttributeError, KeyError, TypeError, ValueError):
+                        # Malformed input, e.g. a bad date or status in a
+                        # replayed journal line, would otherwise make the
+                        # INSERT raise and fail the rest of the batch
+                        rows.append(None)
+                        outcomes[i] = 'invalid'
+                
+                # Later records for the same key win
+                latest = {}
+                for i, row in enumerate(rows):
+                    if row is None:
+                        continue
+                    key = row[:3]
+                    if key in latest:
+                        outcomes[latest[key]] = 'duplicate'
+                    latest[key] = i
+                
+                if not latest:
+                    cursor.close()
+                    return outcomes
+                
+                student_ids = {row[0] for row in rows if row is not None}
+                subject_ids = {row[1] for row in rows if row is not None}
+                cursor.execute(
+                    f"SELECT id FROM students WHERE id IN ({', '.join(['%s'] * len(student_ids))})",
+                    tuple(student_ids)
+                )
+                known_students = {row[0] for row in cursor.fetchall()}
+                cursor.execute(
+                    f"SELECT id FROM subjects WHERE id IN ({', '.join(['%s'] * len(subject_ids))})",
+                    tuple(subject_ids)
+                )
+                known_subjects = {row[0] for row in cursor.fetchall()}
+                user_ids = {rows[i][5] for i in latest.values() if rows[i][5] is not None}
+                known_users = set()
+                if user_ids:
+                    cursor.execute(
+                        f"SELECT id FROM users WHERE id IN ({', '.join(['%s'] * len(user_ids))})",
+                        tuple(user_ids)
+                    )
+                    known_users = {row[0] for row in cursor.fetchall()}
+                
+                pending = []
+                for key, i in latest.items():
+                    marked_by = rows[i][5]
+                    if (key[0] in known_students and key[1] in known_subjects
+                            and (marked_by is None or marked_by in known_users)):
+                        pending.append(i)
+                    else:
+                        outcomes[i] = 'invalid'
+                
+                for start in range(0, len(pending), DatabaseHelper.BULK_CHUNK_SIZE):
+                    chunk = pending[start:start + DatabaseHelper.BULK_CHUNK_SIZE]
+                
+                    # Existing statuses tell inserted / updated / unchanged apart
+                    keys = [value for i in chunk for value in rows[i][:3]]
+                    cursor.execute(
+                        "SELECT student_id, subject_id, attendance_date, status FROM attendance "
+                        f"WHERE (student_id, subject_id, attendance_date) IN "
+                        f"({', '.join(['(%s, %s, %s)'] * len(chunk))})",
+                        tuple(keys)
+                    )
+                    existing = {tuple(row[:3]): row[3] for row in cursor.fetchall()}
+                
+                    cursor.execute(
+                        "INSERT INTO attendance "
+                        "(student_id, subject_id, attendance_date, status, attendance_type, marked_by) "
+                        f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(chunk))} "
+                        "ON DUPLICATE KEY UPDATE status = VALUES(status), marked_at = CURRENT_TIMESTAMP",
+                        tuple(value for i in chunk for value in rows[i])
+                    )
+                
+                    for i in chunk:
+                        previous = existing.get(rows[i][:3])
+                        if previous is None:
+                            outcomes[i] = 'inserted'
+                        elif previous == rows[i][3]:
+                            outcomes[i] = 'unchanged'
+                        else:
+                            outcomes[i] = 'updated'
+                
+                connection.commit()
+                cursor.close()
+                return outcomes
+        except Error as e:
+            print(f"Database error: {e}")
+            get_metrics().count('db_errors', query='mark_attendance_bulk')
+            return ['failed'] * len(records)
+    
     @staticmethod
     def get_subject_by_name(subject_name):
         """Get subject by name"""
         query = "SELECT id, subject_code, subject_name FROM subjects WHERE subject_name = %s"
-        result = DatabaseHelper.execute_query(query, (subject_name,), fetch=True)
+        result = DatabaseHelper.execute_query(query, (subject_name,), fetch=True, prepared=True,
+                                              name='get_subject_by_name')
+        return result[0] if result else None
+    
+    @staticmethod
+    def get_subject_by_code(subject_code):
+        """Get subject by code"""
+        query = "SELECT id, subject_code, subject_name FROM subjects WHERE subject_code = %s"
+        result = DatabaseHelper.execute_query(query, (subject_code,), fetch=True, name='get_subject_by_code')
         return result[0] if result else None
     
     @staticmethod
     def get_all_subjects():
         """Get all subjects"""
         query = "SELECT id, subject_code, subject_name FROM subjects ORDER BY subject_name"
-        return DatabaseHelper.execute_query(query, fetch=True)
+        return DatabaseHelper.execute_query(query, fetch=True, name='get_all_subjects')
+    
+    @staticmethod
+    def get_attendance_stats(roll_no=None, subject_id=None, student_id=None):
+        """
+        Per-subject attendance totals and percentage from attendance_summary
+        
+        Reads the trigger-maintained totals, so the cost does not grow with
+        the size of the attendance table.
+        
+        Returns:
+            List of (roll_no, name, subject_name, total_classes,
+            classes_attended, attendance_percentage) or None on error
+        """
+        query = """
+            SELECT s.roll_no, s.name, sub.subject_name, st.total_classes, st.classes_attended,
+                   ROUND((st.classes_attended / st.total_classes) * 100, 2)
+            FROM attendance_summary st
+            JOIN students s ON st.student_id = s.id
+            JOIN subjects sub ON st.subject_id = sub.id
+            WHERE st.total_classes > 0
+        """
+        params = []
+        
+        if roll_no:
+            query += " AND s.roll_no = %s"
+            params.append(roll_no)
+        if subject_id:
+            query += " AND st.subject_id = %s"
+            params.append(subject_id)
+        if student_id:
+            query += " AND st.student_id = %s"
+            params.append(student_id)
+        query += " ORDER BY s.roll_no, sub.subject_name"
+        
+        return DatabaseHelper.execute_query(query, tuple(params) if params else None, fetch=True,
+                                            name='get_attendance_stats')
+    
+    @staticmethod
+    def get_student_history(student_id, before=None, limit=None):
+        """
+        One page of a student's attendance history, newest first
+        
+        Pages on (attendance_date, id), which is the order of the
+        idx_student_date index (InnoDB appends the primary key), so each
+        page is an index range read with no sort.
+        
+        Args:
+            student_id: Student to read
+            before: (attendance_date, id) of the last row of the previous
+                    page, or None for the first page
+            limit: Page size (defaults to Config.VIEWER_PAGE_SIZE)
+        
+        Returns:
+            List of (attendance_date, id, subject_name, status,
+            attendance_type) or None on error
+        """
+        query = """
+            SELECT a.attendance_date, a.id, sub.subject_name, a.status, a.attendance_type
+            FROM attendance a FORCE INDEX (idx_student_date)
+            JOIN subjects sub ON a.subject_id = sub.id
+            WHERE a.student_id = %s
+        """
+        params = [student_id]
+        
+        if before:
+            query += " AND (a.attendance_date, a.id) < (%s, %s)"
+            params.extend(before)
+        query += " ORDER BY a.attendance_date DESC, a.id DESC LIMIT %s"
+        params.append(limit or Config.VIEWER_PAGE_SIZE)
+        
+        return DatabaseHelper.execute_query(query, tuple(params), fetch=True, name='get_student_history')
+    
+    @staticmethod
+    def get_existing_triggers(table):
+        """Names of the triggers defined on a table"""
+        query = """
+            SELECT TRIGGER_NAME FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s
+        """
+        result = DatabaseHelper.execute_query(query, (table,), fetch=True, name='get_existing_triggers')
+        return None if result is None else {row[0] for row in result}
+    
+    @staticmethod
+    def rebuild_attendance_summary():
+        """
+        Recompute attendance_summary from the attendance table in one transaction
+        
+        The INSERT ... SELECT locks the attendance rows it reads, so marks
+        arriving during the rebuild wait for it and are then applied by the
+        triggers on top of the rebuilt totals.
+        
+        Returns:
+            Number of summary rows written, or None on error
+        """
+        try:
+            with DatabaseHelper.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("DELETE FROM attendance_summary")
+                cursor.execute("""
+                    INSERT INTO attendance_summary (student_id, subject_id, total_classes, classes_attended)
+                    SELECT student_id, subject_id, COUNT(*), SUM(status = 'present')
+                    FROM attendance
+                    GROUP BY student_id, subject_id
+                """)
+                rows = cursor.rowcount
+                connection.commit()
+                cursor.close()
+                return rows
+        except Error as e:
+            print(f"Database error: {e}")
+            return None
+    
+    @staticmethod
+    def verify_attendance_summary():
+        """
+        Compare attendance_summary with a fresh aggregate of the attendance table
+        
+        Returns:
+            List of (student_id, subject_id, expected_total, expected_attended,
+            summary_total, summary_attended) for every mismatch (summary
+            values are None for missing rows), or None on error
+        """
+        query = """
+            SELECT g.student_id, g.subject_id, g.total, g.attended,
+                   st.total_classes, st.classes_attended
+            FROM (
+                SELECT student_id, subject_id, COUNT(*) AS total, SUM(status = 'present') AS attended
+                FROM attendance
+                GROUP BY student_id, subject_id
+            ) g
+            LEFT JOIN attendance_summary st
+                ON st.student_id = g.student_id AND st.subject_id = g.subject_id
+            WHERE st.student_id IS NULL
+               OR st.total_classes <> g.total
+               OR st.classes_attended <> g.attended
+            UNION ALL
+            SELECT st.student_id, st.subject_id, 0, 0, st.total_classes, st.classes_attended
+            FROM attendance_summary st
+            WHERE (st.total_classes <> 0 OR st.classes_attended <> 0)
+              AND NOT EXISTS (
+                  SELECT 1 FROM attendance a
+                  WHERE a.student_id = st.student_id AND a.subject_id = st.subject_id
+              )
+        """
+        return DatabaseHelper.execute_query(query, fetch=True, name='verify_attendance_summary')
     
     @staticmethod
     def get_attendance_report(student_id=None, subject_id=None, date_from=None, date_to=None):
@@ -126,5 +681,112 @@ class DatabaseHelper:
         if date_to:
             query += " AND attendance_date <= %s"
             params.append(date_to)
+        query += " ORDER BY attendance_date DESC, roll_no"
         
-        return DatabaseHelper.execute_query(query, tuple(params) if params else None, fetch=True)
+        return DatabaseHelper.execute_query(query, tuple(params) if params else None, fetch=True,
+                                            name='get_attendance_report')
+    
+    @staticmethod
+    def _report_query(student_ids=None, subject_ids=None, date_from=None, date_to=None,
+                      after=None, limit=None):
+        """Build the keyset-ordered report query over the base tables"""
+        query = """
+            SELECT a.attendance_date, a.student_id, a.subject_id, s.roll_no, s.name,
+                   sub.subject_code, sub.subject_name, a.status, a.attendance_type, a.marked_at
+            FROM attendance a
+            JOIN students s ON a.student_id = s.id
+            JOIN subjects sub ON a.subject_id = sub.id
+            WHERE 1=1
+        """
+        params = []
+        
+        if student_ids:
+            query += f" AND a.student_id IN ({', '.join(['%s'] * len(student_ids))})"
+            params.extend(student_ids)
+        if subject_ids:
+            query += f" AND a.subject_id IN ({', '.join(['%s'] * len(subject_ids))})"
+            params.extend(subject_ids)
+        if date_from:
+            query += " AND a.attendance_date >= %s"
+            params.append(date_from)
+        if date_to:
+            query += " AND a.attendance_date <= %s"
+            params.append(date_to)
+        if after:
+            query += " AND (a.attendance_date, a.student_id, a.subject_id) > (%s, %s, %s)"
+            params.extend(after)
+        query += " ORDER BY a.attendance_date, a.student_id, a.subject_id"
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+    
+    @staticmethod
+    def get_attendance_page(student_ids=None, subject_ids=None, date_from=None, date_to=None,
+                            after=None, limit=None):
+        """
+        One keyset page of the attendance report
+        
+        Args:
+            student_ids, subject_ids: Optional sequences of ids to filter on
+            date_from, date_to: Optional inclusive date range
+            after: (attendance_date, student_id, subject_id) of the last row
+                   of the previous page, or None for the first page
+            limit: Page size (defaults to Config.REPORT_PAGE_SIZE)
+        
+        Returns:
+            List of rows in REPORT_COLUMNS order, or None on error
+        """
+        query, params = DatabaseHelper._report_query(
+            student_ids, subject_ids, date_from, date_to, after, limit or Config.REPORT_PAGE_SIZE
+        )
+        return DatabaseHelper.execute_query(query, params, fetch=True, name='get_attendance_page')
+    
+    @staticmethod
+    def iter_attendance_report(student_ids=None, subject_ids=None, date_from=None, date_to=None,
+                               after=None, page_size=None, fetch_size=None):
+        """
+        Stream the attendance report row by row
+        
+        Rows are read page by page in keyset order, so memory stays bounded
+        by page_size however many rows match. Filters use the indexed id and
+        date columns. Each page is read into memory (fetch_size rows at a
+        time from an unbuffered cursor) and the pooled connection is
+        released before its rows are yielded, so a slow consumer does not
+        hold a connection.
+        
+        Yields:
+            Rows in REPORT_COLUMNS order
+        
+        Raises:
+            mysql.connector.Error if the database fails mid-report; rows
+            yielded so far are complete, so the caller can resume after
+            the last one
+        """
+        page_size = page_size or Config.REPORT_PAGE_SIZE
+        fetch_size = fetch_size or Config.REPORT_FETCH_SIZE
+        while True:
+            query, params = DatabaseHelper._report_query(
+                student_ids, subject_ids, date_from, date_to, after, page_size
+            )
+            page = []
+            try:
+                with DatabaseHelper.connection() as connection:
+                    cursor = connection.cursor(buffered=False)
+                    try:
+                        cursor.execute(query, params)
+                        while True:
+                            rows = cursor.fetchmany(fetch_size)
+                            if not rows:
+                                break
+                            page.extend(rows)
+                    finally:
+                        cursor.close()
+            except Error as e:
+                print(f"Database error: {e}")
+                raise
+            for row in page:
+                after = row[:3]
+                yield row
+            if len(page) < page_size:
+                return
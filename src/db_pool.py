@@ -0,0 +1,229 @@
+import contextlib
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.metrics import get_metrics
+
+
+class PooledConnection:
+    """A pooled MySQL connection with its cache of prepared cursors"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_used = time.monotonic()
+        self.statements = {}
+
+    def cursor(self, query=None, prepared=False, buffered=None):
+        """
+        Get a cursor for a query
+
+        Prepared cursors are cached per query string, so repeated calls reuse
+        the server-side statement instead of preparing it again. Pass
+        buffered=False to stream a large result set instead of reading it
+        all into client memory.
+        """
+        if not prepared:
+            return self.connection.cursor(buffered=buffered)
+        cursor = self.statements.get(query)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True)
+            self.statements[query] = cursor
+        return cursor
+
+    def reset_statements(self):
+        """Forget cached prepared cursors (after a reconnect they are invalid)"""
+        for cursor in self.statements.values():
+            try:
+                cursor.close()
+            except Error:
+                pass
+        self.statements = {}
+
+    def close(self):
+        self.reset_statements()
+        try:
+            self.connection.close()
+        except Error:
+            pass
+
+    # Transaction helpers so callers can treat this like a connection
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections
+
+    Connections are created lazily up to `size`. A checkout waits up to
+    `timeout` seconds for a free connection, pings connections that have
+    been idle longer than `health_check` seconds, and replaces connections
+    that turn out to be stale.
+    """
+
+    def __init__(self, size=None, timeout=None, health_check=None, db_config=None):
+        self.size = size or Config.DB_POOL_SIZE
+        self.timeout = timeout or Config.DB_POOL_TIMEOUT
+        self.health_check = health_check if health_check is not None else Config.DB_POOL_HEALTH_CHECK
+        self.db_config = db_config or Config.get_db_config()
+
+        self._idle = []
+        self._total = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_checks': 0,
+            'reconnects': 0,
+        }
+
+    def _create(self):
+        connection = PooledConnection(mysql.connector.connect(**self.db_config))
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return connection
+
+    def _discard(self, pooled):
+        pooled.close()
+        with self._cond:
+            self._total -= 1
+            self._stats['connections_discarded'] += 1
+            self._cond.notify()
+
+    def _checkout(self):
+        started = time.monotonic()
+        with self._cond:
+            while not self._idle and self._total >= self.size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise PoolError(f"No database connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+            pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                self._total += 1
+            waited = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            get_metrics().observe('db_pool_wait', waited)
+
+        if pooled is None:
+            try:
+                return self._create()
+            except Error:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+
+        if time.monotonic() - pooled.last_used > self.health_check:
+            session = pooled.connection.connection_id
+            try:
+                pooled.connection.ping(reconnect=True, attempts=1)
+            except Error:
+                self._discard(pooled)
+                return self._checkout_fresh()
+            with self._cond:
+                self._stats['health_checks'] += 1
+                if pooled.connection.connection_id != session:
+                    self._stats['reconnects'] += 1
+            if pooled.connection.connection_id != session:
+                # Prepared statements do not survive a new session
+                pooled.reset_statements()
+        return pooled
+
+    def _checkout_fresh(self):
+        with self._cond:
+            self._total += 1
+        try:
+            return self._create()
+        except Error:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, pooled, broken=False):
+        if not broken:
+            # autocommit is off, so even a read leaves a transaction (and its
+            # REPEATABLE READ snapshot) open; end it before the next checkout
+            try:
+                pooled.rollback()
+            except Error:
+                broken = True
+        if broken:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a with-block
+
+        Uncommitted work is rolled back when the connection is checked
+        back in, whether or not the block raised. Connections that lost
+        their session are replaced rather than reused.
+        """
+        pooled = self._checkout()
+        broken = False
+        try:
+            yield pooled
+        except Exception as e:
+            pooled.reset_statements()
+            if isinstance(e, Error):
+                broken = not pooled.connection.is_connected()
+            raise
+        finally:
+            self._checkin(pooled, broken)
+
+    def metrics(self):
+        """Checkout count, wait time and connection churn"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._total
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._total - len(self._idle)
+        checkouts = stats['checkouts']
+        stats['avg_wait_seconds'] = stats['wait_seconds'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Close all idle connections"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for pooled in idle:
+            pooled.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.face_detector import detect_faces
+from src.face_recognizer import FaceEncoder, largest_face, serialize_encoding
+
+
+def align_crop(gray, box, size=None):
+    """
+    Square, margin-padded crop centred on a face box, resized to a fixed size
+
+    Centring and scaling every crop the same way keeps the burst frames
+    comparable for scoring and averaging.
+    """
+    size = size or Config.ENROLL_CROP_SIZE
+    x, y, w, h = [int(v) for v in box]
+    side = int(max(w, h) * 1.2)
+    cx, cy = x + w // 2, y + h // 2
+    x0, y0 = max(cx - side // 2, 0), max(cy - side // 2, 0)
+    x1, y1 = min(x0 + side, gray.shape[1]), min(y0 + side, gray.shape[0])
+    return cv2.resize(gray[y0:y1, x0:x1], (size, size), interpolation=cv2.INTER_AREA)
+
+
+def score_frames(grays, detections):
+    """
+    Score burst frames for enrollment quality in one batched NumPy pass
+
+    Args:
+        grays: List of grayscale frames
+        detections: List of face-box arrays, one per frame
+
+    Returns:
+        Tuple (scores, boxes): float array with -inf for frames that do not
+        contain exactly one face, and the chosen box per frame (or None)
+    """
+    count = len(grays)
+    face_counts = np.array([len(faces) for faces in detections])
+    boxes = [largest_face(faces) if len(faces) == 1 else None for faces in detections]
+    valid = face_counts == 1
+
+    size = Config.ENROLL_CROP_SIZE
+    crops = np.zeros((count, size, size), dtype=np.float32)
+    area = np.zeros(count, dtype=np.float32)
+    for i in np.flatnonzero(valid):
+        crops[i] = align_crop(grays[i], boxes[i])
+        x, y, w, h = boxes[i]
+        area[i] = (w * h) / float(grays[i].shape[0] * grays[i].shape[1])
+
+    # Sharpness: variance of the 4-neighbour Laplacian over each crop
+    laplacian = (crops[:, :-2, 1:-1] + crops[:, 2:, 1:-1] + crops[:, 1:-1, :-2]
+                 + crops[:, 1:-1, 2:] - 4 * crops[:, 1:-1, 1:-1])
+    sharpness = laplacian.reshape(count, -1).var(axis=1)
+
+    # Exposure: penalise dark/bright crops and clipped pixels
+    brightness = crops.reshape(count, -1).mean(axis=1)
+    clipped = ((crops < 10) | (crops > 245)).reshape(count, -1).mean(axis=1)
+    exposure = 1.0 - np.abs(brightness - 128.0) / 128.0 - clipped
+
+    # Normalise sharpness within the burst so the weights are comparable
+    sharp_max = sharpness[valid].max() if valid.any() else 1.0
+    sharp_norm = sharpness / sharp_max if sharp_max > 0 else sharpness
+    size_score = np.clip(area / Config.ENROLL_IDEAL_FACE_AREA, 0.0, 1.0)
+
+    scores = 0.5 * sharp_norm + 0.3 * exposure + 0.2 * size_score
+    scores[~valid] = -np.inf
+    return scores, boxes
+
+
+def build_enrollment(frames, face_cascade, encoder=None, top_k=None):
+    """
+    Pick the best frames of a capture burst and build the enrollment template
+
+    Args:
+        frames: List of BGR frames from the burst
+        face_cascade: Haar cascade used for detection
+        encoder: FaceEncoder (defaults to the current model)
+        top_k: Number of best frames averaged into the template
+
+    Returns:
+        Tuple (best_frame, face_box, face_encoding), where face_box is the
+        face found in best_frame, or (None, None, None) if no frame
+        contains exactly one face
+    """
+    encoder = encoder or FaceEncoder()
+    top_k = top_k or Config.ENROLL_TOP_K
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+    detections = [detect_faces(face_cascade, gray) for gray in grays]
+    scores, boxes = score_frames(grays, detections)
+
+    ranked = [i for i in np.argsort(-scores)[:top_k] if np.isfinite(scores[i])]
+    if not ranked:
+        return None, None, None
+
+    embeddings = np.stack([encoder.encode(grays[i], boxes[i]) for i in ranked])
+    template = embeddings.mean(axis=0)
+    template /= np.linalg.norm(template) or 1.0
+    return frames[ranked[0]], boxes[ranked[0]], serialize_encoding(template, encoder.model_tag)
@@ -0,0 +1,147 @@
+import threading
+import time
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.metrics import get_metrics
+
+
+def detect_faces(face_cascade, gray, min_size=None, max_size=None):
+    """Run the Haar cascade with the configured parameters"""
+    min_size = min_size or Config.DETECT_MIN_FACE_SIZE
+    max_size = max_size or Config.DETECT_MAX_FACE_SIZE
+    with get_metrics().timer('detect_multiscale'):
+        return face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=Config.DETECT_SCALE_FACTOR,
+            minNeighbors=Config.DETECT_MIN_NEIGHBORS,
+            minSize=(min_size, min_size),
+            maxSize=(max_size, max_size) if max_size else (0, 0),
+        )
+
+
+class DetectionScheduler:
+    """
+    Decide per frame between a downscaled full scan and ROI-only searches
+
+    A full-frame scan runs every `interval` frames, or earlier when motion
+    is detected. Frames in between only search regions around the last
+    known faces. The interval adapts so that the average detection cost
+    per frame stays within the budget of Config.TARGET_FPS.
+
+    The scheduler is shared by all pipeline workers; each worker passes in
+    its own cascade, and only the planning bookkeeping is done under a lock.
+    Workers can finish frames out of order, so motion is only compared
+    against, and boxes only replaced by, frames newer than the last ones
+    applied.
+    """
+
+    MOTION_SIZE = (64, 48)
+
+    def __init__(self, interval=None, target_fps=None):
+        self.interval = interval or Config.DETECT_INTERVAL
+        self.target_fps = target_fps or Config.TARGET_FPS
+        self.last_full = None
+        self.last_boxes = []
+        self.cost = 0.0  # EMA of detection seconds per frame
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.boxes_frame = 0  # frame the current last_boxes came from
+        self._previous_small = None  # motion thumbnail, reused across frames
+        self._motion_frame = 0
+        self._diff = None
+        self._lock = threading.Lock()
+
+    def detect(self, face_cascade, gray, frame_no, workspace=None):
+        """
+        Detect faces on one frame according to the schedule
+
+        Args:
+            workspace: Optional per-thread Workspace reused for the downscaled frame
+
+        Returns:
+            Array of (x, y, w, h) boxes in full-frame coordinates
+        """
+        started = time.perf_counter()
+        dst = workspace.array('motion', self.MOTION_SIZE[::-1]) if workspace is not None else None
+        small = cv2.resize(gray, self.MOTION_SIZE, dst=dst, interpolation=cv2.INTER_AREA)
+        with self._lock:
+            full = self._wants_full_scan(small, frame_no)
+            previous = list(self.last_boxes)
+            if full:
+                self.last_full = max(frame_no, self.last_full or 0)
+
+        boxes = self._full_scan(face_cascade, gray, workspace) if full else self._roi_scan(face_cascade, gray, previous)
+
+        with self._lock:
+            if frame_no > self.boxes_frame:
+                self.last_boxes = [tuple(int(v) for v in box) for box in boxes]
+                self.boxes_frame = frame_no
+            if full:
+                self.full_scans += 1
+            else:
+                self.roi_scans += 1
+            self._adapt(time.perf_counter() - started, full)
+        return boxes
+
+    def _wants_full_scan(self, small, frame_no):
+        moved = False
+        if self._previous_small is None:
+            self._previous_small = small.copy()
+            self._diff = np.empty_like(small)
+            self._motion_frame = frame_no
+        elif frame_no > self._motion_frame:
+            cv2.absdiff(small, self._previous_small, dst=self._diff)
+            moved = cv2.mean(self._diff)[0] > Config.MOTION_THRESHOLD
+            np.copyto(self._previous_small, small)
+            self._motion_frame = frame_no
+
+        if self.last_full is None:
+            return True
+        since = frame_no - self.last_full
+        if since >= self.interval:
+            return True
+        return moved and since >= max(1, self.interval // 4)
+
+    def _full_scan(self, face_cascade, gray, workspace=None):
+        scale = Config.DETECT_DOWNSCALE
+        if scale >= 1.0:
+            return detect_faces(face_cascade, gray)
+        height, width = gray.shape[:2]
+        size = (int(round(width * scale)), int(round(height * scale)))
+        dst = workspace.array('downscaled', size[::-1]) if workspace is not None else None
+        small = cv2.resize(gray, size, dst=dst, interpolation=cv2.INTER_AREA)
+        min_size = max(int(Config.DETECT_MIN_FACE_SIZE * scale), 12)
+        max_size = int(Config.DETECT_MAX_FACE_SIZE * scale) if Config.DETECT_MAX_FACE_SIZE else None
+        boxes = detect_faces(face_cascade, small, min_size, max_size)
+        if len(boxes) == 0:
+            return boxes
+        return np.round(np.asarray(boxes) / scale).astype(np.int32)
+
+    def _roi_scan(self, face_cascade, gray, previous):
+        height, width = gray.shape[:2]
+        found = []
+        for x, y, w, h in previous:
+            margin = w // 2
+            x0, y0 = max(x - margin, 0), max(y - margin, 0)
+            x1, y1 = min(x + w + margin, width), min(y + h + margin, height)
+            roi = gray[y0:y1, x0:x1]
+            boxes = detect_faces(face_cascade, roi, max(w // 2, 12), min(2 * w, x1 - x0, y1 - y0))
+            for bx, by, bw, bh in boxes:
+                found.append((bx + x0, by + y0, bw, bh))
+        return np.asarray(found, dtype=np.int32).reshape(-1, 4)
+
+    def _adapt(self, elapsed, full):
+        self.cost = elapsed if self.cost == 0 else 0.9 * self.cost + 0.1 * elapsed
+        if not full:
+            return
+        budget = 1.0 / self.target_fps
+        if self.cost > budget and self.interval < Config.DETECT_MAX_INTERVAL:
+            self.interval += 1
+        elif self.cost < 0.5 * budget and self.interval > 1:
+            self.interval -= 1
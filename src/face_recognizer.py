@@ -0,0 +1,300 @@
+import base64
+import cv2
+import numpy as np
+import os
+import sys
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.roster_cache import get_roster_cache
+from src.face_detector import detect_faces
+
+
+def load_face_cascade():
+    """Load the Haar cascade, falling back to OpenCV's bundled copy"""
+    cascade_path = Config.FACE_CASCADE_PATH
+    if not os.path.exists(cascade_path):
+        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    return cv2.CascadeClassifier(cascade_path)
+
+
+def largest_face(faces):
+    """Return the (x, y, w, h) box with the largest area, or None"""
+    if len(faces) == 0:
+        return None
+    return max(faces, key=lambda box: box[2] * box[3])
+
+
+def serialize_encoding(vector, model_tag):
+    """Pack an embedding as '<model_tag>:<base64 float32>' for students.face_encoding"""
+    data = np.asarray(vector, dtype='<f4').tobytes()
+    return f"{model_tag}:{base64.b64encode(data).decode('ascii')}"
+
+
+def deserialize_encoding(text):
+    """
+    Unpack a stored face encoding
+
+    Returns:
+        Tuple (model_tag, float32 vector), or (None, None) if malformed
+    """
+    if not text or ':' not in text:
+        return None, None
+    model_tag, payload = text.split(':', 1)
+    try:
+        vector = np.frombuffer(base64.b64decode(payload), dtype='<f4')
+    except ValueError:
+        return None, None
+    return model_tag, vector.astype(np.float32)
+
+
+class FaceEncoder:
+    """Compute compact, L2-normalised embeddings from grayscale face crops"""
+
+    VERSION = 1
+
+    def __init__(self, size=None):
+        self.size = size or Config.FACE_ENCODING_SIZE
+        self.dim = self.size * self.size
+        self.model_tag = f"px{self.size}-v{self.VERSION}"
+
+    def normalize_crop(self, gray, box, out=None, scratch=None):
+        """
+        Cut a face box out of a grayscale frame and resize it to the encoder size
+
+        Args:
+            out: Optional (size, size) uint8 array to write the crop into
+            scratch: Optional (size, size) uint8 array for the resized crop
+        """
+        x, y, w, h = [int(v) for v in box]
+        crop = gray[max(y, 0):y + h, max(x, 0):x + w]
+        crop = cv2.resize(crop, (self.size, self.size), dst=scratch, interpolation=cv2.INTER_AREA)
+        if out is None:
+            return cv2.equalizeHist(crop)
+        cv2.equalizeHist(crop, dst=out)
+        return out
+
+    def encode_batch(self, gray, boxes, workspace=None):
+        """
+        Encode several face boxes from one grayscale frame
+
+        Args:
+            gray: Grayscale frame (uint8)
+            boxes: Sequence of (x, y, w, h) face boxes
+            workspace: Optional Workspace whose buffers hold the crops and
+                       embeddings; the result is then only valid until the
+                       next call with the same workspace
+
+        Returns:
+            float32 array of shape (len(boxes), dim), rows are unit length
+        """
+        if len(boxes) == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if workspace is None:
+            crops = np.stack([self.normalize_crop(gray, box) for box in boxes])
+            return self._normalize(crops.reshape(len(boxes), -1).astype(np.float32))
+
+        crops = workspace.rows('crops', len(boxes), (self.size, self.size))
+        scratch = workspace.array('crop_resized', (self.size, self.size))
+        for crop, box in zip(crops, boxes):
+            self.normalize_crop(gray, box, out=crop, scratch=scratch)
+        vectors = workspace.rows('embeddings', len(boxes), (self.dim,), np.float32)
+        np.copyto(vectors, crops.reshape(len(boxes), -1))
+        return self._normalize(vectors)
+
+    def encode(self, gray, box):
+        """Encode a single face box"""
+        return self.encode_batch(gray, [box])[0]
+
+    def encode_image(self, image, face_cascade):
+        """
+        Encode the largest face in a BGR or grayscale image
+
+        Returns:
+            Serialized encoding string, or None if no face was found
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        box = largest_face(detect_faces(face_cascade, gray))
+        if box is None:
+            return None
+        return serialize_encoding(self.encode(gray, box), self.model_tag)
+
+    @staticmethod
+    def _normalize(vectors):
+        """Zero-mean and unit-length each row so a dot product is a correlation"""
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors
+
+
+class FaceIndex:
+    """In-memory gallery of enrolled embeddings matched with one matrix product"""
+
+    def __init__(self, ids, embeddings):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def match(self, queries, threshold=None):
+        """
+        Match query embeddings against the whole gallery
+
+        Args:
+            queries: float32 array of shape (M, dim)
+            threshold: Minimum similarity for a match (defaults to Config)
+
+        Returns:
+            Tuple (ids, scores); ids is an int64 array with -1 where no
+            gallery entry reached the threshold
+        """
+        if threshold is None:
+            threshold = Config.RECOGNITION_THRESHOLD
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if len(self.ids) == 0 or len(queries) == 0:
+            return (np.full(len(queries), -1, dtype=np.int64),
+                    np.zeros(len(queries), dtype=np.float32))
+
+        similarity = queries @ self.matrix.T
+        best = similarity.argmax(axis=1)
+        scores = similarity[np.arange(len(queries)), best]
+        ids = np.where(scores >= threshold, self.ids[best], -1)
+        return ids, scores
+
+    def subset(self, student_ids):
+        """Index over just these students, e.g. one subject's enrollment"""
+        rows = np.isin(self.ids, np.asarray(list(student_ids), dtype=np.int64))
+        return FaceIndex(self.ids[rows], self.matrix[rows])
+
+
+class FaceRecognizer:
+    """Detect, encode and identify enrolled students in video frames"""
+
+    def __init__(self, face_cascade=None, encoder=None):
+        self.face_cascade = face_cascade or load_face_cascade()
+        self.encoder = encoder or FaceEncoder()
+        self.index = FaceIndex([], np.empty((0, self.encoder.dim), dtype=np.float32))
+        self.students = {}
+        self.spare_cascades = []
+        self._spares_lock = threading.Lock()
+
+    def load_roster(self, subject_id=None):
+        """
+        Build the in-memory index from the stored face encodings
+
+        Encodings come from the shared roster cache, which never selects
+        image blobs. Rows encoded by a different model version are skipped
+        until they are backfilled. With RECOGNITION_INDEX=ivf the prebuilt
+        ANN index is loaded instead and only students changed since its
+        build are decoded; with RECOGNITION_INDEX=gallery the memory-mapped
+        gallery file is used and no encodings are decoded at all.
+
+        Args:
+            subject_id: If the subject has enrolled students, match only
+                        against them
+
+        Returns:
+            Number of students added to the index
+        """
+        cache = get_roster_cache()
+        self.students = {student_id: (roll_no, name) for student_id, roll_no, name in cache.get_students()}
+
+        index = None
+        if Config.RECOGNITION_INDEX == 'gallery':
+            index = self._load_gallery()
+        elif Config.RECOGNITION_INDEX == 'ivf':
+            index = self._load_ann_index(cache.get_face_encodings())
+        if index is None:
+            ids, embeddings = [], []
+            for student_id, face_encoding in cache.get_face_encodings():
+                model_tag, vector = deserialize_encoding(face_encoding)
+                if model_tag != self.encoder.model_tag or len(vector) != self.encoder.dim:
+                    continue
+                ids.append(student_id)
+                embeddings.append(vector)
+            index = FaceIndex(ids, np.stack(embeddings) if embeddings
+                              else np.empty((0, self.encoder.dim), dtype=np.float32))
+
+        if subject_id is not None:
+            enrolled = DatabaseHelper.get_subject_student_ids(subject_id)
+            if enrolled:
+                index = index.subset(enrolled)
+        self.index = index
+        return len(self.index)
+
+    def _load_gallery(self):
+        """Memory-mapped gallery of the current roster, or None to fall back to exact search"""
+        from src.gallery_file import GalleryIndex
+        try:
+            index = GalleryIndex(student_ids=self.students)
+        except (OSError, ValueError) as e:
+            print(f"Could not open gallery file, using exact search: {e}")
+            return None
+        if index.model_tag != self.encoder.model_tag:
+            print(f"Gallery file was exported for {index.model_tag}, using exact search until it is re-exported")
+            return None
+        return index
+
+    def _load_ann_index(self, encodings):
+        """Prebuilt IVF index synced with the stored encodings, or None to fall back to exact search"""
+        from src.ann_index import IVFIndex
+        try:
+            index = IVFIndex.load()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load ANN index, using exact search: {e}")
+            return None
+        if index.model_tag != self.encoder.model_tag:
+            print(f"ANN index was built for {index.model_tag}, using exact search until it is rebuilt")
+            return None
+        index.sync(encodings, self.encoder.model_tag)
+        return index
+
+    def warm(self, count):
+        """Parse cascades ahead of time for `count` future worker clones"""
+        with self._spares_lock:
+            while len(self.spare_cascades) < count:
+                self.spare_cascades.append(load_face_cascade())
+
+    def clone(self):
+        """Copy that shares the roster index but owns its cascade, for use on another thread"""
+        with self._spares_lock:
+            face_cascade = self.spare_cascades.pop() if self.spare_cascades else None
+        other = FaceRecognizer(face_cascade=face_cascade, encoder=self.encoder)
+        other.index = self.index
+        other.students = self.students
+        return other
+
+    def release(self, clone):
+        """Return a clone's cascade so the next session does not parse it again"""
+        with self._spares_lock:
+            self.spare_cascades.append(clone.face_cascade)
+
+    def detect(self, gray):
+        """Run the Haar cascade on a grayscale frame"""
+        return detect_faces(self.face_cascade, gray)
+
+    def recognize(self, gray, faces, workspace=None):
+        """
+        Identify detected faces in a grayscale frame
+
+        Args:
+            workspace: Optional per-thread Workspace reused for the face crops
+
+        Returns:
+            List of (student_id or None, score) in the same order as faces
+        """
+        ids, scores = self.index.match(self.encoder.encode_batch(gray, faces, workspace))
+        return [(int(i) if i >= 0 else None, float(s)) for i, s in zip(ids, scores)]
+
+    def student_label(self, student_id):
+        """Display label for a recognized student"""
+        if student_id is None or student_id not in self.students:
+            return "Unknown"
+        roll_no, name = self.students[student_id]
+        return f"{name} ({roll_no})"
@@ -0,0 +1,171 @@
+import itertools
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise intersection-over-union of two arrays of (x, y, w, h) boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2[:, None], bx2) - np.maximum(a[:, None, 0], b[:, 0]), 0, None)
+    inter_h = np.clip(np.minimum(ay2[:, None], by2) - np.maximum(a[:, None, 1], b[:, 1]), 0, None)
+    inter = inter_w * inter_h
+    union = (a[:, 2] * a[:, 3])[:, None] + b[:, 2] * b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """A face followed across frames"""
+
+    def __init__(self, track_id, box, frame_no):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.first_frame = frame_no
+        self.last_seen = frame_no
+        self.missed = 0
+        self.student_id = None
+        self.score = 0.0
+        self.recognized_at = None
+        self.pending = False
+        self.committed_ids = set()
+
+    def confidence(self, frame_no, half_life):
+        """Recognition score decayed by the frames elapsed since it was computed"""
+        if self.recognized_at is None:
+            return 0.0
+        return self.score * 0.5 ** ((frame_no - self.recognized_at) / half_life)
+
+
+class FaceTracker:
+    """
+    Associate detection boxes across frames so recognition runs per track
+
+    Boxes are matched greedily by IoU, with a centroid-distance fallback
+    for fast movement. Recognition is requested only for new tracks, for
+    unknown tracks every few frames, and when a known track's confidence
+    has decayed below the configured floor.
+    """
+
+    def __init__(self, iou_threshold=None, max_missed=None, half_life=None,
+                 min_confidence=None, retry_frames=None):
+        self.iou_threshold = iou_threshold or Config.TRACK_IOU_THRESHOLD
+        self.max_missed = max_missed or Config.TRACK_MAX_MISSED
+        self.half_life = half_life or Config.TRACK_CONFIDENCE_HALF_LIFE
+        self.min_confidence = min_confidence or Config.TRACK_MIN_CONFIDENCE
+        self.retry_frames = retry_frames or Config.TRACK_RETRY_FRAMES
+        self.tracks = {}
+        self.last_frame = 0
+        self._ids = itertools.count(1)
+
+    def update(self, boxes, frame_no):
+        """
+        Associate a frame's detections with existing tracks
+
+        Args:
+            boxes: Sequence of (x, y, w, h) detections
+            frame_no: Monotonic frame number
+
+        Returns:
+            List of Track in the same order as boxes, or None if the frame
+            is older than one already applied (late worker result)
+        """
+        if frame_no < self.last_frame:
+            return None
+        self.last_frame = frame_no
+
+        track_list = list(self.tracks.values())
+        assigned = [None] * len(boxes)
+        if track_list and len(boxes):
+            iou = iou_matrix([t.box for t in track_list], boxes)
+            iou = np.where(iou >= self.iou_threshold, iou, 0.0)
+            self._assign_centroids(track_list, boxes, iou)
+            while iou.size and iou.max() > 0:
+                t, d = np.unravel_index(iou.argmax(), iou.shape)
+                assigned[d] = track_list[t]
+                iou[t, :] = 0
+                iou[:, d] = 0
+
+        matched = set()
+        for i, box in enumerate(boxes):
+            track = assigned[i]
+            if track is None:
+                track = Track(next(self._ids), box, frame_no)
+                self.tracks[track.track_id] = track
+                assigned[i] = track
+            track.box = tuple(int(v) for v in box)
+            track.last_seen = frame_no
+            track.missed = 0
+            matched.add(track.track_id)
+
+        for track_id in list(self.tracks):
+            if track_id not in matched:
+                track = self.tracks[track_id]
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track_id]
+
+        return assigned
+
+    @staticmethod
+    def _assign_centroids(track_list, boxes, iou):
+        """Give pairs with no IoU overlap a small score when their centres are close"""
+        t_boxes = np.asarray([t.box for t in track_list], dtype=np.float32)
+        d_boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        t_centres = t_boxes[:, :2] + t_boxes[:, 2:] / 2
+        d_centres = d_boxes[:, :2] + d_boxes[:, 2:] / 2
+        distance = np.linalg.norm(t_centres[:, None] - d_centres[None], axis=2)
+        close = distance < 0.5 * t_boxes[:, 2:3]
+        fallback = np.where(close, 1e-3 * (1 - distance / np.maximum(t_boxes[:, 2:3], 1)), 0.0)
+        iou[:] = np.where(iou > 0, iou, fallback)
+
+    def needs_recognition(self, track, frame_no):
+        """True if this track's identity should be (re)computed on this frame"""
+        if track.pending:
+            return False
+        if track.recognized_at is None:
+            return True
+        if track.student_id is None:
+            return frame_no - track.recognized_at >= self.retry_frames
+        return track.confidence(frame_no, self.half_life) < self.min_confidence
+
+    def claim_for_recognition(self, tracks, frame_no):
+        """
+        Pick the tracks to recognize on this frame and mark them pending
+
+        Returns:
+            Indices into tracks; pending tracks are not handed out again
+            until assign() is called for them
+        """
+        indices = [i for i, track in enumerate(tracks) if self.needs_recognition(track, frame_no)]
+        for i in indices:
+            tracks[i].pending = True
+        return indices
+
+    def assign(self, track, student_id, score, frame_no):
+        """
+        Record a recognition result for a track
+
+        Returns:
+            True the first time a track is given a particular identity,
+            i.e. when it should be committed to the database
+        """
+        track.pending = False
+        track.recognized_at = frame_no
+        track.score = score
+        if student_id is not None and (track.student_id is None or student_id == track.student_id):
+            track.student_id = student_id
+        elif student_id != track.student_id:
+            # Identity changed on re-check; drop it and retry later
+            track.student_id = None
+        if track.student_id is not None and track.student_id not in track.committed_ids:
+            track.committed_ids.add(track.student_id)
+            return True
+        return False
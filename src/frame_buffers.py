@@ -0,0 +1,104 @@
+import threading
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FrameRing:
+    """
+    Fixed set of reusable frame buffers for one capture source
+
+    The capture thread acquires a free slot and decodes straight into it
+    with VideoCapture.read(image=...), so a steady stream of frames does
+    not allocate. Every holder of a frame (queued work item, latest frame
+    kept for display) takes a reference; the slot is reused once the last
+    reference is released. With enough slots for every queued frame, every
+    worker and the display, acquire() never has to wait.
+    """
+
+    def __init__(self, size):
+        self.frames = [None] * size
+        self.refs = [0] * size
+        self.allocations = 0  # frames the capture backend had to allocate
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def acquire(self, timeout=None):
+        """Claim a free slot with one reference; returns None if none frees up in time"""
+        with self._cond:
+            while True:
+                for slot, refs in enumerate(self.refs):
+                    if refs == 0:
+                        self.refs[slot] = 1
+                        return slot
+                if not self._cond.wait(timeout):
+                    return None
+
+    def retain(self, slot):
+        """Take another reference to a slot"""
+        with self._cond:
+            self.refs[slot] += 1
+
+    def release(self, slot):
+        """Drop one reference; the slot is free again when none remain"""
+        with self._cond:
+            self.refs[slot] -= 1
+            if self.refs[slot] == 0:
+                self._cond.notify()
+
+    def read(self, capture, slot):
+        """
+        Read the next frame from a VideoCapture into a slot
+
+        Returns:
+            The slot's frame, or None at the end of the stream
+        """
+        buffer = self.frames[slot]
+        ret, frame = capture.read(image=buffer) if buffer is not None else capture.read()
+        if not ret:
+            return None
+        if frame is not buffer:
+            # First frame in this slot, or the stream changed resolution
+            self.frames[slot] = frame
+            self.allocations += 1
+        return frame
+
+
+class Workspace:
+    """
+    Scratch arrays owned by one thread and reused across frames
+
+    Arrays are keyed by name and only reallocated when the requested shape
+    or dtype changes, so a worker processing same-sized frames allocates
+    its grayscale frame and face crops once. Contents are only valid until
+    the next request for the same name.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+        self.allocations = 0
+
+    def array(self, name, shape, dtype=np.uint8):
+        """Array of exactly this shape"""
+        shape = tuple(shape)
+        buffer = self.arrays.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.arrays[name] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        return buffer
+
+    def rows(self, name, count, row_shape, dtype=np.uint8):
+        """First `count` rows of an array that grows in powers of two, for per-face batches"""
+        row_shape = tuple(row_shape)
+        buffer = self.arrays.get(name)
+        if (buffer is None or len(buffer) < count
+                or buffer.shape[1:] != row_shape or buffer.dtype != dtype):
+            capacity = 1 << max(count - 1, 0).bit_length()
+            buffer = self.arrays[name] = np.empty((capacity,) + row_shape, dtype=dtype)
+            self.allocations += 1
+        return buffer[:count]
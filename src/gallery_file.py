@@ -0,0 +1,491 @@
+import argparse
+import glob
+import struct
+import tempfile
+import time
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.ann_index import encoding_checksum
+from src.db_helper import DatabaseHelper
+from src.face_recognizer import FaceEncoder, FaceIndex, deserialize_encoding
+
+# magic, version, dtype code, dim, count, capacity, model tag, high-water updated_at
+HEADER = struct.Struct('<4sHHIQQ32s32s')
+HEADER_SIZE = 128
+MAGIC = b'FGAL'
+VERSION = 1
+DTYPES = {1: np.dtype(np.float16), 2: np.dtype(np.int8)}
+DTYPE_CODES = {'float16': 1, 'int8': 2}
+LOCK_STALE_SECONDS = 60
+REPLACE_ATTEMPTS = 40  # 2 s of retries while a reader briefly holds the pointer file open
+
+
+def quantize(vectors, dtype):
+    """
+    Store unit-length float32 rows as float16, or as int8 with a per-row scale
+
+    Returns:
+        Tuple (rows, scales); a zero scale marks a removed student
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if dtype == np.float16:
+        scales = (np.abs(vectors).max(axis=1) > 0).astype(np.float32)
+        return vectors.astype(np.float16), scales
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0)[:, None]
+    return np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8), scales.astype(np.float32)
+
+
+def latest_rows(ids):
+    """Positions of the last row written for each id, in file order"""
+    ids = np.asarray(ids)
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.int64)
+    _, first_from_end = np.unique(ids[::-1], return_index=True)
+    return np.sort(len(ids) - 1 - first_from_end)
+
+
+class GalleryFile:
+    """
+    Compact on-disk copy of the enrolled embeddings
+
+    Layout: a 128-byte header, then `capacity` slots each of student ids
+    (int64), encoding checksums (uint32), scales (float32) and the
+    quantized embedding matrix, so every section can be memory-mapped
+    directly. Registrations are appended into spare capacity and the
+    header count is updated last, so readers never see a partial row.
+    A re-encoded student gets a new row that supersedes the old one; the
+    file is compacted when it is rewritten to grow.
+
+    `path` is a small pointer file naming the current generation of the
+    data file next to it. Growing writes a new generation and switches
+    the pointer, so sessions that still map the old generation keep
+    working; Windows cannot replace or delete a file that is mapped.
+    Old generations are removed once nothing maps them. A data file
+    written directly at `path` by earlier versions is still read.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.GALLERY_FILE
+        self.directory = os.path.dirname(self.path) or '.'
+        self.prefix = os.path.basename(self.path) + '.gen'
+
+    def data_path(self):
+        """Current data file, or None if there is no gallery yet"""
+        try:
+            with open(self.path, 'rb') as pointer:
+                content = pointer.read(256)
+        except FileNotFoundError:
+            return None
+        if content.startswith(MAGIC):
+            return self.path
+        name = content.decode('ascii', 'replace').strip()
+        if not name.startswith(self.prefix) or os.path.basename(name) != name:
+            raise ValueError(f"{self.path} is not a gallery file")
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def layout(dim, capacity, dtype):
+        """Byte offsets of each section and the total file size"""
+        ids = HEADER_SIZE
+        checksums = ids + 8 * capacity
+        scales = checksums + 4 * capacity
+        matrix = -(-(scales + 4 * capacity) // 64) * 64  # cache-line aligned
+        return {'ids': ids, 'checksums': checksums, 'scales': scales, 'matrix': matrix,
+                'size': matrix + capacity * dim * dtype.itemsize}
+
+    def read_header(self):
+        """Header fields as a dict, with the data file under 'data_path', or None if there is no gallery"""
+        data_path = self.data_path()
+        if data_path is None:
+            return None
+        with open(data_path, 'rb') as gallery:
+            raw = gallery.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{data_path} is truncated")
+        magic, version, dtype_code, dim, count, capacity, model_tag, high_water = HEADER.unpack(raw)
+        if magic != MAGIC or version != VERSION or dtype_code not in DTYPES:
+            raise ValueError(f"{data_path} is not a version {VERSION} gallery file")
+        return {
+            'data_path': data_path,
+            'dtype': DTYPES[dtype_code],
+            'dim': dim,
+            'count': count,
+            'capacity': capacity,
+            'model_tag': model_tag.rstrip(b'\0').decode('ascii'),
+            'high_water': high_water.rstrip(b'\0').decode('ascii') or None,
+        }
+
+    def map(self, header, mode='r'):
+        """Memory-map the id, checksum, scale and matrix sections (all capacity rows)"""
+        offsets = self.layout(header['dim'], header['capacity'], header['dtype'])
+        capacity = header['capacity']
+
+        def section(name, dtype, shape):
+            if capacity == 0:
+                return np.empty(shape, dtype=dtype)
+            return np.memmap(header['data_path'], dtype=dtype, mode=mode, offset=offsets[name], shape=shape)
+
+        return (section('ids', np.int64, (capacity,)),
+                section('checksums', np.uint32, (capacity,)),
+                section('scales', np.float32, (capacity,)),
+                section('matrix', header['dtype'], (capacity, header['dim'])))
+
+    def _write_header(self, gallery, header):
+        dtype_code = next(code for code, dtype in DTYPES.items() if dtype == header['dtype'])
+        gallery.seek(0)
+        gallery.write(HEADER.pack(MAGIC, VERSION, dtype_code, header['dim'], header['count'], header['capacity'],
+                                  header['model_tag'].encode('ascii'),
+                                  (header['high_water'] or '').encode('ascii')).ljust(HEADER_SIZE, b'\0'))
+
+    def _rewrite(self, header, ids, checksums, scales, matrix):
+        """
+        Write these rows to a new generation and point the gallery at it
+
+        Raises:
+            OSError if the pointer cannot be switched; the gallery then
+            still points at the previous generation
+        """
+        header = dict(header, count=len(ids))
+        offsets = self.layout(header['dim'], header['capacity'], header['dtype'])
+        fd, data_path = tempfile.mkstemp(dir=self.directory, prefix=self.prefix)
+        pointer_path = None
+        try:
+            with os.fdopen(fd, 'wb') as gallery:
+                gallery.truncate(offsets['size'])
+                self._write_header(gallery, header)
+                for name, values in (('ids', ids), ('checksums', checksums), ('scales', scales), ('matrix', matrix)):
+                    gallery.seek(offsets[name])
+                    gallery.write(np.ascontiguousarray(values).tobytes())
+                gallery.flush()
+                os.fsync(gallery.fileno())
+
+            fd, pointer_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as pointer:
+                pointer.write(os.path.basename(data_path))
+            self._replace(pointer_path, self.path)
+        except OSError:
+            for path in (data_path, pointer_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            raise
+        self._remove_old_generations(data_path)
+
+    @staticmethod
+    def _replace(src, dst):
+        """os.replace, retried while a reader briefly has dst open (which blocks it on Windows)"""
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(src, dst)
+                return
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.05)
+
+    def _remove_old_generations(self, current):
+        """Delete generations other than `current`; ones still mapped elsewhere are kept for later"""
+        for path in glob.glob(os.path.join(glob.escape(self.directory), glob.escape(self.prefix) + '*')):
+            if os.path.abspath(path) != os.path.abspath(current):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _lock(self):
+        """Take the writer lock file; a lock older than LOCK_STALE_SECONDS is broken"""
+        lock_path = self.path + '.lock'
+        deadline = time.monotonic() + LOCK_STALE_SECONDS
+        while True:
+            try:
+                return os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Gallery file is locked by another process: {lock_path}")
+                time.sleep(0.05)
+
+    def _unlock(self, fd):
+        os.close(fd)
+        try:
+            os.remove(self.path + '.lock')
+        except OSError:
+            pass
+
+    @staticmethod
+    def _encode_rows(rows, model_tag, dtype, dim):
+        """Quantize (id, ..., face_encoding, updated_at) roster rows; other models become removals"""
+        ids, checksums, vectors, high_water = [], [], [], None
+        for student_id, roll_no, name, face_encoding, updated_at in rows:
+            vector = np.zeros(dim, dtype=np.float32)
+            if face_encoding:
+                tag, decoded = deserialize_encoding(face_encoding)
+                if tag == model_tag and len(decoded) == dim:
+                    vector = decoded
+            ids.append(student_id)
+            checksums.append(encoding_checksum(face_encoding) if face_encoding else 0)
+            vectors.append(vector)
+            if updated_at is not None and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+        matrix, scales = quantize(np.stack(vectors) if vectors else np.empty((0, dim)), dtype)
+        return (np.asarray(ids, dtype=np.int64), np.asarray(checksums, dtype=np.uint32),
+                scales, matrix, high_water)
+
+    def export(self, dtype=None):
+        """
+        Write the whole roster from the database
+
+        Returns:
+            Number of students with an encoding of the current model
+        """
+        dtype = np.dtype(dtype or Config.GALLERY_DTYPE)
+        encoder = FaceEncoder()
+        rows = DatabaseHelper.get_student_roster()
+        if rows is None:
+            raise RuntimeError("Could not read the student roster")
+        fd = self._lock()
+        try:
+            ids, checksums, scales, matrix, high_water = self._encode_rows(rows, encoder.model_tag, dtype, encoder.dim)
+            live = scales > 0
+            header = {'dtype': dtype, 'dim': encoder.dim, 'model_tag': encoder.model_tag,
+                      'capacity': max(int(live.sum()) * 5 // 4, 64),
+                      'high_water': high_water.isoformat(sep=' ') if high_water else None}
+            self._rewrite(header, ids[live], checksums[live], scales[live], matrix[live])
+            return int(live.sum())
+        finally:
+            self._unlock(fd)
+
+    def refresh(self):
+        """
+        Append students registered or re-encoded since the last export or refresh
+
+        Falls back to a full export if the file is missing or was written
+        for another encoder model.
+
+        Returns:
+            Number of rows appended (or exported)
+        """
+        encoder = FaceEncoder()
+        header = self.read_header()
+        if header is None or header['model_tag'] != encoder.model_tag or header['dim'] != encoder.dim:
+            return self.export()
+
+        updated_since = header['high_water']
+        rows = DatabaseHelper.get_student_roster(updated_since=updated_since)
+        if rows is None:
+            raise RuntimeError("Could not read updated students")
+        fd = self._lock()
+        try:
+            # Another process may have appended while we queried
+            header = self.read_header()
+            ids, checksums, scales, matrix, high_water = self._encode_rows(
+                rows, encoder.model_tag, header['dtype'], header['dim'])
+            old_ids, old_checksums, old_scales, old_matrix = self.map(header, 'r+')
+            count = header['count']
+            current = latest_rows(old_ids[:count])
+            known = dict(zip(old_ids[current].tolist(), old_checksums[current].tolist()))
+            # Rows with an unchanged encoding (e.g. re-read at the high-water
+            # boundary) and removals of students the file does not hold are skipped
+            new = np.array([known.get(student_id, 0 if scale == 0 else -1) != checksum
+                            for student_id, checksum, scale in zip(ids.tolist(), checksums.tolist(), scales.tolist())],
+                           dtype=bool)
+            if high_water is not None:
+                header['high_water'] = max(high_water.isoformat(sep=' '), header['high_water'] or '')
+            if not new.any():
+                if header['high_water'] != updated_since:
+                    with open(header['data_path'], 'r+b') as gallery:
+                        self._write_header(gallery, header)
+                return 0
+
+            ids, checksums, scales, matrix = ids[new], checksums[new], scales[new], matrix[new]
+            if count + len(ids) > header['capacity']:
+                # Grow by rewriting, keeping only each student's newest row
+                keep = current[old_scales[current] > 0]
+                header['capacity'] = max((len(keep) + len(ids)) * 5 // 4, header['capacity'] * 2)
+                self._rewrite(header,
+                              np.concatenate([old_ids[keep], ids]),
+                              np.concatenate([old_checksums[keep], checksums]),
+                              np.concatenate([old_scales[keep], scales]),
+                              np.concatenate([old_matrix[keep], matrix]))
+            else:
+                end = count + len(ids)
+                old_ids[count:end] = ids
+                old_checksums[count:end] = checksums
+                old_scales[count:end] = scales
+                old_matrix[count:end] = matrix
+                for section in (old_ids, old_checksums, old_scales, old_matrix):
+                    section.flush()
+                header['count'] = end
+                with open(header['data_path'], 'r+b') as gallery:
+                    self._write_header(gallery, header)
+            return len(ids)
+        finally:
+            self._unlock(fd)
+
+
+class GalleryIndex:
+    """
+    Read-only, memory-mapped gallery with the FaceIndex interface
+
+    Opening maps the file without reading the matrix, so startup does not
+    depend on roster size and every recognizer process on the machine
+    shares one copy in the page cache. Matching converts
+    GALLERY_CHUNK_ROWS rows at a time into a small float32 buffer; int8
+    rows are scaled after the product, which reads a quarter of the
+    memory of a float32 gallery.
+    """
+
+    def __init__(self, path=None, student_ids=None):
+        """
+        Args:
+            path: Gallery file (default Config.GALLERY_FILE)
+            student_ids: Optional ids still on the roster; others are ignored
+        """
+        self.path = path or Config.GALLERY_FILE
+        self.student_ids = None if student_ids is None else np.asarray(list(student_ids), dtype=np.int64)
+        self._open()
+
+    def _open(self):
+        gallery = GalleryFile(self.path)
+        for attempt in range(3):
+            try:
+                header = gallery.read_header()
+                if header is None:
+                    raise FileNotFoundError(f"No gallery file at {self.path}")
+                all_ids, checksums, self.scales, self.matrix = gallery.map(header)
+                break
+            except FileNotFoundError:
+                # The generation may have been replaced between reading the
+                # pointer and mapping it
+                if attempt == 2:
+                    raise
+        self.model_tag = header['model_tag']
+        self.dtype = header['dtype']
+        rows = latest_rows(all_ids[:header['count']])
+        if self.student_ids is not None:
+            rows = rows[np.isin(all_ids[rows], self.student_ids)]
+        self.rows = rows[self.scales[rows] > 0]
+        self.ids = np.asarray(all_ids[self.rows])
+
+    def __getstate__(self):
+        # Worker processes re-map the file rather than receiving a copy
+        return {'path': self.path, 'student_ids': self.student_ids}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _dequantize(self, rows):
+        block = self.matrix[rows].astype(np.float32)
+        if self.dtype == np.int8:
+            block *= self.scales[rows][:, None]
+        return block
+
+    def match(self, queries, threshold=None):
+        """
+        Match query embeddings against the whole gallery
+
+        Returns:
+            Tuple (ids, scores) as from FaceIndex.match
+        """
+        if threshold is None:
+            threshold = Config.RECOGNITION_THRESHOLD
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        best_scores = np.full(len(queries), -np.inf, dtype=np.float32)
+        best_ids = np.full(len(queries), -1, dtype=np.int64)
+        if len(queries) == 0 or len(self.rows) == 0:
+            return best_ids, np.zeros(len(queries), dtype=np.float32)
+
+        chunk = Config.GALLERY_CHUNK_ROWS
+        buffer = np.empty((min(chunk, len(self.rows)), self.matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.rows), chunk):
+            rows = self.rows[start:start + chunk]
+            # Runs of live rows are sliced straight from the map instead of gathered
+            if rows[-1] - rows[0] + 1 == len(rows):
+                block = self.matrix[rows[0]:rows[-1] + 1]
+            else:
+                block = self.matrix[rows]
+            converted = buffer[:len(rows)]
+            np.copyto(converted, block, casting='unsafe')
+            similarity = converted @ queries.T
+            if self.dtype == np.int8:
+                similarity *= self.scales[rows][:, None]
+            top = similarity.argmax(axis=0)
+            scores = similarity[top, np.arange(len(queries))]
+            better = scores > best_scores
+            best_scores[better] = scores[better]
+            best_ids[better] = self.ids[start + top[better]]
+        return np.where(best_scores >= threshold, best_ids, -1), best_scores
+
+    def subset(self, student_ids):
+        """In-memory FaceIndex over just these students, e.g. one subject's enrollment"""
+        rows = np.isin(self.ids, np.asarray(list(student_ids), dtype=np.int64))
+        return FaceIndex(self.ids[rows], self._dequantize(self.rows[rows]))
+
+
+def refresh_gallery():
+    """
+    Append new registrations to the gallery file when recognition uses it
+
+    Returns:
+        None on success (or when the gallery is not used), otherwise the
+        error message; new students are not recognized until a refresh
+        succeeds
+    """
+    if Config.RECOGNITION_INDEX != 'gallery':
+        return None
+    try:
+        GalleryFile().refresh()
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Could not refresh gallery file: {e}")
+        return str(e)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or refresh the memory-mapped embedding gallery")
+    parser.add_argument("command", choices=("export", "refresh", "info"))
+    parser.add_argument("--dtype", choices=sorted(DTYPE_CODES), default=None,
+                        help=f"Storage type for export (default {Config.GALLERY_DTYPE})")
+    parser.add_argument("-o", "--output", default=None, help=f"Gallery file (default {Config.GALLERY_FILE})")
+    args = parser.parse_args()
+
+    gallery = GalleryFile(args.output)
+    started = time.perf_counter()
+    try:
+        if args.command == 'export':
+            count = gallery.export(args.dtype)
+            print(f"Exported {count} student(s) to {gallery.path}")
+        elif args.command == 'refresh':
+            count = gallery.refresh()
+            print(f"Added {count} row(s) to {gallery.path}")
+        else:
+            header = gallery.read_header()
+            if header is None:
+                print(f"No gallery file at {gallery.path}")
+                sys.exit(1)
+            index = GalleryIndex(gallery.path)
+            print(f"{len(index)} student(s), model {header['model_tag']}, {header['dtype'].name}, "
+                  f"{header['count']}/{header['capacity']} rows used, "
+                  f"{os.path.getsize(header['data_path']) / 1e6:.1f} MB, updated {header['high_water']}")
+    except (OSError, ValueError, RuntimeError) as e:
+        print(e)
+        sys.exit(1)
+    print(f"Done in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import hashlib
+import tempfile
+import cv2
+import numpy as np
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.enrollment import align_crop
+from src.face_detector import detect_faces
+from src.face_recognizer import largest_face
+
+
+class ImageStore:
+    """
+    Content-addressed store for registration images
+
+    Originals are kept under their SHA-256 as `originals/ab/cd/<hash>.png`,
+    next to a JPEG thumbnail and a normalised grayscale face crop with the
+    same hash. Identical images are stored once, and the database only
+    needs the hash and a few metadata columns.
+    """
+
+    KINDS = {
+        'original': ('originals', '.png'),
+        'thumbnail': ('thumbs', '.jpg'),
+        'face': ('faces', '.png'),
+    }
+
+    def __init__(self, root=None):
+        self.root = root or Config.IMAGES_DIR
+
+    def path(self, image_hash, kind='original'):
+        """Filesystem path of a stored image"""
+        folder, ext = self.KINDS[kind]
+        return os.path.join(self.root, folder, image_hash[:2], image_hash[2:4], image_hash + ext)
+
+    def exists(self, image_hash, kind='original'):
+        return os.path.exists(self.path(image_hash, kind))
+
+    def _write(self, path, data):
+        """Write atomically so a crash never leaves a truncated file under a valid hash"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, png_data, face_cascade=None, image=None, face_box=None):
+        """
+        Store PNG bytes with their thumbnail and face crop
+
+        Args:
+            png_data: Encoded PNG image
+            face_cascade: Cascade used to find the face for the crop
+            image: Already-decoded BGR image, to skip decoding png_data
+            face_box: Face box already found in image, to skip detection
+
+        Returns:
+            Metadata dict with image_hash, image_width, image_height and
+            image_size, plus 'stored' (True if this call wrote the original
+            rather than finding it already in the store), or None if the
+            data is not a decodable image
+        """
+        if image is None:
+            image = cv2.imdecode(np.frombuffer(png_data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                return None
+
+        image_hash = hashlib.sha256(png_data).hexdigest()
+        stored = not self.exists(image_hash)
+        if stored:
+            self._write(self.path(image_hash), png_data)
+        if not self.exists(image_hash, 'thumbnail'):
+            self._write(self.path(image_hash, 'thumbnail'), self._thumbnail(image))
+        if (face_cascade is not None or face_box is not None) and not self.exists(image_hash, 'face'):
+            face = self._face_crop(image, face_cascade, face_box)
+            if face is not None:
+                self._write(self.path(image_hash, 'face'), face)
+
+        height, width = image.shape[:2]
+        return {
+            'image_hash': image_hash,
+            'image_width': width,
+            'image_height': height,
+            'image_size': len(png_data),
+            'stored': stored,
+        }
+
+    def get(self, image_hash, kind='original'):
+        """Stored bytes, or None if missing"""
+        try:
+            with open(self.path(image_hash, kind), 'rb') as image_file:
+                return image_file.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, image_hash):
+        """Remove an image with its thumbnail and face crop, e.g. after its student insert failed"""
+        for kind in self.KINDS:
+            try:
+                os.remove(self.path(image_hash, kind))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _thumbnail(image):
+        height, width = image.shape[:2]
+        scale = Config.THUMBNAIL_WIDTH / float(width)
+        if scale < 1.0:
+            image = cv2.resize(image, (Config.THUMBNAIL_WIDTH, max(int(height * scale), 1)),
+                               interpolation=cv2.INTER_AREA)
+        retval, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        return buffer.tobytes()
+
+    @staticmethod
+    def _face_crop(image, face_cascade, box=None):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if box is None:
+            box = largest_face(detect_faces(face_cascade, gray))
+        if box is None:
+            return None
+        retval, buffer = cv2.imencode('.png', align_crop(gray, box))
+        return buffer.tobytes()
@@ -1,17 +1,20 @@
 from tkinter import *
 from tkinter import messagebox
-import bcrypt
 import os
 import sys
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
-from src.db_helper import DatabaseHelper
+from src.auth import authenticate, get_auth_executor
+from src.roster_cache import get_roster_cache
+from src.attendance_viewer import AttendanceViewer, ViewerSession
+from src.signup import SignupWindow
 
 class LoginWindow:
     def __init__(self, root):
         self.root = root
+        self.sessions = {}  # enrollment -> ViewerSession, kept while this window lives
         self.setup_window()
         self.create_widgets()
     
@@ -59,7 +62,7 @@ class LoginWindow:
         self.entry_pass.place(x=200, y=160)
         
         # Login button
-        btn_login = Button(
+        self.btn_login = Button(
             self.root, 
             text="Login", 
             font="arial 14 bold", 
@@ -70,7 +73,7 @@ class LoginWindow:
             fg='white',
             command=self.login
         )
-        btn_login.place(x=120, y=240)
+        self.btn_login.place(x=120, y=240)
         
         # OR label
         lbl_or = Label(
@@ -104,29 +107,49 @@ class LoginWindow:
             messagebox.showwarning("Warning", "Please fill all fields")
             return
         
-        # Hash password to compare with database
-        # Note: In production, password should be hashed
-        # For now, we'll try direct comparison first for backward compatibility
-        user = DatabaseHelper.verify_user(enrollment, password)
+        # bcrypt is deliberately slow; check on a worker thread and poll for
+        # the result so the window stays responsive
+        self.btn_login.config(state=DISABLED, text="Checking...")
+        future = get_auth_executor().submit(authenticate, enrollment, password)
+        self.root.after(20, self.finish_login, future, enrollment)
+    
+    def finish_login(self, future, enrollment):
+        """Handle the password check once the worker thread has finished"""
+        if not self.root.winfo_exists():
+            # The window was closed while checking; nothing left to update
+            return
+        if not future.done():
+            self.root.after(20, self.finish_login, future, enrollment)
+            return
+        self.btn_login.config(state=NORMAL, text="Login")
+        
+        try:
+            user = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Login failed: {e}", parent=self.root)
+            return
         
         if user:
-            messagebox.showinfo('Success', f"Login successful!\nWelcome {user[1]}")
             self.entry_id.delete(0, END)
             self.entry_pass.delete(0, END)
-            
-            # Open attendance viewer (to be implemented)
-            messagebox.showinfo(
-                "Attendance Records",
-                "Attendance viewing feature will be implemented here.\n"
-                "You can view your attendance history, statistics, etc."
-            )
+            self.open_viewer(enrollment)
         else:
-            messagebox.showerror("Error", "Invalid enrollment ID or password")
+            messagebox.showerror("Error", "Invalid enrollment ID or password", parent=self.root)
+    
+    def open_viewer(self, enrollment):
+        """Open the attendance dashboard, reusing this session's cached data"""
+        session = self.sessions.get(enrollment)
+        if session is None:
+            student = get_roster_cache().get_student(enrollment)
+            if not student:
+                messagebox.showinfo("Attendance Records", f"No student is registered with enrollment ID {enrollment}")
+                return
+            session = self.sessions[enrollment] = ViewerSession(student)
+        AttendanceViewer(Toplevel(self.root), session)
     
     def open_signup(self):
         """Open signup window"""
-        import subprocess
-        subprocess.Popen(['python', 'signup.py'])
+        SignupWindow(Toplevel(self.root))
 
 def main():
     root = Tk()
@@ -10,6 +10,15 @@ from PIL import Image, ImageTk
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from src.db_helper import DatabaseHelper
+from src.enrollment import build_enrollment
+from src.gallery_file import refresh_gallery
+from src.image_store import ImageStore
+from src.roster_cache import get_roster_cache
+from src.app_context import get_app_context
+from src.metrics import get_metrics
+from src.online_attendance import OnlineAttendance
+from src.manual_attendance import ManualAttendance
+from src.login import LoginWindow
 
 # Ensure directories exist
 Config.ensure_directories()
@@ -17,6 +26,7 @@ Config.ensure_directories()
 class MainInterface:
     def __init__(self, root):
         self.root = root
+        self.windows = {}
         self.setup_window()
         self.create_widgets()
     
@@ -103,7 +113,7 @@ class MainInterface:
         btn_clear_name.place(x=950, y=200)
         
         # Buttons
-        btn_takeimage = Button(
+        self.btn_takeimage = Button(
             self.root, 
             text="Register Student", 
             padx=30, 
@@ -114,7 +124,11 @@ class MainInterface:
             font="arial 12 bold",
             command=self.take_image
         )
-        btn_takeimage.place(x=100, y=380)
+        self.btn_takeimage.place(x=100, y=380)
+        # No registration while an attendance session is using the camera
+        get_app_context().on_camera_change(
+            lambda busy: self.btn_takeimage.config(state=DISABLED if busy else NORMAL)
+        )
         
         btn_online_attendance = Button(
             self.root, 
@@ -170,6 +184,17 @@ class MainInterface:
             messagebox.showerror("Error", f"Student with enrollment ID {enroll} already exists!")
             return
         
+        # Waits for background warm-up without blocking the Tk event loop
+        get_app_context().with_recognizer(
+            self.root, lambda recognizer: self.capture_student(enroll, name, recognizer.face_cascade)
+        )
+    
+    def capture_student(self, enroll, name, face_cascade):
+        """Capture a burst from the webcam and register the student"""
+        context = get_app_context()
+        if not context.claim_camera('registration'):
+            messagebox.showerror("Error", "The camera is in use by an attendance session")
+            return
         try:
             # Capture image from webcam
             cap = cv2.VideoCapture(0)
@@ -178,11 +203,12 @@ class MainInterface:
                 return
             
             start_time = time.time()
-            image = None
+            burst = []
             
             messagebox.showinfo("Info", f"Camera will capture in {Config.CAPTURE_DELAY} seconds. Please look at the camera!")
             
-            while True:
+            # Preview during the countdown, then keep a burst of frames to choose from
+            while len(burst) < Config.ENROLL_BURST_FRAMES:
                 ret, frame = cap.read()
                 if not ret:
                     break
@@ -190,30 +216,41 @@ class MainInterface:
                 cv2.imshow('Registration - Press Q to cancel', frame)
                 
                 if time.time() - start_time >= Config.CAPTURE_DELAY:
-                    image = frame
-                    break
+                    burst.append(frame)
                 
                 if cv2.waitKey(1) & 0xFF == ord('q'):
+                    burst = []
                     break
             
             cap.release()
             cv2.destroyAllWindows()
             
-            if image is None:
+            if not burst:
                 messagebox.showwarning("Cancelled", "Image capture cancelled")
                 return
             
-            # Save image
-            image_filename = f"{enroll}.png"
-            image_path = os.path.join(Config.IMAGES_DIR, image_filename)
-            cv2.imwrite(image_path, image)
+            # Score the burst and build the template from the best single-face frames
+            image, face_box, face_encoding = build_enrollment(burst, face_cascade)
+            if image is None:
+                messagebox.showerror("Error", "No clear single face was captured. Please try again.")
+                return
             
-            # Convert image to binary for database
+            # Encode the chosen image once into the content-addressed store;
+            # the database row keeps only its hash and metadata
             retval, buffer = cv2.imencode('.png', image)
-            binary_data = buffer.tobytes()
+            image_meta = ImageStore().put(buffer.tobytes(), image=image, face_box=face_box)
             
             # Insert into database
-            if DatabaseHelper.insert_student(enroll, name, binary_data):
+            if DatabaseHelper.insert_student(enroll, name, image_meta, face_encoding):
+                # The next session must see the new student without waiting for the cache TTL
+                get_roster_cache().expire_students()
+                gallery_error = refresh_gallery()
+                if gallery_error:
+                    messagebox.showwarning(
+                        'Gallery Not Updated',
+                        f"Student {name} was registered, but the recognition gallery could not be updated "
+                        f"({gallery_error}). Run 'python src/gallery_file.py refresh' before taking attendance."
+                    )
                 messagebox.showinfo('Success', f"Student {name} registered successfully!")
                 self.entry_enrollment.delete(0, END)
                 self.entry_name.delete(0, END)
@@ -222,23 +259,46 @@ class MainInterface:
         
         except Exception as e:
             messagebox.showerror('Error', f"An error occurred: {str(e)}")
+        finally:
+            context.release_camera('registration')
+    
+    def open_window(self, key, window_class, title):
+        """
+        Open an application window as a Toplevel of this process
+        
+        The window reuses the shared DB pool, caches and warm recognizer
+        instead of starting a new interpreter. A window that is already
+        open is raised instead of duplicated.
+        """
+        window = self.windows.get(key)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            return
+        
+        clicked = time.perf_counter()
+        window = Toplevel(self.root)
+        window_class(window)
+        self.windows[key] = window
+        window.update_idletasks()
+        print(f"{title} window opened in {(time.perf_counter() - clicked) * 1000:.0f} ms")
     
     def open_online_attendance(self):
         """Open online attendance window"""
-        import subprocess
-        subprocess.Popen(['python', os.path.join('src', 'online_attendance.py')])
+        self.open_window('online', OnlineAttendance, "Online Attendance")
     
     def open_manual_attendance(self):
         """Open manual attendance window"""
-        import subprocess
-        subprocess.Popen(['python', os.path.join('src', 'manual_attendance.py')])
+        self.open_window('manual', ManualAttendance, "Manual Attendance")
     
     def open_login(self):
         """Open login window"""
-        import subprocess
-        subprocess.Popen(['python', os.path.join('src', 'login.py')])
+        self.open_window('login', LoginWindow, "Login")
 
 def main():
+    # Warm the DB pool, caches and cascades while the main window is drawn
+    get_app_context().warm_up()
+    get_metrics().start_export()
     root = Tk()
     app = MainInterface(root)
     root.mainloop()
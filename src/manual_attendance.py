@@ -8,6 +8,7 @@ from datetime import date
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from src.db_helper import DatabaseHelper
+from src.roster_cache import get_roster_cache
 
 class ManualAttendance:
     def __init__(self, root):
@@ -80,7 +81,7 @@ class ManualAttendance:
         lbl_subject.place(x=100, y=240)
         
         # Get subjects from database
-        subjects = DatabaseHelper.get_all_subjects()
+        subjects = get_roster_cache().get_subjects()
         self.subject_dict = {f"{sub[2]}": sub[0] for sub in subjects} if subjects else {}
         
         self.subject_var = StringVar()
@@ -148,7 +149,7 @@ class ManualAttendance:
             messagebox.showwarning("Warning", "Please enter enrollment ID first")
             return
         
-        student = DatabaseHelper.get_student_by_roll_no(enroll_id)
+        student = get_roster_cache().get_student(enroll_id)
         if student:
             self.entry_name.delete(0, END)
             self.entry_name.insert(0, student[2])  # student[2] is name
@@ -172,11 +173,11 @@ class ManualAttendance:
             return
         
         # Get or create student
-        student = DatabaseHelper.get_student_by_roll_no(enroll_id)
+        student = get_roster_cache().get_student(enroll_id)
         if not student:
             # Create new student
             if DatabaseHelper.insert_student(enroll_id, name):
-                student = DatabaseHelper.get_student_by_roll_no(enroll_id)
+                student = get_roster_cache().get_student(enroll_id)
             else:
                 messagebox.showerror("Error", "Failed to create student record")
                 return
@@ -185,7 +186,13 @@ class ManualAttendance:
         subject_id = self.subject_dict[subject_name]
         
         # Mark attendance
-        if DatabaseHelper.mark_attendance(student_id, subject_id, status, 'manual'):
+        outcome = DatabaseHelper.mark_attendance_bulk([{
+            'student_id': student_id,
+            'subject_id': subject_id,
+            'status': status,
+            'attendance_type': 'manual',
+        }])[0]
+        if outcome in ('inserted', 'updated', 'unchanged'):
             messagebox.showinfo(
                 "Success", 
                 f"Attendance marked for {name}\n"
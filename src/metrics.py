@@ -0,0 +1,267 @@
+import atexit
+import bisect
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+# Log-spaced latency buckets from 50 microseconds to ~20 seconds, 25% apart,
+# so percentile estimates are within one bucket width of the true value
+BUCKETS = tuple(0.00005 * 1.25 ** i for i in range(58))
+
+
+def metric_key(name, labels):
+    """Prometheus-style series name, e.g. db_query{query="get_all_subjects"}"""
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed log-spaced buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100) by interpolating within its bucket"""
+        with self._lock:
+            counts, total, largest = list(self.counts), self.count, self.max
+        if not total:
+            return 0.0
+        rank = q / 100.0 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else largest
+                return min(lower + (upper - lower) * (rank - seen) / count, largest)
+            seen += count
+        return largest
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.sum / self.count * 1000.0, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000.0, 3),
+            'p95_ms': round(self.percentile(95) * 1000.0, 3),
+            'p99_ms': round(self.percentile(99) * 1000.0, 3),
+            'max_ms': round(self.max * 1000.0, 3),
+        }
+
+
+class _Timer:
+    """Context manager that records its duration into a histogram"""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics in the Prometheus text format"""
+
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Metrics:
+    """
+    Process-wide latency histograms and counters
+
+    Hot paths call timer() and count(). While disabled both return at once
+    (timer() hands back a shared no-op context manager), so instrumented
+    code costs one attribute check per call. When enabled, a background
+    thread writes a JSON snapshot every METRICS_INTERVAL seconds and an
+    optional HTTP endpoint on localhost serves the Prometheus text format.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = Config.METRICS_ENABLED if enabled is None else enabled
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+        self._last_totals = {}
+        self._last_export = time.monotonic()
+        self._lock = threading.Lock()
+        self._exporting = False
+        self._server = None
+
+    def _histogram(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def timer(self, name, **labels):
+        """Time a block: `with metrics.timer('detect'): ...`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram(name, labels))
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration measured elsewhere"""
+        if self.enabled:
+            self._histogram(name, labels).observe(seconds)
+
+    def count(self, name, n=1, **labels):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def snapshot(self):
+        """Histogram summaries and counter totals with their rate since the last snapshot"""
+        now = time.monotonic()
+        with self._lock:
+            histograms = list(self.histograms.items())
+            counters = dict(self.counters)
+            elapsed = now - self._last_export
+            previous, self._last_totals = self._last_totals, counters
+            self._last_export = now
+
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'histograms': {
+                metric_key(name, labels): histogram.summary()
+                for (name, labels), histogram in sorted(histograms)
+            },
+            'counters': {
+                metric_key(name, labels): {
+                    'total': total,
+                    'per_second': round((total - previous.get((name, labels), 0)) / elapsed, 2)
+                    if elapsed > 0 else 0.0,
+                }
+                for (name, labels), total in sorted(counters.items())
+            },
+        }
+
+    def prometheus_text(self):
+        """All series in the Prometheus exposition format"""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        lines = []
+        for name in sorted({name for (name, labels), histogram in histograms}):
+            lines.append(f"# TYPE attendance_{name}_seconds histogram")
+            for (series, labels), histogram in histograms:
+                if series != name:
+                    continue
+                with histogram._lock:
+                    counts, total, count = list(histogram.counts), histogram.sum, histogram.count
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + (float('inf'),), counts):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else f"{bound:.6g}"
+                    lines.append(f"{metric_key(f'attendance_{name}_seconds_bucket', labels + (('le', le),))} "
+                                 f"{cumulative}")
+                lines.append(f"{metric_key(f'attendance_{name}_seconds_sum', labels)} {total:.6f}")
+                lines.append(f"{metric_key(f'attendance_{name}_seconds_count', labels)} {count}")
+        for name in sorted({name for (name, labels), total in counters}):
+            lines.append(f"# TYPE attendance_{name}_total counter")
+            for (series, labels), total in counters:
+                if series == name:
+                    lines.append(f"{metric_key(f'attendance_{name}_total', labels)} {total}")
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path=None):
+        """Atomically write a JSON snapshot"""
+        path = path or Config.METRICS_FILE
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(self.snapshot(), tmp, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_export(self):
+        """Start the periodic JSON writer and, if METRICS_PORT is set, the HTTP endpoint"""
+        if not self.enabled or self._exporting:
+            return
+        self._exporting = True
+        threading.Thread(target=self._export_loop, daemon=True).start()
+        atexit.register(self.write_file)
+
+        if Config.METRICS_PORT:
+            handler = type('Handler', (MetricsHandler,), {'registry': self})
+            try:
+                self._server = ThreadingHTTPServer(('127.0.0.1', Config.METRICS_PORT), handler)
+            except OSError as e:
+                print(f"Could not start metrics endpoint: {e}")
+                return
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _export_loop(self):
+        while True:
+            time.sleep(Config.METRICS_INTERVAL)
+            try:
+                self.write_file()
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry"""
+    return _metrics
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+from src.face_recognizer import load_face_cascade
+from src.image_store import ImageStore
+
+
+def migrate(chunk_size=None, keep_blobs=False, verbose=True):
+    """
+    Move students.image blobs into the content-addressed image store
+
+    Ids are walked in keyset order, chunk_size at a time, and each blob is
+    fetched, stored and released on its own, so memory use is bounded by
+    one image no matter how large the table is. Interrupted runs can be
+    restarted; already-migrated rows no longer have a blob.
+
+    Returns:
+        Tuple (migrated, failed) counts
+    """
+    chunk_size = chunk_size or Config.MIGRATION_CHUNK_SIZE
+    if not DatabaseHelper.ensure_image_store_columns():
+        raise RuntimeError("Could not add image-store columns to the students table")
+
+    store = ImageStore()
+    face_cascade = load_face_cascade()
+    migrated, failed = 0, 0
+    last_id = 0
+    while True:
+        student_ids = DatabaseHelper.get_blob_student_ids(last_id, chunk_size)
+        if not student_ids:
+            break
+        for student_id in student_ids:
+            image_data = DatabaseHelper.get_student_blob(student_id)
+            image_meta = store.put(image_data, face_cascade) if image_data else None
+            if image_meta and DatabaseHelper.set_student_image(student_id, image_meta, not keep_blobs):
+                migrated += 1
+            else:
+                failed += 1
+                if verbose:
+                    print(f"Could not migrate image of student id {student_id}")
+        last_id = student_ids[-1]
+        if verbose:
+            print(f"Migrated {migrated} image(s) so far (last id {last_id})")
+
+    return migrated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move registration images from students.image into the image store"
+    )
+    parser.add_argument("--chunk-size", type=int, default=None, help="Student ids fetched per query")
+    parser.add_argument("--keep-blobs", action="store_true",
+                        help="Leave students.image in place (e.g. for a trial run)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    migrated, failed = migrate(args.chunk_size, args.keep_blobs, verbose=not args.quiet)
+    print(f"Migrated {migrated} image(s), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from tkinter import *
 from tkinter import messagebox
-import cv2
 import os
 import sys
 
@@ -8,16 +7,20 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from src.db_helper import DatabaseHelper
+from src.roster_cache import get_roster_cache
+from src.app_context import get_app_context
+from src.attendance_pipeline import AttendancePipeline
 
 class OnlineAttendance:
     def __init__(self, root):
         self.root = root
+        self.session_running = False
         self.setup_window()
         self.create_widgets()
     
     def setup_window(self):
         """Setup window"""
-        self.root.title("Online Attendance - Face Detection")
+        self.root.title("Online Attendance - Face Recognition")
         self.root.geometry("600x400")
         self.root.maxsize(600, 400)
         self.root.minsize(600, 400)
@@ -43,7 +46,7 @@ class OnlineAttendance:
         lbl_subject.place(x=50, y=100)
         
         # Get subjects from database
-        subjects = DatabaseHelper.get_all_subjects()
+        subjects = get_roster_cache().get_subjects()
         self.subject_dict = {f"{sub[2]}": sub[0] for sub in subjects} if subjects else {}
         
         from tkinter import ttk
@@ -60,8 +63,21 @@ class OnlineAttendance:
         if self.subject_dict:
             self.subject_combo.current(0)
         
+        # Cameras, e.g. "0" or "0,1"; all of them share one recognizer
+        lbl_cameras = Label(
+            self.root, 
+            text="Cameras:", 
+            font="arial 14",
+            bg=Config.BG_COLOR
+        )
+        lbl_cameras.place(x=50, y=200)
+        
+        self.entry_cameras = Entry(self.root, font="arial 14", width=20)
+        self.entry_cameras.insert(0, Config.CAMERA_SOURCES)
+        self.entry_cameras.place(x=160, y=200)
+        
         # Submit button
-        btn_submit = Button(
+        self.btn_submit = Button(
             self.root, 
             text="Start Attendance", 
             padx=30, 
@@ -72,12 +88,18 @@ class OnlineAttendance:
             font="arial 14 bold",
             command=self.start_attendance
         )
-        btn_submit.place(x=200, y=250)
+        self.btn_submit.place(x=200, y=245)
+        # Disabled while registration or a session is using the cameras
+        get_app_context().on_camera_change(
+            lambda busy: self.btn_submit.config(state=DISABLED if busy else NORMAL)
+        )
+        if get_app_context().camera_user is not None:
+            self.btn_submit.config(state=DISABLED)
         
         # Info label
         lbl_info = Label(
             self.root,
-            text="Note: Face detection will start. Press 'P' to stop.",
+            text="Note: Face recognition will start. Press 'P' to stop.",
             font="arial 10",
             bg=Config.BG_COLOR,
             fg='#555'
@@ -86,6 +108,9 @@ class OnlineAttendance:
     
     def start_attendance(self):
         """Start face detection based attendance"""
+        if self.session_running:
+            return
+        
         subject_name = self.subject_var.get()
         
         if not subject_name:
@@ -99,70 +124,68 @@ class OnlineAttendance:
         
         subject_id = subject[0]
         
+        cameras = [camera.strip() for camera in self.entry_cameras.get().split(',') if camera.strip()]
+        if not cameras:
+            messagebox.showerror("Error", "Please enter at least one camera")
+            return
+        
+        self.session_running = True
+        # Waits for background warm-up without blocking the Tk event loop
+        get_app_context().with_recognizer(
+            self.root, lambda recognizer: self.run_session(subject_id, subject_name, cameras, recognizer)
+        )
+    
+    def run_session(self, subject_id, subject_name, cameras, recognizer):
+        """Run one attendance session with the shared recognizer"""
+        # The display loop keeps the other windows responsive through
+        # root.update(), so the cameras are claimed to disable registration
+        # (which would open the same webcam) until the session ends
+        context = get_app_context()
+        if not context.claim_camera('online_attendance'):
+            self.session_running = False
+            messagebox.showerror("Error", "The camera is in use by student registration")
+            return
         try:
-            # Load cascade classifier
-            cascade_path = Config.FACE_CASCADE_PATH
-            if not os.path.exists(cascade_path):
-                # Fallback to OpenCV's built-in cascade
-                cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            
-            face_cascade = cv2.CascadeClassifier(cascade_path)
-            
-            # Start video capture
-            vid = cv2.VideoCapture(0)
-            if not vid.isOpened():
-                messagebox.showerror("Error", "Could not open webcam")
+            # Build the recognition index once for the whole session, limited
+            # to the subject's enrolled students when it has any
+            if recognizer.load_roster(subject_id) == 0:
+                messagebox.showerror("Error", "No enrolled student faces found in database")
                 return
             
-            detected_faces = []
+            # Capture, recognition and database writes run on separate threads;
+            # a student seen by several cameras is marked once
+            pipeline = AttendancePipeline(cameras, subject_id, recognizer)
+            if not pipeline.open():
+                messagebox.showerror("Error", f"Could not open camera(s): {', '.join(pipeline.failed_sources)}")
+                return
             
-            messagebox.showinfo("Info", "Face detection started. Press 'P' to stop and mark attendance.")
+            messagebox.showinfo("Info", "Face recognition started. Press 'P' to stop.")
             
-            while True:
-                ret, frame = vid.read()
-                if not ret:
-                    break
-                
-                # Convert to grayscale for detection
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                
-                # Detect faces
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-                
-                # Draw rectangles around faces
-                for (x, y, w, h) in faces:
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                    cv2.putText(frame, "Face Detected", (x, y-10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                
-                # Display frame
-                cv2.imshow("Online Attendance - Press 'P' to stop", frame)
-                
-                # Store detected faces count
-                if len(faces) > 0:
-                    detected_faces.append(len(faces))
-                
-                # Press 'P' to stop
-                if cv2.waitKey(1) & 0xFF == ord('p'):
-                    break
+            pipeline.start()
+            pipeline.run_display("Online Attendance - Press 'P' to stop", on_tick=self.root.update)
+            marked_students = pipeline.marked_students
             
-            vid.release()
-            cv2.destroyAllWindows()
+            if pipeline.writer.pending:
+                messagebox.showwarning(
+                    "Database Unavailable",
+                    f"{len(pipeline.writer.pending)} attendance mark(s) were saved locally "
+                    "and will be written the next time attendance is started."
+                )
             
-            if detected_faces:
+            if marked_students:
+                names = "\n".join(recognizer.student_label(sid) for sid in sorted(marked_students))
                 messagebox.showinfo(
-                    "Detection Complete", 
-                    f"Detected faces in {len(detected_faces)} frames.\n\n"
-                    "Note: In a complete system, this would:\n"
-                    "1. Recognize specific students\n"
-                    "2. Automatically mark their attendance\n"
-                    "3. Store records in database"
+                    "Attendance Complete", 
+                    f"Marked {len(marked_students)} student(s) present for {subject_name}:\n\n{names}"
                 )
             else:
-                messagebox.showwarning("No Detection", "No faces were detected")
+                messagebox.showwarning("No Recognition", "No enrolled students were recognized")
         
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
+        finally:
+            self.session_running = False
+            context.release_camera('online_attendance')
 
 def main():
     root = Tk()
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import time
+from datetime import date
+import os
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+COLUMNS = DatabaseHelper.REPORT_COLUMNS
+
+
+def new_progress():
+    """Counters an export updates as it writes, so they survive an interrupted export"""
+    return {'count': 0, 'last_key': None}
+
+
+def export_csv(rows, path, append=False, progress=None):
+    """
+    Write report rows to CSV as they arrive
+
+    Args:
+        progress: Optional dict from new_progress(), updated after every row
+
+    Returns:
+        Tuple (rows_written, last_key); last_key can be passed as `after`
+        to resume an interrupted export
+    """
+    progress = progress if progress is not None else new_progress()
+    with open(path, 'a' if append else 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        if not append:
+            writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            progress['count'] += 1
+            progress['last_key'] = row[:3]
+    return progress['count'], progress['last_key']
+
+
+def parquet_schema():
+    return pa.schema([
+        ('attendance_date', pa.date32()),
+        ('student_id', pa.int64()),
+        ('subject_id', pa.int64()),
+        ('roll_no', pa.string()),
+        ('student_name', pa.string()),
+        ('subject_code', pa.string()),
+        ('subject_name', pa.string()),
+        ('status', pa.string()),
+        ('attendance_type', pa.string()),
+        ('marked_at', pa.timestamp('s')),
+    ])
+
+
+def export_parquet(rows, path, batch_rows=None, progress=None):
+    """
+    Write report rows to Parquet, one row group per batch_rows rows
+
+    Only the current batch is held in memory. Requires pyarrow.
+
+    Args:
+        progress: Optional dict from new_progress(), updated after every
+                  row group written
+
+    Returns:
+        Tuple (rows_written, last_key)
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    batch_rows = batch_rows or Config.REPORT_PAGE_SIZE
+    progress = progress if progress is not None else new_progress()
+    schema = parquet_schema()
+    columns = [[] for _ in COLUMNS]
+    pending = {'last_key': None}
+
+    def flush(writer):
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+        progress['count'] += len(columns[0])
+        progress['last_key'] = pending['last_key']
+        for column in columns:
+            column.clear()
+
+    with pq.ParquetWriter(path, schema) as writer:
+        try:
+            for row in rows:
+                for column, value in zip(columns, row):
+                    column.append(value)
+                pending['last_key'] = row[:3]
+                if len(columns[0]) >= batch_rows:
+                    flush(writer)
+        finally:
+            # Rows already read are complete, so keep them even if reading failed
+            if columns[0]:
+                flush(writer)
+    return progress['count'], progress['last_key']
+
+
+def parse_key(text):
+    """Parse a resume key written as DATE,STUDENT_ID,SUBJECT_ID"""
+    day, student_id, subject_id = text.split(',')
+    return date.fromisoformat(day), int(student_id), int(subject_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendance records to CSV or Parquet")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=("csv", "parquet"), default=None,
+                        help="Output format (default: from the file extension)")
+    parser.add_argument("--student", action="append", default=[], help="Roll number (repeatable)")
+    parser.add_argument("--subject", action="append", default=[], help="Subject code (repeatable)")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None,
+                        help="First date YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None,
+                        help="Last date YYYY-MM-DD")
+    parser.add_argument("--after", type=parse_key, default=None,
+                        help="Resume after this key (DATE,STUDENT_ID,SUBJECT_ID, printed by a previous run)")
+    parser.add_argument("--append", action="store_true", help="Append to an existing CSV without a header")
+    args = parser.parse_args()
+
+    export_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    if args.append and export_format == 'parquet':
+        parser.error("--append only works with CSV; resume a Parquet export into a new file")
+
+    # Names are resolved to ids once so the report query filters on indexed columns
+    student_ids, subject_ids = [], []
+    for roll_no in args.student:
+        student = DatabaseHelper.get_student_by_roll_no(roll_no)
+        if not student:
+            print(f"Student {roll_no} not found in database")
+            sys.exit(1)
+        student_ids.append(student[0])
+    for code in args.subject:
+        subject = DatabaseHelper.get_subject_by_code(code)
+        if not subject:
+            print(f"Subject code {code} not found in database")
+            sys.exit(1)
+        subject_ids.append(subject[0])
+
+    rows = DatabaseHelper.iter_attendance_report(student_ids, subject_ids, args.date_from,
+                                                 args.date_to, after=args.after)
+    progress = new_progress()
+    failed = False
+    started = time.perf_counter()
+    try:
+        if export_format == 'parquet':
+            export_parquet(rows, args.output, progress=progress)
+        else:
+            export_csv(rows, args.output, append=args.append, progress=progress)
+    except KeyboardInterrupt:
+        failed = True
+        print("Export interrupted")
+    except Exception as e:
+        failed = True
+        print(f"Export failed: {e}")
+    finally:
+        # Always report how far the export got, so it can be resumed with --after
+        elapsed = time.perf_counter() - started
+        print(f"Exported {progress['count']} row(s) to {args.output} in {elapsed:.1f}s")
+        last_key = progress['last_key']
+        if last_key:
+            key = f"{last_key[0].isoformat()},{last_key[1]},{last_key[2]}"
+            print(f"Last key: {key}")
+            if failed and export_format == 'csv':
+                print(f"Resume with: --append --after {key}")
+            elif failed:
+                print(f"Resume into a new file with: --after {key}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
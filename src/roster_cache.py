@@ -0,0 +1,167 @@
+import threading
+import time
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from src.db_helper import DatabaseHelper
+
+
+class RosterCache:
+    """
+    In-process cache of subjects, students and face encodings
+
+    Subjects are reloaded when their TTL expires. Students and encodings
+    are synced incrementally: once the TTL expires only rows whose
+    updated_at is at or after the last seen value are fetched. A full
+    reload every CACHE_FULL_REFRESH seconds picks up deleted students.
+    """
+
+    def __init__(self, ttl=None, full_refresh=None):
+        self.ttl = ttl if ttl is not None else Config.CACHE_TTL
+        self.full_refresh = full_refresh if full_refresh is not None else Config.CACHE_FULL_REFRESH
+
+        self._subjects = None
+        self._subjects_loaded = 0.0
+        self._students = {}  # id -> (id, roll_no, name)
+        self._by_roll_no = {}  # roll_no -> (id, roll_no, name)
+        self._encodings = {}  # id -> face_encoding text
+        self._high_water = None  # newest students.updated_at seen
+        self._loaded = False
+        self._synced = 0.0
+        self._stale = False  # sync on next access regardless of the TTL
+        self._full_loaded = 0.0
+        self._lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'full_loads': 0,
+            'incremental_syncs': 0,
+            'rows_synced': 0,
+        }
+
+    def _record(self, queried_db):
+        self.stats['misses' if queried_db else 'hits'] += 1
+
+    def get_subjects(self):
+        """All subjects as (id, subject_code, subject_name) rows"""
+        with self._lock:
+            if self._subjects is not None and time.monotonic() - self._subjects_loaded < self.ttl:
+                self._record(False)
+                return self._subjects
+            self._record(True)
+            subjects = DatabaseHelper.get_all_subjects()
+            if subjects is None:
+                # Keep serving stale data rather than nothing if the DB hiccups
+                return self._subjects or []
+            self._subjects = subjects
+            self._subjects_loaded = time.monotonic()
+            return subjects
+
+    def _sync_students(self):
+        """Bring students/encodings up to date; returns True if the DB was queried"""
+        now = time.monotonic()
+        if self._loaded and not self._stale and now - self._synced < self.ttl:
+            return False
+
+        if not self._loaded or now - self._full_loaded >= self.full_refresh:
+            rows = DatabaseHelper.get_student_roster()
+            if rows is None:
+                return True
+            self._students.clear()
+            self._by_roll_no.clear()
+            self._encodings.clear()
+            self._high_water = None
+            self._loaded = True
+            self._full_loaded = now
+            self.stats['full_loads'] += 1
+        else:
+            rows = DatabaseHelper.get_student_roster(updated_since=self._high_water)
+            if rows is None:
+                return True
+            self.stats['incremental_syncs'] += 1
+
+        for student_id, roll_no, name, face_encoding, updated_at in rows:
+            old = self._students.get(student_id)
+            if old and old[1] != roll_no:
+                self._by_roll_no.pop(old[1], None)
+            student = (student_id, roll_no, name)
+            self._students[student_id] = student
+            self._by_roll_no[roll_no] = student
+            if face_encoding:
+                self._encodings[student_id] = face_encoding
+            else:
+                self._encodings.pop(student_id, None)
+            if self._high_water is None or updated_at > self._high_water:
+                self._high_water = updated_at
+        self.stats['rows_synced'] += len(rows)
+        self._synced = now
+        self._stale = False
+        return True
+
+    def get_students(self):
+        """All students as (id, roll_no, name) rows"""
+        with self._lock:
+            self._record(self._sync_students())
+            return list(self._students.values())
+
+    def get_face_encodings(self):
+        """All stored encodings as (id, face_encoding) rows"""
+        with self._lock:
+            self._record(self._sync_students())
+            return list(self._encodings.items())
+
+    def get_student(self, roll_no):
+        """
+        Look up one student by roll number
+
+        Returns:
+            (id, roll_no, name) or None; a roll number not in the cache is
+            looked up directly so newly registered students are found at once
+        """
+        with self._lock:
+            synced = self._sync_students()
+            student = self._by_roll_no.get(roll_no)
+            if student is not None:
+                self._record(synced)
+                return student
+            self._record(True)
+        student = DatabaseHelper.get_student_by_roll_no(roll_no)
+        if student:
+            with self._lock:
+                self._students[student[0]] = student
+                self._by_roll_no[roll_no] = student
+        return student
+
+    def expire_students(self):
+        """Make the next student lookup sync incrementally, e.g. right after a registration"""
+        with self._lock:
+            self._stale = True
+
+    def invalidate(self, kind=None):
+        """Force a reload of 'subjects', 'students' or (by default) everything"""
+        with self._lock:
+            if kind in (None, 'subjects'):
+                self._subjects = None
+            if kind in (None, 'students'):
+                self._loaded = False
+
+    def hit_ratio(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_roster_cache():
+    """Return the process-wide roster cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RosterCache()
+    return _cache
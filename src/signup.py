@@ -1,6 +1,5 @@
 from tkinter import *
 from tkinter import messagebox
-import bcrypt
 import os
 import sys
 
@@ -8,6 +7,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 from src.db_helper import DatabaseHelper
+from src.auth import get_auth_executor, hash_password
 
 class SignupWindow:
     def __init__(self, root):
@@ -83,7 +83,7 @@ class SignupWindow:
         self.entry_cpass.place(x=250, y=280)
         
         # Signup button
-        btn_signup = Button(
+        self.btn_signup = Button(
             self.root, 
             text="Create Account", 
             font="arial 14 bold", 
@@ -94,7 +94,7 @@ class SignupWindow:
             fg='white',
             command=self.signup
         )
-        btn_signup.place(x=200, y=360)
+        self.btn_signup.place(x=200, y=360)
     
     def signup(self):
         """Handle signup"""
@@ -116,12 +116,29 @@ class SignupWindow:
             messagebox.showwarning("Error", "Password must be at least 6 characters long")
             return
         
-        # Hash password using bcrypt
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        password_hash_str = password_hash.decode('utf-8')
+        # Hash with bcrypt on a worker thread so the window stays responsive
+        self.btn_signup.config(state=DISABLED)
+        future = get_auth_executor().submit(hash_password, password)
+        self.root.after(20, self.finish_signup, future, username, enrollment)
+    
+    def finish_signup(self, future, username, enrollment):
+        """Store the account once the password hash is ready"""
+        if not self.root.winfo_exists():
+            # The window was closed while hashing; nothing left to update
+            return
+        if not future.done():
+            self.root.after(20, self.finish_signup, future, username, enrollment)
+            return
+        self.btn_signup.config(state=NORMAL)
+        
+        try:
+            password_hash = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not create account: {e}")
+            return
         
         # Insert user into database
-        if DatabaseHelper.insert_user(username, enrollment, password_hash_str):
+        if DatabaseHelper.insert_user(username, enrollment, password_hash):
             messagebox.showinfo(
                 'Success', 
                 f"Account created successfully!\n\n"
@@ -0,0 +1,73 @@
+import argparse
+import csv
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.db_helper import DatabaseHelper
+from src.roster_cache import get_roster_cache
+
+
+def read_roll_numbers(path):
+    """Roll numbers from the first column of a CSV; a roll_no header row is skipped"""
+    with open(path, newline='') as csv_file:
+        rows = [row[0].strip() for row in csv.reader(csv_file) if row and row[0].strip()]
+    if rows and rows[0].lower() == 'roll_no':
+        rows = rows[1:]
+    return rows
+
+
+def enroll(subject_code, roll_nos):
+    """
+    Enroll students in a subject by roll number
+
+    Returns:
+        Tuple (newly_enrolled, unknown_roll_nos)
+    """
+    subject = DatabaseHelper.get_subject_by_code(subject_code)
+    if not subject:
+        raise ValueError(f"Subject code {subject_code} not found in database")
+
+    cache = get_roster_cache()
+    student_ids, unknown = [], []
+    for roll_no in roll_nos:
+        student = cache.get_student(roll_no)
+        if student:
+            student_ids.append(student[0])
+        else:
+            unknown.append(roll_no)
+
+    enrolled = DatabaseHelper.enroll_students_in_subject(subject[0], student_ids)
+    if enrolled is None:
+        raise RuntimeError("Could not save subject enrollments")
+    return enrolled, unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Enroll students in a subject so its sessions only match them"
+    )
+    parser.add_argument("subject", help="Subject code")
+    parser.add_argument("roll_nos", nargs="*", help="Roll numbers to enroll")
+    parser.add_argument("--csv", default=None, help="CSV whose first column holds roll numbers")
+    args = parser.parse_args()
+
+    roll_nos = list(args.roll_nos)
+    if args.csv:
+        roll_nos += read_roll_numbers(args.csv)
+    if not roll_nos:
+        parser.error("give roll numbers or --csv")
+
+    try:
+        enrolled, unknown = enroll(args.subject, roll_nos)
+    except (ValueError, RuntimeError) as e:
+        print(e)
+        sys.exit(1)
+    print(f"Enrolled {enrolled} new student(s) in {args.subject}")
+    if unknown:
+        print(f"Unknown roll number(s): {', '.join(unknown)}")
+
+
+if __name__ == "__main__":
+    main()
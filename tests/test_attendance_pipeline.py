@@ -0,0 +1,67 @@
+import time
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.attendance_pipeline import AttendancePipeline, StageCounter
+from src.face_recognizer import FaceIndex, FaceRecognizer
+from benchmarks.synthetic import classroom_video, synthetic_gallery
+
+FRAMES = 60
+
+
+def make_pipeline(sources, workers=2):
+    recognizer = FaceRecognizer()
+    recognizer.index = FaceIndex(*synthetic_gallery(50))
+    pipeline = AttendancePipeline(sources, None, recognizer, workers=workers, write_attendance=False)
+    assert pipeline.open(), pipeline.failed_sources
+    return pipeline
+
+
+def test_stage_counter_rate_stops_at_freeze():
+    counter = StageCounter('test_items')
+    counter.add(5)
+    counter.add()
+    time.sleep(0.01)
+    counter.freeze()
+    rate = counter.rate()
+    time.sleep(0.01)
+    assert counter.count == 6
+    assert rate > 0
+    assert counter.rate() == rate
+
+
+def test_run_headless_counts_every_stage():
+    video = classroom_video(320, 240, 4, FRAMES)
+    pipeline = make_pipeline(video)
+    pipeline.start()
+    stats = pipeline.run_headless()
+
+    assert stats['captured']['count'] == FRAMES
+    assert stats['processed']['count'] + stats['dropped']['count'] == FRAMES
+    assert stats['processed']['count'] > 0
+    assert stats['faces']['count'] > 0
+    assert stats['written']['count'] == 0
+    for stage in ('captured', 'processed', 'faces'):
+        assert stats[stage]['per_second'] > 0
+    assert stats['detection']['full_scans'] > 0
+
+    # Counters are frozen by stop(), so throughput no longer changes
+    time.sleep(0.05)
+    assert pipeline.stats()['processed']['per_second'] == stats['processed']['per_second']
+
+
+def test_run_headless_reports_each_source():
+    videos = [classroom_video(320, 240, 4, FRAMES), classroom_video(320, 240, 2, FRAMES)]
+    pipeline = make_pipeline(videos)
+    pipeline.start()
+    stats = pipeline.run_headless()
+
+    assert [source['source'] for source in stats['sources']] == [str(video) for video in videos]
+    for source in stats['sources']:
+        assert source['captured'] == FRAMES
+        assert source['processed'] + source['dropped'] == FRAMES
+        assert source['capture_fps'] > 0
+    assert stats['captured']['count'] == 2 * FRAMES
+    assert stats['processed']['count'] == sum(source['processed'] for source in stats['sources'])
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.memory_check import check
+from benchmarks.synthetic import classroom_video
+
+MAX_GROWTH_KB = 512
+
+
+def test_pipeline_memory_stays_flat():
+    video = classroom_video(320, 240, 4, 300)
+    result = check(video, workers=2, gallery=200, warmup=0.2, interval=0.01)
+
+    assert result['frames'] > 0
+    growth_kb = (result['at_end'] - result['after_warmup']) / 1024
+    assert growth_kb < MAX_GROWTH_KB, f"traced memory grew by {growth_kb:.0f} KB after warm-up"
+
+    # Frame buffers are allocated once per ring slot, not once per frame
+    buffers = result['stats']['buffers']
+    assert buffers['frame_allocations'] < result['frames'] / 4